@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from ..database import get_db
 from ..models.user import User
 from ..schemas.user import UserCreate, UserResponse, UserLogin, Token
 from ..utils.auth import (
-    get_password_hash,
-    verify_password,
+    password_hasher,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
@@ -16,44 +16,54 @@ from ..utils.auth import (
 router = APIRouter()
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     # 检查用户名是否已存在
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await db.scalar(select(User).filter(User.username == user.username))
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
     # 检查邮箱是否已存在
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).filter(User.email == user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # 创建新用户
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """用户登录"""
     # 验证用户
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await db.scalar(select(User).filter(User.username == form_data.username))
+    verified, new_hash = (False, None)
+    if user:
+        verified, new_hash = await password_hasher.verify_and_update(
+            form_data.password, user.hashed_password
+        )
+    if not verified:
         raise HTTPException(
             status_code=401,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # 哈希参数（cost factor）变更后，登录时透明地重新哈希
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     # 创建访问令牌
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_db
+from ..schemas.batch import BatchRequest, BatchResponse
+from ..services.batch import run_batch, MAX_BATCH_OPERATIONS
+from ..utils.auth import get_current_user
+
+router = APIRouter()
+
+@router.post("/", response_model=BatchResponse)
+async def batch(
+    request: BatchRequest,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """在一个事务中执行一批任务、笔记、工具、步骤和提示词的增删改查，逐个返回结果"""
+    if not request.operations:
+        raise HTTPException(status_code=400, detail="No operations")
+    if len(request.operations) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_OPERATIONS} operations per batch")
+    return await run_batch(db, current_user.id, request.operations, request.atomic)
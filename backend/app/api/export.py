@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import select
+from ..database import get_db, get_session_factory
+from ..models.project import Project
+from ..services.export import export_ndjson, NDJSON_MEDIA_TYPE
+from ..utils.auth import get_current_user
+
+router = APIRouter()
+
+def ndjson_response(body, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/projects/{project_id}")
+async def export_project(
+    project_id: int,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """流式导出单个项目（NDJSON）"""
+    project_exists = await db.scalar(select(Project.id).filter(
+        Project.id == project_id,
+        Project.user_id == current_user.id
+    ))
+    if not project_exists:
+        raise HTTPException(status_code=404, detail="Project not found")
+    body = export_ndjson(session_factory, current_user.id, "project", project_ids=[project_id])
+    return ndjson_response(body, f"project-{project_id}.ndjson")
+
+@router.get("/projects")
+async def export_projects(
+    current_user = Depends(get_current_user),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """流式导出全部项目（NDJSON）"""
+    body = export_ndjson(session_factory, current_user.id, "projects")
+    return ndjson_response(body, "projects.ndjson")
+
+@router.get("/account")
+async def export_account(
+    current_user = Depends(get_current_user),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """流式导出账户下的全部数据：项目、任务、笔记和工具（NDJSON）"""
+    body = export_ndjson(session_factory, current_user.id, "account", include_account=True)
+    return ndjson_response(body, "account.ndjson")
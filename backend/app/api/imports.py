@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_db
+from ..schemas.transfer import ImportFormat, ImportReport
+from ..services.export import NDJSON_MEDIA_TYPE
+from ..services.importer import import_records
+from ..utils.auth import get_current_user
+
+router = APIRouter()
+
+@router.post("/", response_model=ImportReport)
+async def import_data(
+    request: Request,
+    format: ImportFormat = ImportFormat.AUTO,
+    dry_run: bool = False,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """流式导入项目脚本 JSON 或 NDJSON 导出文件；dry_run 时只校验不写入"""
+    if format == ImportFormat.AUTO and request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        format = ImportFormat.NDJSON
+    report = await import_records(db, current_user.id, request.stream(), format, dry_run)
+    if dry_run or report.errors:
+        await db.rollback()
+        if report.errors and not dry_run:
+            raise HTTPException(status_code=422, detail=jsonable_encoder(report))
+        return report
+    await db.commit()
+    return report
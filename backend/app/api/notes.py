@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from typing import List, Optional
 from ..database import get_db
 from ..models.note import Note
-from ..schemas.note import NoteCreate, NoteUpdate, NoteResponse
+from ..schemas.note import NoteCreate, NoteUpdate, NoteResponse, NoteList, NoteOrderBy
 from ..utils.auth import get_current_user
+from ..schemas.search import SearchHit, SearchType
+from ..services.search import hits_statement
+from ..services.pagination import SortKey, apply_keyset, split_page
+from ..services.etags import collection_etag, is_not_modified, not_modified, with_etag
+
+# 列表默认返回的摘要列
+SUMMARY_COLUMNS = (Note.id, Note.title, Note.excerpt, Note.created_at, Note.updated_at)
 
 router = APIRouter()
 
@@ -12,34 +20,75 @@ router = APIRouter()
 async def create_note(
     note: NoteCreate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """创建新笔记"""
     db_note = Note(**note.model_dump(), user_id=current_user.id)
     db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
+    await db.refresh(db_note)
     return db_note
 
-@router.get("/", response_model=List[NoteResponse])
+@router.get("/", response_model=NoteList, response_model_exclude_unset=True)
 async def get_notes(
+    request: Request,
+    response: Response,
+    order_by: NoteOrderBy = NoteOrderBy.CREATED_DESC,
+    page: int = Query(1, gt=0),
+    page_size: int = Query(20, gt=0, le=100),
+    cursor: Optional[str] = None,
+    include_content: bool = False,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """分页获取笔记摘要（不含正文）；include_content 时附带完整内容；传入 cursor 时使用键集分页（忽略 page）"""
+    etag = await collection_etag(db, request, "notes", current_user.id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    columns = SUMMARY_COLUMNS + (Note.content,) if include_content else SUMMARY_COLUMNS
+    query = select(*columns).filter(Note.user_id == current_user.id)
+    total = await db.scalar(select(func.count()).select_from(Note).filter(Note.user_id == current_user.id))
+    
+    # 排序：以 id 作为稳定的第二排序键，(user_id, 排序列) 上有索引
+    if order_by == NoteOrderBy.CREATED_ASC:
+        keys = [SortKey("created_at", Note.created_at), SortKey("id", Note.id)]
+    elif order_by == NoteOrderBy.UPDATED_DESC:
+        keys = [SortKey("updated_at", Note.updated_at, True), SortKey("id", Note.id, True)]
+    else:
+        keys = [SortKey("created_at", Note.created_at, True), SortKey("id", Note.id, True)]
+    
+    scope = f"notes:{order_by.value}"
+    query = apply_keyset(query, keys, scope, cursor, page, page_size)
+    items, next_cursor = split_page((await db.execute(query)).all(), keys, scope, page_size, entities=False)
+    
+    with_etag(response, etag)
+    return NoteList(total=total, items=items, next_cursor=next_cursor)
+
+@router.get("/search", response_model=List[SearchHit])
+async def search_notes(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, gt=0, le=100),
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取所有笔记"""
-    return db.query(Note).filter(Note.user_id == current_user.id).all()
+    """全文检索笔记，按相关度排序并返回高亮片段"""
+    rows = await db.execute(hits_statement("notes", current_user.id, q, limit))
+    return [
+        SearchHit(type=SearchType.NOTES, id=row.id, title=row.title or "", snippet=row.snippet or "", rank=row.rank)
+        for row in rows
+    ]
 
 @router.get("/{note_id}", response_model=NoteResponse)
 async def get_note(
     note_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """获取特定笔记"""
-    note = db.query(Note).filter(
+    note = await db.scalar(select(Note).filter(
         Note.id == note_id,
         Note.user_id == current_user.id
-    ).first()
+    ))
     if note is None:
         raise HTTPException(status_code=404, detail="Note not found")
     return note
@@ -49,13 +98,13 @@ async def update_note(
     note_id: int,
     note_update: NoteUpdate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """更新笔记"""
-    db_note = db.query(Note).filter(
+    db_note = await db.scalar(select(Note).filter(
         Note.id == note_id,
         Note.user_id == current_user.id
-    ).first()
+    ))
     if db_note is None:
         raise HTTPException(status_code=404, detail="Note not found")
     
@@ -63,24 +112,24 @@ async def update_note(
     for field, value in update_data.items():
         setattr(db_note, field, value)
     
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
+    await db.refresh(db_note)
     return db_note
 
 @router.delete("/{note_id}")
 async def delete_note(
     note_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """删除笔记"""
-    db_note = db.query(Note).filter(
+    db_note = await db.scalar(select(Note).filter(
         Note.id == note_id,
         Note.user_id == current_user.id
-    ).first()
+    ))
     if db_note is None:
         raise HTTPException(status_code=404, detail="Note not found")
     
-    db.delete(db_note)
-    db.commit()
+    await db.delete(db_note)
+    await db.commit()
     return {"message": "Note deleted successfully"} 
\ No newline at end of file
@@ -1,12 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import select, update, func
 from typing import List, Optional
-from ..database import get_db
+from ..database import get_db, get_session_factory
 from ..models.project_prompt import ProjectPrompt
-from ..schemas.project_prompt import PromptCreate, PromptUpdate, PromptResponse, PromptList
+from ..schemas.common import MoveRequest
+from ..schemas.project_prompt import (
+    PromptCreate, PromptUpdate, PromptResponse, PromptList,
+    PromptRenderRequest, PromptRenderResponse, PromptBatchRenderRequest, PromptBatchRenderResponse,
+    PromptDiff, DiffMode, DiffField, SimilarPromptList, DuplicateReport
+)
 from ..utils.auth import get_current_user
 from ..models.project_step import ProjectStep
 from ..models.project import Project
+from ..services.sequences import next_value, advance_to
+from ..services.ordering import ORDERED_LISTS, move, reorder, rebalance_later
+from ..services.prompt_history import load_contents, resolve_contents, store_version, detach_dependents, promote_latest
+from ..services.fieldsets import FIELDSETS
+from ..services.etags import collection_etag, is_not_modified, not_modified, with_etag
+from ..services.project_tree import project_cache
+from ..services.serialization import negotiated_response
+from ..services.rendering import template_cache, MissingVariables, MAX_RENDER_ROWS
+from ..services.diffing import diff_cache
+from ..services.similarity import similarity_indexes, similarity_available, compute_signatures
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -14,7 +31,7 @@ router = APIRouter()
 # 添加重排序请求的模型
 class PromptOrderItem(BaseModel):
     id: int
-    order: int
+    order: int    # 位置，从 1 开始
 
 class PromptReorderRequest(BaseModel):
     step_id: int
@@ -24,111 +41,214 @@ class PromptReorderRequest(BaseModel):
 async def create_prompt(
     prompt: PromptCreate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """创建新提示词"""
     # 验证项目所有权
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).filter(
         Project.id == prompt.project_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     # 如果提供了步骤ID，验证步骤存在性
     if prompt.step_id:
-        step = db.query(ProjectStep).filter(
+        step = await db.scalar(select(ProjectStep).filter(
             ProjectStep.id == prompt.step_id,
             ProjectStep.project_id == prompt.project_id
-        ).first()
+        ))
         if not step:
             raise HTTPException(status_code=404, detail="Step not found")
     
-    # 获取当前最大顺序号
-    max_order = db.query(ProjectPrompt).filter(
-        ProjectPrompt.step_id == prompt.step_id
-    ).count()
-    
     # 创建新提示词，移除可能重复的字段
     prompt_data = prompt.model_dump()
     prompt_data.pop('version', None)  # 移除 version 字段
     prompt_data.pop('order', None)    # 移除 order 字段
     
-    # 创建新提示词
+    # 创建新提示词（新的版本链，lineage_id 由触发器设为自身 ID）
     db_prompt = ProjectPrompt(
         **prompt_data,
         version=1,           # 新提示词版本从1开始
-        order=max_order + 1  # 设置顺序号
+        order=await next_value(db, "prompt_order", project_id=prompt.project_id, step_id=prompt.step_id)
     )
     db.add(db_prompt)
-    db.commit()
-    db.refresh(db_prompt)
+    await db.commit()
+    project_cache.invalidate(prompt.project_id)
+    await db.refresh(db_prompt)
     return db_prompt
 
-@router.get("/step/{step_id}", response_model=PromptList)
+@router.get("/step/{step_id}", response_model=None, responses=FIELDSETS["prompts"].responses(PromptList))
 async def get_step_prompts(
+    request: Request,
     step_id: int,
+    latest_only: bool = False,
+    fields: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取步骤的所有提示词；latest_only 时只返回每个版本链的最新版本，传入 fields 时只返回指定字段；支持 If-None-Match 条件请求"""
+    fieldset = FIELDSETS["prompts"]
+    names = fieldset.parse(fields)
+    etag = await collection_etag(db, request, "prompts", current_user.id, step_id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    
+    # 由所属项目的树缓存提供；缓存中没有该步骤时先查出所属项目（同时验证所有权）
+    snapshot = None
+    project_id = project_cache.project_of_step(step_id)
+    if project_id is not None:
+        snapshot = await project_cache.get(db, project_id, current_user.id)
+        if snapshot is None or not snapshot.has_step(step_id):
+            # 映射可能已过期（步骤被删除后 ID 被复用到其他项目），丢弃后按数据库重新定位
+            project_cache.forget_step(step_id, project_id)
+            snapshot = None
+    if snapshot is None:
+        project_id = await db.scalar(select(ProjectStep.project_id).join(Project).filter(
+            ProjectStep.id == step_id,
+            Project.user_id == current_user.id
+        ))
+        snapshot = await project_cache.get(db, project_id, current_user.id) if project_id is not None else None
+    if snapshot is None or not snapshot.has_step(step_id):
+        raise HTTPException(status_code=404, detail="Step not found")
+    
+    # 先按顺序，再按版本排序
+    return with_etag(negotiated_response(request, {"items": snapshot.prompt_items(step_id, names, latest_only)}), etag)
+
+async def prompt_summaries(db: AsyncSession, user_id: int, ids) -> dict:
+    """回表读取提示词摘要（校验所有权，已删除的提示词不在结果中）"""
+    ids = list(ids)
+    if not ids:
+        return {}   # 空的 IN 会让 SQLite 扫描整张表
+    return {row.id: row._asdict() for row in (await db.execute(select(
+        ProjectPrompt.id, ProjectPrompt.title, ProjectPrompt.project_id, ProjectPrompt.step_id, ProjectPrompt.version
+    ).join(Project).filter(
+        ProjectPrompt.id.in_(ids),
+        Project.user_id == user_id
+    ))).all()}
+
+def require_similarity():
+    if not similarity_available:
+        raise HTTPException(status_code=503, detail="Similarity search requires numpy")
+
+@router.get("/duplicates", response_model=DuplicateReport)
+async def get_duplicate_clusters(
+    threshold: float = Query(0.8, gt=0, le=1),
+    min_size: int = Query(2, ge=2),
+    include_versions: bool = False,
+    limit: int = Query(50, gt=0, le=500),
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取步骤的所有提示词"""
+    """近似重复的提示词分组，按组大小降序；默认只比较各版本链的最新版本"""
+    require_similarity()
+    index = await similarity_indexes.get(db, current_user.id)
+    async with index.lock:
+        candidates = await run_in_threadpool(index.clusters, threshold, include_versions, min_size)
+    candidates = candidates[:limit]
+    summaries = await prompt_summaries(db, current_user.id, (prompt_id for cluster in candidates for prompt_id, _ in cluster))
+    clusters = []
+    for cluster in candidates:
+        items = [{**summaries[prompt_id], "similarity": score} for prompt_id, score in cluster if prompt_id in summaries]
+        if len(items) >= min_size:
+            clusters.append({"size": len(items), "items": items})
+    return {"clusters": clusters}
+
+# 固定路径需在 /{prompt_id} 之前注册，否则会被当作提示词 ID 匹配
+@router.put("/reorder", response_model=PromptList)
+async def reorder_prompts(
+    reorder_data: PromptReorderRequest,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """按位置批量重排提示词（以版本链为单位）
+
+    请求中的 order 是从 1 开始的位置，写入时换算为稀疏排序键，响应中的 order 是排序键而不是位置。
+    """
     # 验证步骤所属项目的所有权
-    step = db.query(ProjectStep).join(Project).filter(
-        ProjectStep.id == step_id,
+    step = await db.scalar(select(ProjectStep).join(Project).filter(
+        ProjectStep.id == reorder_data.step_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
     
     if not step:
         raise HTTPException(status_code=404, detail="Step not found")
     
-    prompts = db.query(ProjectPrompt).filter(
-        ProjectPrompt.step_id == step_id
-    ).order_by(ProjectPrompt.order, ProjectPrompt.version.desc()).all()  # 先按顺序，再按版本排序
+    # 按版本链重排，只写排序键确实变化的链
+    prompt_ids = [prompt.id for prompt in reorder_data.prompts]
+    lineages = dict((await db.execute(select(ProjectPrompt.id, ProjectPrompt.lineage_id).filter(
+        ProjectPrompt.id.in_(prompt_ids),
+        ProjectPrompt.step_id == reorder_data.step_id
+    ))).all())
+    await reorder(db, ORDERED_LISTS["prompt"], {"project_id": step.project_id, "step_id": step.id},
+                  {lineages[item.id]: item.order for item in reorder_data.prompts if item.id in lineages})
+    await db.commit()
+    project_cache.invalidate(step.project_id)
     
-    return PromptList(items=prompts)
+    # 返回更新后的提示词列表
+    updated_prompts = (await db.scalars(select(ProjectPrompt).filter(
+        ProjectPrompt.step_id == reorder_data.step_id
+    ).order_by(ProjectPrompt.order, ProjectPrompt.version.desc()))).all()
+    await load_contents(db, updated_prompts)
+    
+    return PromptList(items=updated_prompts)
 
 @router.put("/{prompt_id}", response_model=PromptResponse)
 async def update_prompt(
     prompt_id: int,
     prompt_update: PromptUpdate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """更新提示词"""
     # 验证提示词所属项目的所有权
-    prompt = db.query(ProjectPrompt).join(Project).filter(
+    prompt = await db.scalar(select(ProjectPrompt).join(Project).filter(
         ProjectPrompt.id == prompt_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
     
     if not prompt:
         raise HTTPException(status_code=404, detail="Prompt not found")
     
-    # 更新提示词
-    for field, value in prompt_update.model_dump(exclude_unset=True).items():
+    # 更新提示词；内容变化时以它为基础的差量版本先改存完整内容
+    update_data = prompt_update.model_dump(exclude_unset=True)
+    if "content" in update_data:
+        await detach_dependents(db, [prompt.id])
+        prompt.content_delta = None
+        prompt.delta_base_id = None
+        prompt.delta_depth = 0
+    for field, value in update_data.items():
         setattr(prompt, field, value)
+    if update_data.get("order") is not None:
+        await advance_to(db, "prompt_order", prompt.order, project_id=prompt.project_id, step_id=prompt.step_id)
     
-    db.commit()
-    db.refresh(prompt)
+    await db.commit()
+    project_cache.invalidate(prompt.project_id)
+    await db.refresh(prompt)
+    await load_contents(db, [prompt])
     return prompt
 
 @router.delete("/{prompt_id}")
 async def delete_prompt(
     prompt_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """删除提示词"""
-    prompt = db.query(ProjectPrompt).join(Project).filter(
+    prompt = await db.scalar(select(ProjectPrompt).join(Project).filter(
         ProjectPrompt.id == prompt_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
     
     if not prompt:
         raise HTTPException(status_code=404, detail="Prompt not found")
     
-    db.delete(prompt)
-    db.commit()
+    await detach_dependents(db, [prompt.id])
+    await db.delete(prompt)
+    if prompt.is_latest:
+        await promote_latest(db, prompt.lineage_id)
+    await db.commit()
+    project_cache.invalidate(prompt.project_id)
     return {"message": "Prompt deleted successfully"}
 
 @router.post("/{prompt_id}/versions", response_model=PromptResponse)
@@ -136,96 +256,230 @@ async def create_prompt_version(
     prompt_id: int,
     prompt_update: PromptUpdate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """创建提示词新版本"""
-    original = db.query(ProjectPrompt).join(Project).filter(
+    original = await db.scalar(select(ProjectPrompt).join(Project).filter(
         ProjectPrompt.id == prompt_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
     
     if not original:
         raise HTTPException(status_code=404, detail="Prompt not found")
     
-    # 获取当前最大版本号
-    max_version = db.query(ProjectPrompt).filter(
-        ProjectPrompt.project_id == original.project_id,
-        ProjectPrompt.step_id == original.step_id
-    ).count()
-    
-    # 创建新版本
+    # 创建新版本，内容存为相对原版本的差量
+    await load_contents(db, [original])
     new_version = ProjectPrompt(
         title=prompt_update.title or original.title,
-        content=prompt_update.content or original.content,
         variables=prompt_update.variables or original.variables,
         project_id=original.project_id,
         step_id=original.step_id,
-        version=max_version + 1
+        lineage_id=original.lineage_id,
+        order=original.order,
+        version=await next_value(db, "lineage_version", lineage_id=original.lineage_id)
     )
+    await store_version(db, new_version, original, prompt_update.content or original.content)
     
+    await db.execute(update(ProjectPrompt).filter(
+        ProjectPrompt.lineage_id == original.lineage_id,
+        ProjectPrompt.is_latest == True
+    ).values(is_latest=False))
     db.add(new_version)
-    db.commit()
-    db.refresh(new_version)
+    await db.commit()
+    project_cache.invalidate(original.project_id)
+    await db.refresh(new_version)
+    await load_contents(db, [new_version])
     return new_version
 
 @router.get("/{prompt_id}/versions", response_model=List[PromptResponse])
 async def get_prompt_versions(
     prompt_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """获取提示词的所有版本"""
-    prompt = db.query(ProjectPrompt).join(Project).filter(
+    prompt = await db.scalar(select(ProjectPrompt).join(Project).filter(
         ProjectPrompt.id == prompt_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
     
     if not prompt:
         raise HTTPException(status_code=404, detail="Prompt not found")
     
-    versions = db.query(ProjectPrompt).filter(
-        ProjectPrompt.project_id == prompt.project_id,
-        ProjectPrompt.step_id == prompt.step_id
-    ).order_by(ProjectPrompt.version.desc()).all()
+    versions = (await db.scalars(select(ProjectPrompt).filter(
+        ProjectPrompt.lineage_id == prompt.lineage_id
+    ).order_by(ProjectPrompt.version.desc()))).all()
+    await load_contents(db, versions)
     
     return versions
 
-@router.put("/reorder", response_model=PromptList)
-async def reorder_prompts(
-    reorder_data: PromptReorderRequest,
+@router.get("/{prompt_id}/diff", response_model=PromptDiff)
+async def diff_prompt_versions(
+    request: Request,
+    prompt_id: int,
+    from_version: Optional[int] = Query(None, alias="from"),
+    to_version: Optional[int] = Query(None, alias="to"),
+    mode: DiffMode = DiffMode.LINE,
+    field: DiffField = DiffField.CONTENT,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """重新排序提示词"""
-    # 验证步骤所属项目的所有权
-    step = db.query(ProjectStep).join(Project).filter(
-        ProjectStep.id == reorder_data.step_id,
+    """比较同一版本链中的两个版本；to 默认为该提示词的版本，from 默认为 to 之前最近的版本"""
+    prompt = (await db.execute(select(ProjectPrompt.lineage_id, ProjectPrompt.version).join(Project).filter(
+        ProjectPrompt.id == prompt_id,
         Project.user_id == current_user.id
-    ).first()
-    
-    if not step:
-        raise HTTPException(status_code=404, detail="Step not found")
-    
-    # 获取所有需要更新的提示词
-    prompt_ids = [prompt.id for prompt in reorder_data.prompts]
-    prompts = db.query(ProjectPrompt).filter(
-        ProjectPrompt.id.in_(prompt_ids),
-        ProjectPrompt.step_id == reorder_data.step_id
-    ).all()
-    
-    # 创建 id 到提示词的映射
-    prompts_map = {prompt.id: prompt for prompt in prompts}
+    ))).first()
+    if not prompt:
+        raise HTTPException(status_code=404, detail="Prompt not found")
     
-    # 更新提示词顺序
-    for prompt_order in reorder_data.prompts:
-        if prompt_order.id in prompts_map:
-            prompts_map[prompt_order.id].order = prompt_order.order
+    if to_version is None:
+        to_version = prompt.version
+    if from_version is None:
+        from_version = await db.scalar(select(func.max(ProjectPrompt.version)).filter(
+            ProjectPrompt.lineage_id == prompt.lineage_id,
+            ProjectPrompt.version < to_version
+        ))
+    rows = {row.version: row for row in (await db.execute(select(
+        ProjectPrompt.id, ProjectPrompt.version, ProjectPrompt.content, ProjectPrompt.content_delta,
+        ProjectPrompt.delta_base_id, ProjectPrompt.response
+    ).filter(
+        ProjectPrompt.lineage_id == prompt.lineage_id,
+        ProjectPrompt.version.in_([v for v in (from_version, to_version) if v is not None])
+    ))).all()}
+    if to_version not in rows or (from_version is not None and from_version not in rows):
+        raise HTTPException(status_code=404, detail="Version not found")
     
-    db.commit()
+    old, new = rows.get(from_version), rows[to_version]
+    if field == DiffField.CONTENT:
+        texts = await resolve_contents(db, [row for row in (old, new) if row is not None])
+    else:
+        texts = {row.id: row.response for row in (old, new) if row is not None}
+    # 差异计算最长占用 DIFF_TIME_BUDGET 的 CPU，放到线程池中避免阻塞事件循环
+    result = await run_in_threadpool(
+        diff_cache.diff, old.id if old else None, new.id,
+        (texts[old.id] if old else None) or "", texts[new.id] or "", mode.value, field.value
+    )
+    return negotiated_response(request, {
+        "from_id": old.id if old else None, "to_id": new.id,
+        "from_version": from_version, "to_version": to_version,
+        "mode": mode.value, "field": field.value, **result
+    })
+
+@router.get("/{prompt_id}/similar", response_model=SimilarPromptList)
+async def get_similar_prompts(
+    prompt_id: int,
+    threshold: float = Query(0.7, gt=0, le=1),
+    limit: int = Query(20, gt=0, le=100),
+    include_versions: bool = False,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """与该提示词内容相似的其他提示词，按相似度降序；默认跳过同一版本链和非最新版本"""
+    require_similarity()
+    prompt = (await db.execute(select(
+        ProjectPrompt.id, ProjectPrompt.lineage_id, ProjectPrompt.content,
+        ProjectPrompt.content_delta, ProjectPrompt.delta_base_id
+    ).join(Project).filter(
+        ProjectPrompt.id == prompt_id,
+        Project.user_id == current_user.id
+    ))).first()
+    if not prompt:
+        raise HTTPException(status_code=404, detail="Prompt not found")
     
-    # 返回更新后的提示词列表
-    updated_prompts = db.query(ProjectPrompt).filter(
-        ProjectPrompt.step_id == reorder_data.step_id
-    ).order_by(ProjectPrompt.order).all()
+    index = await similarity_indexes.get(db, current_user.id)
+    signature = index.signature_of(prompt_id)
+    if signature is None:
+        # 未归属步骤的提示词不在索引中，现算签名
+        signatures, _ = compute_signatures([(await resolve_contents(db, [prompt]))[prompt.id]])
+        if not len(signatures):
+            return {"items": []}
+        signature = signatures[0]
+    matches = index.query(signature, prompt_id, prompt.lineage_id or prompt_id, threshold, include_versions)
+    matches = matches[:limit]
+    summaries = await prompt_summaries(db, current_user.id, (match_id for match_id, _ in matches))
+    return {"items": [{**summaries[match_id], "similarity": score} for match_id, score in matches if match_id in summaries]}
+
+@router.post("/{prompt_id}/move", response_model=PromptResponse)
+async def move_prompt(
+    prompt_id: int,
+    move_request: MoveRequest,
+    background_tasks: BackgroundTasks,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """把提示词（整个版本链）移到同一步骤中另一提示词之前或之后"""
+    prompt = await db.scalar(select(ProjectPrompt).join(Project).filter(
+        ProjectPrompt.id == prompt_id,
+        Project.user_id == current_user.id
+    ))
+    if not prompt:
+        raise HTTPException(status_code=404, detail="Prompt not found")
+    anchor_lineage = await db.scalar(select(ProjectPrompt.lineage_id).filter(
+        ProjectPrompt.id == move_request.anchor_id,
+        ProjectPrompt.project_id == prompt.project_id,
+        ProjectPrompt.step_id.is_not_distinct_from(prompt.step_id)
+    ))
+    if anchor_lineage is None:
+        raise HTTPException(status_code=404, detail="Anchor prompt not found")
+    if anchor_lineage == prompt.lineage_id:
+        raise HTTPException(status_code=400, detail="Cannot move a prompt relative to its own versions")
     
-    return PromptList(items=updated_prompts)
\ No newline at end of file
+    scope = {"project_id": prompt.project_id, "step_id": prompt.step_id}
+    _, dense = await move(db, ORDERED_LISTS["prompt"], scope, prompt.lineage_id, anchor_lineage,
+                          before=move_request.before_id is not None)
+    await db.commit()
+    project_cache.invalidate(prompt.project_id)
+    if dense:
+        background_tasks.add_task(rebalance_later, session_factory, "prompt", scope)
+    await db.refresh(prompt)
+    await load_contents(db, [prompt])
+    return prompt
+
+async def load_template(db: AsyncSession, prompt_id: int, user_id: int):
+    """读取提示词（验证所有权）并返回编译后的模板及其自身变量"""
+    row = (await db.execute(select(
+        ProjectPrompt.id, ProjectPrompt.content, ProjectPrompt.content_delta,
+        ProjectPrompt.delta_base_id, ProjectPrompt.variables
+    ).join(Project).filter(
+        ProjectPrompt.id == prompt_id,
+        Project.user_id == user_id
+    ))).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Prompt not found")
+    content = (await resolve_contents(db, [row]))[row.id] or ""
+    return template_cache.compile(row.id, content), row.variables or {}
+
+@router.post("/{prompt_id}/render", response_model=PromptRenderResponse)
+async def render_prompt(
+    prompt_id: int,
+    render_request: PromptRenderRequest,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """用给定变量渲染提示词"""
+    template, defaults = await load_template(db, prompt_id, current_user.id)
+    try:
+        content = template.render(render_request.variables, defaults, render_request.strict)
+    except MissingVariables as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return {"content": content, "variables": sorted(template.names)}
+
+@router.post("/{prompt_id}/render/batch", response_model=PromptBatchRenderResponse)
+async def render_prompt_batch(
+    request: Request,
+    prompt_id: int,
+    render_request: PromptBatchRenderRequest,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """用多组变量渲染同一提示词，结果与 rows 一一对应"""
+    if len(render_request.rows) > MAX_RENDER_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_RENDER_ROWS} rows per request")
+    template, defaults = await load_template(db, prompt_id, current_user.id)
+    try:
+        # 最多 MAX_RENDER_ROWS 行，放到线程池中渲染，避免阻塞事件循环
+        items = await run_in_threadpool(template.render_many, render_request.rows, defaults, render_request.strict)
+    except MissingVariables as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return negotiated_response(request, {"items": items, "variables": sorted(template.names)})
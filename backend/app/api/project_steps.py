@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import select
 from typing import List, Optional
-from ..database import get_db
+from ..database import get_db, get_session_factory
 from ..models.project import Project
 from ..models.project_step import ProjectStep
+from ..schemas.common import MoveRequest
 from ..schemas.project_step import StepCreate, StepUpdate, StepResponse, StepList
 from ..utils.auth import get_current_user
+from ..services.sequences import next_value, advance_to
+from ..services.ordering import ORDERED_LISTS, move, reorder, rebalance_later
+from ..services.fieldsets import FIELDSETS
+from ..services.etags import collection_etag, is_not_modified, not_modified, with_etag
+from ..services.project_tree import project_cache
+from ..services.serialization import negotiated_response
 from pydantic import BaseModel
 
 router = APIRouter()
 
 class StepOrderItem(BaseModel):
     id: int
-    order: int
+    order: int    # 位置，从 1 开始
 
 class StepReorderRequest(BaseModel):
     project_id: int
@@ -22,127 +30,159 @@ class StepReorderRequest(BaseModel):
 async def create_step(
     step: StepCreate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """创建新步骤"""
     # 验证项目所有权
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).filter(
         Project.id == step.project_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     db_step = ProjectStep(**step.model_dump())
+    if db_step.order is None:
+        db_step.order = await next_value(db, "step_order", project_id=step.project_id)
+    else:
+        # 显式给出的排序键同样推进序号，之后追加的步骤仍排在它后面
+        await advance_to(db, "step_order", db_step.order, project_id=step.project_id)
     db.add(db_step)
-    db.commit()
-    db.refresh(db_step)
+    await db.commit()
+    project_cache.invalidate(step.project_id)
+    await db.refresh(db_step)
     return db_step
 
-@router.get("/project/{project_id}", response_model=StepList)
+@router.get("/project/{project_id}", response_model=None, responses=FIELDSETS["steps"].responses(StepList))
 async def get_project_steps(
+    request: Request,
     project_id: int,
+    fields: Optional[str] = None,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取项目的所有步骤"""
-    # 验证项目所有权
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    """获取项目的所有步骤；传入 fields 时只返回指定字段；支持 If-None-Match 条件请求"""
+    fieldset = FIELDSETS["steps"]
+    names = fieldset.parse(fields)
+    etag = await collection_etag(db, request, "steps", current_user.id, project_id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
     
-    steps = db.query(ProjectStep).filter(
-        ProjectStep.project_id == project_id
-    ).order_by(ProjectStep.order).all()
+    # 项目树缓存按用户校验所有权
+    snapshot = await project_cache.get(db, project_id, current_user.id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Project not found")
     
-    return {"items": steps}
+    return with_etag(negotiated_response(request, {"items": snapshot.step_items(names)}), etag)
 
 @router.put("/reorder", response_model=StepList)
 async def reorder_steps(
     reorder_data: StepReorderRequest,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """重新排序步骤"""
+    """按位置批量重排步骤
+
+    请求中的 order 是从 1 开始的位置，写入时换算为稀疏排序键（ORDER_GAP 的倍数），
+    响应中的 order 是排序键而不是位置；未列出的步骤保留当前位置。单个步骤的移动请使用 /{step_id}/move。
+    """
     # 验证项目所有权
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).filter(
         Project.id == reorder_data.project_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # 获取所有需要更新的步骤
-    step_ids = [step.id for step in reorder_data.steps]
-    steps = db.query(ProjectStep).filter(
-        ProjectStep.id.in_(step_ids),
-        ProjectStep.project_id == reorder_data.project_id
-    ).all()
-    
-    # 创建 id 到步骤的映射
-    steps_map = {step.id: step for step in steps}
-    
-    # 更新步骤顺序
-    for step_order in reorder_data.steps:
-        if step_order.id in steps_map:
-            steps_map[step_order.id].order = step_order.order
-    
-    db.commit()
+    await reorder(db, ORDERED_LISTS["step"], {"project_id": reorder_data.project_id},
+                  {item.id: item.order for item in reorder_data.steps})
+    await db.commit()
+    project_cache.invalidate(reorder_data.project_id)
     
     # 返回更新后的步骤列表
-    updated_steps = db.query(ProjectStep).filter(
+    updated_steps = (await db.scalars(select(ProjectStep).filter(
         ProjectStep.project_id == reorder_data.project_id
-    ).order_by(ProjectStep.order).all()
+    ).order_by(ProjectStep.order))).all()
     
     return StepList(items=updated_steps)
 
+@router.post("/{step_id}/move", response_model=StepResponse)
+async def move_step(
+    step_id: int,
+    move_request: MoveRequest,
+    background_tasks: BackgroundTasks,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """把步骤移到同一项目中另一步骤之前或之后，只改写这一个步骤的 order"""
+    step = await db.scalar(select(ProjectStep).join(Project).filter(
+        ProjectStep.id == step_id,
+        Project.user_id == current_user.id
+    ))
+    if not step:
+        raise HTTPException(status_code=404, detail="Step not found")
+    anchor_id = await db.scalar(select(ProjectStep.id).filter(
+        ProjectStep.id == move_request.anchor_id,
+        ProjectStep.project_id == step.project_id
+    ))
+    if anchor_id is None:
+        raise HTTPException(status_code=404, detail="Anchor step not found")
+    if anchor_id == step.id:
+        raise HTTPException(status_code=400, detail="Cannot move a step relative to itself")
+    
+    scope = {"project_id": step.project_id}
+    _, dense = await move(db, ORDERED_LISTS["step"], scope, step.id, anchor_id,
+                          before=move_request.before_id is not None)
+    await db.commit()
+    project_cache.invalidate(step.project_id)
+    if dense:
+        background_tasks.add_task(rebalance_later, session_factory, "step", scope)
+    await db.refresh(step)
+    return step
+
 @router.put("/{step_id}", response_model=StepResponse)
 async def update_step(
     step_id: int,
     step_update: StepUpdate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """更新步骤"""
-    step = db.query(ProjectStep).join(Project).filter(
+    step = await db.scalar(select(ProjectStep).join(Project).filter(
         ProjectStep.id == step_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
     if not step:
         raise HTTPException(status_code=404, detail="Step not found")
     
-    for field, value in step_update.model_dump(exclude_unset=True).items():
+    update_data = step_update.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
         setattr(step, field, value)
+    if update_data.get("order") is not None:
+        await advance_to(db, "step_order", step.order, project_id=step.project_id)
     
-    db.commit()
-    db.refresh(step)
+    await db.commit()
+    project_cache.invalidate(step.project_id)
+    await db.refresh(step)
     return step
 
 @router.delete("/{step_id}")
 async def delete_step(
     step_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """删除步骤"""
-    step = db.query(ProjectStep).join(Project).filter(
+    step = await db.scalar(select(ProjectStep).join(Project).filter(
         ProjectStep.id == step_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
     if not step:
         raise HTTPException(status_code=404, detail="Step not found")
     
-    # 更新后续步骤的顺序
-    subsequent_steps = db.query(ProjectStep).filter(
-        ProjectStep.project_id == step.project_id,
-        ProjectStep.order > step.order
-    ).all()
-    for subsequent_step in subsequent_steps:
-        subsequent_step.order -= 1
-    
-    db.delete(step)
-    db.commit()
+    # 排序键是稀疏的，删除后无需调整其余步骤
+    await db.delete(step)
+    await db.commit()
+    project_cache.invalidate(step.project_id)
     return {"message": "Step deleted successfully"} 
\ No newline at end of file
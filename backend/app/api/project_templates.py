@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from typing import List
 from ..database import get_db
 from ..models.project import Project
-from ..models.project_step import ProjectStep
-from ..models.project_prompt import ProjectPrompt
 from ..schemas.project import ProjectResponse
 from ..utils.auth import get_current_user
+from ..services.cloning import load_source, clone_project, template_options, from_template_options
+from ..services.project_tree import project_cache
 
 router = APIRouter()
 
@@ -14,118 +15,46 @@ router = APIRouter()
 async def save_as_template(
     project_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """将项目保存为模板"""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
+    project = await load_source(db, project_id, current_user.id)
     
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # 创建模板
-    template = Project(
-        name=f"{project.name} (Template)",
-        description=project.description,
-        tech_stack=project.tech_stack,
-        is_template=True,
-        user_id=current_user.id
-    )
-    db.add(template)
-    db.flush()
-    
-    # 复制步骤
-    for step in project.steps:
-        new_step = ProjectStep(
-            project_id=template.id,
-            title=step.title,
-            description=step.description,
-            order=step.order,
-            expected_output=step.expected_output
-        )
-        db.add(new_step)
-        db.flush()
-        
-        # 复制提示词
-        for prompt in step.prompts:
-            new_prompt = ProjectPrompt(
-                project_id=template.id,
-                step_id=new_step.id,
-                title=prompt.title,
-                content=prompt.content,
-                variables=prompt.variables,
-                version=1,
-                is_template=True
-            )
-            db.add(new_prompt)
-    
-    db.commit()
-    db.refresh(template)
+    template = await clone_project(db, project, template_options(project))
+    await db.commit()
+    project_cache.invalidate(template.id)   # SQLite 可能复用已删除项目的 ID
+    await db.refresh(template)
     return template
 
 @router.get("/templates", response_model=List[ProjectResponse])
 async def get_templates(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """获取项目模板列表"""
-    templates = db.query(Project).filter(
+    templates = (await db.scalars(select(Project).filter(
         Project.user_id == current_user.id,
         Project.is_template == True
-    ).all()
+    ))).all()
     return templates
 
 @router.post("/templates/{template_id}/create", response_model=ProjectResponse)
 async def create_from_template(
     template_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """从模板创建新项目"""
-    template = db.query(Project).filter(
-        Project.id == template_id,
-        Project.user_id == current_user.id,
-        Project.is_template == True
-    ).first()
+    template = await load_source(db, template_id, current_user.id, template_only=True)
     
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
     
-    # 创建新项目
-    project = Project(
-        name=template.name.replace(" (Template)", ""),
-        description=template.description,
-        tech_stack=template.tech_stack,
-        user_id=current_user.id
-    )
-    db.add(project)
-    db.flush()
-    
-    # 复制步骤和提示词
-    for step in template.steps:
-        new_step = ProjectStep(
-            project_id=project.id,
-            title=step.title,
-            description=step.description,
-            order=step.order,
-            expected_output=step.expected_output
-        )
-        db.add(new_step)
-        db.flush()
-        
-        for prompt in step.prompts:
-            new_prompt = ProjectPrompt(
-                project_id=project.id,
-                step_id=new_step.id,
-                title=prompt.title,
-                content=prompt.content,
-                variables=prompt.variables,
-                version=1
-            )
-            db.add(new_prompt)
-    
-    db.commit()
-    db.refresh(project)
-    return project 
\ No newline at end of file
+    project = await clone_project(db, template, from_template_options(template))
+    await db.commit()
+    project_cache.invalidate(project.id)   # SQLite 可能复用已删除项目的 ID
+    await db.refresh(project)
+    return project
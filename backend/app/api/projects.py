@@ -1,12 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select
 from typing import List, Optional
 from ..database import get_db
 from ..models.project import Project
 from ..models.project_step import ProjectStep
-from ..models.project_prompt import ProjectPrompt
-from ..schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse, ProjectList, ProjectStatus
+from ..schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse, ProjectList, ProjectStatus, ProjectTree
 from ..utils.auth import get_current_user
+from ..services.search import apply_search
+from ..services.pagination import SortKey, apply_keyset, split_page
+from ..services.counters import bucket, counter_total, search_total
+from ..services.fieldsets import FIELDSETS
+from ..services.etags import collection_etag, is_not_modified, not_modified
+from ..services.cloning import load_source, clone_project, duplicate_options
+from ..services.project_tree import project_cache
+from ..services.prompt_history import load_contents
+from ..services.serialization import negotiated_response
+from ..schemas.common import CountMode
 
 router = APIRouter()
 
@@ -14,161 +25,166 @@ router = APIRouter()
 async def create_project(
     project: ProjectCreate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """创建新项目"""
     db_project = Project(**project.model_dump(), user_id=current_user.id)
     db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    await db.refresh(db_project)
     return db_project
 
-@router.get("/", response_model=ProjectList)
+@router.get("/", response_model=None, responses=FIELDSETS["projects"].responses(ProjectList))
 async def get_projects(
+    request: Request,
     search: Optional[str] = None,
     status: Optional[str] = None,
     page: int = Query(1, gt=0),
     page_size: int = Query(10, gt=0, le=100),
+    cursor: Optional[str] = None,
+    count_mode: CountMode = CountMode.CAPPED,
+    fields: Optional[str] = None,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取项目列表"""
-    query = db.query(Project).filter(Project.user_id == current_user.id)
+    """获取项目列表；传入 cursor 时使用键集分页（忽略 page），传入 fields 时只返回指定字段"""
+    fieldset = FIELDSETS["projects"]
+    names = fieldset.parse(fields)
+    query = select(Project).filter(Project.user_id == current_user.id)
     
-    if search:
-        query = query.filter(Project.name.ilike(f"%{search}%"))
+    counter_bucket = "all"
     if status and status != 'all':
         query = query.filter(Project.status == status)
+        counter_bucket = bucket("projects", status)
+    
+    # 总数：结构化过滤直接读取计数行，带搜索时按 count_mode 计算
+    total = await counter_total(db, current_user.id, "projects", counter_bucket)
+    total_exact = True
+    rank = None
+    if search:
+        base_query = query
+        query, rank = apply_search(query, "projects", current_user.id, search, columns=("name",))
+        total, total_exact = await search_total(db, query, base_query, Project, total, count_mode)
     
-    total = query.count()
-    items = query.offset((page - 1) * page_size).limit(page_size).all()
+    if rank is not None:
+        keys, scope = [SortKey("search_rank", rank), SortKey("id", Project.id)], "projects:relevance"
+    else:
+        keys, scope = [SortKey("id", Project.id)], "projects:id"
+    query = apply_keyset(fieldset.project(query, names, keys), keys, scope, cursor, page, page_size)
+    items, next_cursor = split_page((await db.execute(query)).all(), keys, scope, page_size, entities=False)
     
-    return ProjectList(total=total, items=items)
+    return fieldset.response(request, names, items, total=total, total_exact=total_exact, next_cursor=next_cursor)
 
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(
     project_id: int,
+    request: Request,
+    response: Response,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取项目详情"""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
-    if not project:
+    """获取项目详情，支持 If-None-Match 条件请求"""
+    etag = await collection_etag(db, request, "project", current_user.id, project_id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    snapshot = await project_cache.get(db, project_id, current_user.id)
+    if snapshot is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project
+    if etag is not None:
+        response.headers["ETag"] = etag
+    return snapshot.project_item()
+
+@router.get("/{project_id}/tree", response_model=ProjectTree)
+async def get_project_tree(
+    project_id: int,
+    request: Request,
+    include_bodies: bool = True,
+    include_history: bool = False,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """一次返回项目及其有序步骤和提示词（默认只含最新版本），由项目树缓存提供"""
+    snapshot = await project_cache.get(db, project_id, current_user.id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return negotiated_response(request, snapshot.tree(include_bodies, include_history))
 
 @router.put("/{project_id}", response_model=ProjectResponse)
 async def update_project(
     project_id: int,
     project_update: ProjectUpdate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """更新项目"""
-    db_project = db.query(Project).filter(
+    db_project = await db.scalar(select(Project).filter(
         Project.id == project_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     for field, value in project_update.model_dump(exclude_unset=True).items():
         setattr(db_project, field, value)
     
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    project_cache.invalidate(project_id)
+    await db.refresh(db_project)
     return db_project
 
 @router.delete("/{project_id}")
 async def delete_project(
     project_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """删除项目"""
-    db_project = db.query(Project).filter(
+    db_project = await db.scalar(select(Project).filter(
         Project.id == project_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    db.delete(db_project)
-    db.commit()
+    await db.delete(db_project)
+    await db.commit()
+    project_cache.invalidate(project_id)
     return {"message": "Project deleted successfully"}
 
 @router.post("/{project_id}/duplicate", response_model=ProjectResponse)
 async def duplicate_project(
     project_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """复制项目（包括步骤和提示词）"""
-    # 获取原项目
-    source_project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
+    source_project = await load_source(db, project_id, current_user.id)
     if not source_project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # 创建新项目
-    new_project = Project(
-        name=f"{source_project.name} (复制)",
-        description=source_project.description,
-        tech_stack=source_project.tech_stack,
-        status=ProjectStatus.PLANNING,
-        user_id=current_user.id
-    )
-    db.add(new_project)
-    db.flush()  # 获取新项目ID
-    
-    # 复制步骤
-    for step in source_project.steps:
-        new_step = ProjectStep(
-            project_id=new_project.id,
-            title=step.title,
-            description=step.description,
-            order=step.order,
-            expected_output=step.expected_output,
-            actual_output=step.actual_output,
-            notes=step.notes
-        )
-        db.add(new_step)
-        db.flush()
-        
-        # 复制提示词
-        for prompt in step.prompts:
-            new_prompt = ProjectPrompt(
-                project_id=new_project.id,
-                step_id=new_step.id,
-                title=prompt.title,
-                content=prompt.content,
-                variables=prompt.variables,
-                version=1
-            )
-            db.add(new_prompt)
-    
-    db.commit()
-    db.refresh(new_project)
+    new_project = await clone_project(db, source_project, duplicate_options(source_project))
+    await db.commit()
+    project_cache.invalidate(new_project.id)   # SQLite 可能复用已删除项目的 ID
+    await db.refresh(new_project)
     return new_project
 
 @router.post("/{project_id}/export")
 async def export_project(
     project_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """导出项目为可重放的脚本"""
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).options(
+        selectinload(Project.steps).selectinload(ProjectStep.prompts)
+    ).filter(
         Project.id == project_id,
         Project.user_id == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    # 差量存储的版本还原为完整内容
+    await load_contents(db, [prompt for step in project.steps for prompt in step.prompts])
     
     # 构建项目脚本
     script = {
@@ -194,7 +210,10 @@ async def export_project(
                 "title": prompt.title,
                 "content": prompt.content,
                 "variables": prompt.variables,
-                "response": prompt.response
+                "response": prompt.response,
+                "version": prompt.version,
+                "is_latest": prompt.is_latest,
+                "lineage": prompt.lineage_id
             })
         
         script["steps"].append(step_data)
@@ -204,8 +223,8 @@ async def export_project(
 @router.post("/init", response_model=dict)
 async def initialize_project(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """初始化示例项目"""
     from ..commands import init_project
-    return init_project(db, current_user.id)
\ No newline at end of file
+    return await db.run_sync(init_project, current_user.id)
\ No newline at end of file
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from ..database import get_db
+from ..schemas.search import SearchHit, SearchResults, SearchType
+from ..services.search import hits_statement
+from ..utils.auth import get_current_user
+
+router = APIRouter()
+
+@router.get("/", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=1),
+    types: Optional[List[SearchType]] = Query(None),
+    limit: int = Query(20, gt=0, le=100),
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """全文检索任务、笔记、工具和项目，按相关度排序并返回高亮片段"""
+    items = []
+    for search_type in types or list(SearchType):
+        rows = await db.execute(hits_statement(search_type.value, current_user.id, q, limit))
+        items.extend(
+            SearchHit(type=search_type, id=row.id, title=row.title or "", snippet=row.snippet or "", rank=row.rank)
+            for row in rows
+        )
+    items.sort(key=lambda hit: hit.rank)
+    return SearchResults(items=items[:limit])
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from typing import List, Optional
 from ..database import get_db
 from ..models.task import Task
@@ -9,6 +9,11 @@ from ..schemas.task import (
     TaskStatus, TaskOrderBy
 )
 from ..utils.auth import get_current_user
+from ..services.search import apply_search
+from ..services.pagination import SortKey, apply_keyset, split_page
+from ..services.counters import bucket, counter_total, search_total
+from ..services.fieldsets import FIELDSETS
+from ..schemas.common import CountMode
 
 router = APIRouter()
 
@@ -16,75 +21,86 @@ router = APIRouter()
 async def create_task(
     task: TaskCreate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """创建新任务"""
     db_task = Task(**task.model_dump(), user_id=current_user.id)
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await db.commit()
+    await db.refresh(db_task)
     return db_task
 
-@router.get("/", response_model=TaskList)
+@router.get("/", response_model=None, responses=FIELDSETS["tasks"].responses(TaskList))
 async def get_tasks(
+    request: Request,
     search: Optional[str] = None,
     status: TaskStatus = TaskStatus.ALL,
     order_by: TaskOrderBy = TaskOrderBy.CREATED_DESC,
     page: int = Query(1, gt=0),
     page_size: int = Query(10, gt=0, le=100),
+    cursor: Optional[str] = None,
+    count_mode: CountMode = CountMode.CAPPED,
+    fields: Optional[str] = None,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取任务列表，支持搜索、过滤和排序"""
-    query = db.query(Task).filter(Task.user_id == current_user.id)
-    
-    # 搜索
-    if search:
-        query = query.filter(
-            or_(
-                Task.title.ilike(f"%{search}%"),
-                Task.description.ilike(f"%{search}%")
-            )
-        )
+    """获取任务列表，支持搜索、过滤和排序；传入 cursor 时使用键集分页（忽略 page），传入 fields 时只返回指定字段"""
+    fieldset = FIELDSETS["tasks"]
+    names = fieldset.parse(fields)
+    query = select(Task).filter(Task.user_id == current_user.id)
     
     # 状态过滤
+    counter_bucket = "all"
     if status == TaskStatus.COMPLETED:
         query = query.filter(Task.completed == True)
+        counter_bucket = bucket("tasks", True)
     elif status == TaskStatus.PENDING:
         query = query.filter(Task.completed == False)
+        counter_bucket = bucket("tasks", False)
+    
+    # 总数：结构化过滤直接读取计数行
+    total = await counter_total(db, current_user.id, "tasks", counter_bucket)
+    total_exact = True
     
-    # 排序
+    # 搜索（FTS5 全文索引），总数按 count_mode 计算
+    rank = None
+    if search:
+        base_query = query
+        query, rank = apply_search(query, "tasks", current_user.id, search)
+        total, total_exact = await search_total(db, query, base_query, Task, total, count_mode)
+    
+    # 排序：每种排序都以 id 作为稳定的第二排序键
+    if order_by == TaskOrderBy.RELEVANCE and rank is None:
+        order_by = TaskOrderBy.CREATED_DESC
     if order_by == TaskOrderBy.CREATED_ASC:
-        query = query.order_by(Task.created_at.asc())
+        keys = [SortKey("created_at", Task.created_at), SortKey("id", Task.id)]
     elif order_by == TaskOrderBy.CREATED_DESC:
-        query = query.order_by(Task.created_at.desc())
+        keys = [SortKey("created_at", Task.created_at, True), SortKey("id", Task.id, True)]
     elif order_by == TaskOrderBy.TITLE_ASC:
-        query = query.order_by(Task.title.asc())
+        keys = [SortKey("title", Task.title), SortKey("id", Task.id)]
     elif order_by == TaskOrderBy.TITLE_DESC:
-        query = query.order_by(Task.title.desc())
-    
-    # 计算总数
-    total = query.count()
+        keys = [SortKey("title", Task.title, True), SortKey("id", Task.id, True)]
+    else:
+        keys = [SortKey("search_rank", rank), SortKey("id", Task.id)]
     
     # 分页
-    query = query.offset((page - 1) * page_size).limit(page_size)
+    scope = f"tasks:{order_by.value}"
+    query = apply_keyset(fieldset.project(query, names, keys), keys, scope, cursor, page, page_size)
+    items, next_cursor = split_page((await db.execute(query)).all(), keys, scope, page_size, entities=False)
     
-    return {
-        "total": total,
-        "items": query.all()
-    }
+    return fieldset.response(request, names, items, total=total, total_exact=total_exact, next_cursor=next_cursor)
 
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
     task_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """获取特定任务"""
-    task = db.query(Task).filter(
+    task = await db.scalar(select(Task).filter(
         Task.id == task_id,
         Task.user_id == current_user.id
-    ).first()
+    ))
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
@@ -94,13 +110,13 @@ async def update_task(
     task_id: int,
     task_update: TaskUpdate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """更新任务"""
-    db_task = db.query(Task).filter(
+    db_task = await db.scalar(select(Task).filter(
         Task.id == task_id,
         Task.user_id == current_user.id
-    ).first()
+    ))
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
@@ -109,24 +125,24 @@ async def update_task(
     for field, value in update_data.items():
         setattr(db_task, field, value)
     
-    db.commit()
-    db.refresh(db_task)
+    await db.commit()
+    await db.refresh(db_task)
     return db_task
 
 @router.delete("/{task_id}")
 async def delete_task(
     task_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """删除任务"""
-    db_task = db.query(Task).filter(
+    db_task = await db.scalar(select(Task).filter(
         Task.id == task_id,
         Task.user_id == current_user.id
-    ).first()
+    ))
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    db.delete(db_task)
-    db.commit()
+    await db.delete(db_task)
+    await db.commit()
     return {"message": "Task deleted successfully"} 
\ No newline at end of file
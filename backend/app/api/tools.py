@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from typing import List, Optional
 from ..database import get_db
 from ..models.tool import Tool
 from ..schemas.tool import ToolCreate, ToolUpdate, ToolResponse, ToolCategory, ToolList
 from ..utils.auth import get_current_user
+from ..services.search import apply_search
+from ..services.pagination import SortKey, apply_keyset, split_page
+from ..services.counters import bucket, counter_total, search_total
+from ..services.fieldsets import FIELDSETS
+from ..services.etags import collection_etag, is_not_modified, not_modified, with_etag
+from ..schemas.common import CountMode
 
 router = APIRouter()
 
@@ -13,59 +19,76 @@ router = APIRouter()
 async def create_tool(
     tool: ToolCreate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """创建新工具"""
     db_tool = Tool(**tool.model_dump(), user_id=current_user.id)
     db.add(db_tool)
-    db.commit()
-    db.refresh(db_tool)
+    await db.commit()
+    await db.refresh(db_tool)
     return db_tool
 
-@router.get("/", response_model=ToolList)
+@router.get("/", response_model=None, responses=FIELDSETS["tools"].responses(ToolList))
 async def get_tools(
+    request: Request,
     category: Optional[str] = None,
     search: Optional[str] = None,
     page: int = Query(1, gt=0),
     page_size: int = Query(12, gt=0, le=100),
+    cursor: Optional[str] = None,
+    count_mode: CountMode = CountMode.CAPPED,
+    fields: Optional[str] = None,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取工具列表，支持分页、搜索和分类过滤"""
-    query = db.query(Tool).filter(Tool.user_id == current_user.id)
+    """获取工具列表，支持分页、搜索和分类过滤；传入 cursor 时使用键集分页（忽略 page），传入 fields 时只返回指定字段；支持 If-None-Match 条件请求"""
+    fieldset = FIELDSETS["tools"]
+    names = fieldset.parse(fields)
+    etag = await collection_etag(db, request, "tools", current_user.id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    query = select(Tool).filter(Tool.user_id == current_user.id)
     
     # 分类过滤
+    counter_bucket = "all"
     if category and category != 'all':
         query = query.filter(Tool.category == category)
+        counter_bucket = bucket("tools", category)
     
-    # 搜索
-    if search:
-        query = query.filter(
-            or_(
-                Tool.name.ilike(f"%{search}%"),
-                Tool.description.ilike(f"%{search}%")
-            )
-        )
+    # 总数：结构化过滤直接读取计数行
+    total = await counter_total(db, current_user.id, "tools", counter_bucket)
+    total_exact = True
     
-    # 计算总数
-    total = query.count()
+    # 搜索（FTS5 全文索引，按相关度排序），总数按 count_mode 计算
+    rank = None
+    if search:
+        base_query = query
+        query, rank = apply_search(query, "tools", current_user.id, search)
+        total, total_exact = await search_total(db, query, base_query, Tool, total, count_mode)
     
     # 分页
-    items = query.offset((page - 1) * page_size).limit(page_size).all()
+    if rank is not None:
+        keys, scope = [SortKey("search_rank", rank), SortKey("id", Tool.id)], "tools:relevance"
+    else:
+        keys, scope = [SortKey("id", Tool.id)], "tools:id"
+    query = apply_keyset(fieldset.project(query, names, keys), keys, scope, cursor, page, page_size)
+    items, next_cursor = split_page((await db.execute(query)).all(), keys, scope, page_size, entities=False)
     
-    return ToolList(total=total, items=items)
+    return with_etag(
+        fieldset.response(request, names, items, total=total, total_exact=total_exact, next_cursor=next_cursor), etag
+    )
 
 @router.get("/{tool_id}", response_model=ToolResponse)
 async def get_tool(
     tool_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """获取特定工具"""
-    tool = db.query(Tool).filter(
+    tool = await db.scalar(select(Tool).filter(
         Tool.id == tool_id,
         Tool.user_id == current_user.id
-    ).first()
+    ))
     if tool is None:
         raise HTTPException(status_code=404, detail="Tool not found")
     return tool
@@ -75,13 +98,13 @@ async def update_tool(
     tool_id: int,
     tool_update: ToolUpdate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """更新工具"""
-    db_tool = db.query(Tool).filter(
+    db_tool = await db.scalar(select(Tool).filter(
         Tool.id == tool_id,
         Tool.user_id == current_user.id
-    ).first()
+    ))
     if db_tool is None:
         raise HTTPException(status_code=404, detail="Tool not found")
     
@@ -89,33 +112,33 @@ async def update_tool(
     for field, value in update_data.items():
         setattr(db_tool, field, value)
     
-    db.commit()
-    db.refresh(db_tool)
+    await db.commit()
+    await db.refresh(db_tool)
     return db_tool
 
 @router.delete("/{tool_id}")
 async def delete_tool(
     tool_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """删除工具"""
-    db_tool = db.query(Tool).filter(
+    db_tool = await db.scalar(select(Tool).filter(
         Tool.id == tool_id,
         Tool.user_id == current_user.id
-    ).first()
+    ))
     if db_tool is None:
         raise HTTPException(status_code=404, detail="Tool not found")
     
-    db.delete(db_tool)
-    db.commit()
+    await db.delete(db_tool)
+    await db.commit()
     return {"message": "Tool deleted successfully"}
 
 @router.post("/init", response_model=dict)
 async def initialize_tools(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """初始化工具数据"""
     from ..commands import init_tools
-    return init_tools(db, current_user.id) 
\ No newline at end of file
+    return await db.run_sync(init_tools, current_user.id) 
\ No newline at end of file
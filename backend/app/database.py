@@ -1,18 +1,82 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sql_app.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
+# 异步驱动：sqlite -> sqlite+aiosqlite
+ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
 
+APP_ENV = os.getenv("APP_ENV", "development")
+
+# SQLite 连接调优配置，按顺序在每个新连接上执行 PRAGMA
+# busy_timeout 放在最前面，切换 journal_mode 时也能等待锁
+SQLITE_PROFILES = {
+    # SQLite 默认值：回滚日志、synchronous=FULL、约 2MB 页缓存
+    "legacy": {},
+    "development": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+    },
+    "production": {
+        "busy_timeout": 5000,            # 写锁被占用时最多等待 5 秒，而不是立即报 database is locked
+        "journal_mode": "WAL",           # 读写互不阻塞
+        "synchronous": "NORMAL",         # WAL 下仅在 checkpoint 时 fsync
+        "mmap_size": 268435456,          # 256MB 内存映射读取
+        "cache_size": -65536,            # 负数表示 KB，即 64MB 页缓存
+        "temp_store": "MEMORY",          # 临时表和排序在内存中进行
+    },
+}
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production" if APP_ENV == "production" else "development")
+
+def get_sqlite_pragmas(profile: str = SQLITE_PROFILE) -> dict:
+    """获取连接调优参数，可用 SQLITE_<PRAGMA> 环境变量单独覆盖"""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile: {profile}")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in ("busy_timeout", "journal_mode", "synchronous", "mmap_size", "cache_size", "temp_store"):
+        value = os.getenv(f"SQLITE_{name.upper()}")
+        if value:
+            pragmas[name] = value
+    return pragmas
+
+def install_sqlite_pragmas(sync_engine, pragmas: dict):
+    """通过 connect 事件在每个新连接上应用 PRAGMA"""
+    if sync_engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+# 同步引擎：用于建表、迁移和命令脚本
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步引擎：用于 API 路由，避免阻塞事件循环
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+SQLITE_PRAGMAS = get_sqlite_pragmas()
+install_sqlite_pragmas(engine, SQLITE_PRAGMAS)
+install_sqlite_pragmas(async_engine.sync_engine, SQLITE_PRAGMAS)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close() 
\ No newline at end of file
+
+def get_session_factory():
+    """流式响应在依赖结束后仍需读库，需要自行开启会话"""
+    return AsyncSessionLocal
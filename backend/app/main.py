@@ -1,9 +1,25 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
-from .api import auth, tasks, notes, tools, projects, project_steps, project_prompts, project_templates
+from .database import engine
+from .api import auth, tasks, notes, tools, projects, project_steps, project_prompts, project_templates, search, export, imports, batch
+from .migrations.runner import run_startup_migrations
+from .utils.auth import password_hasher, principal_cache, get_current_user
+from .services.prompt_history import materialized_cache
+from .services.project_tree import project_cache
+from .services.rendering import template_cache
+from .services.diffing import diff_cache
+from .services.similarity import similarity_indexes
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 执行迁移并校验数据库版本
+    run_startup_migrations(engine)
+    yield
+    # 关闭密码哈希进程池
+    password_hasher.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # 配置CORS
 app.add_middleware(
@@ -14,9 +30,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 创建数据库表
-Base.metadata.create_all(bind=engine)
-
 # 注册路由
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(tasks.router, prefix="/api/tasks", tags=["tasks"])
@@ -26,7 +39,23 @@ app.include_router(projects.router, prefix="/api/projects", tags=["projects"])
 app.include_router(project_steps.router, prefix="/api/project_steps", tags=["project_steps"])
 app.include_router(project_prompts.router, prefix="/api/project_prompts", tags=["project_prompts"])
 app.include_router(project_templates.router, prefix="/api/project_templates", tags=["project_templates"])
+app.include_router(search.router, prefix="/api/search", tags=["search"])
+app.include_router(export.router, prefix="/api/export", tags=["export"])
+app.include_router(imports.router, prefix="/api/import", tags=["import"])
+app.include_router(batch.router, prefix="/api/batch", tags=["batch"])
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to FastAPI"}
+
+@app.get("/api/metrics")
+async def metrics(current_user = Depends(get_current_user)):
+    """进程内缓存指标（需要登录）"""
+    return {
+        "principal_cache": principal_cache.stats(),
+        "prompt_history_cache": materialized_cache.stats(),
+        "project_cache": project_cache.stats(),
+        "prompt_template_cache": template_cache.stats(),
+        "prompt_diff_cache": diff_cache.stats(),
+        "similarity_index": similarity_indexes.stats(),
+    }
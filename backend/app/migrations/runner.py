@@ -0,0 +1,112 @@
+"""版本化的数据库迁移
+
+schema_migrations 表记录已执行的版本。每个迁移由若干步骤组成，每一步在独立的短事务中执行，
+步骤本身必须幂等（IF NOT EXISTS 等），中途失败后可以直接重跑。
+在已有数据库上建索引时逐个提交，写入方在两次建索引之间可以拿到写锁（并由 busy_timeout 等待），
+WAL 模式下读取不受影响。
+
+命令行（在 backend 目录下）：
+    python -m app.migrations.runner upgrade   # 执行所有未执行的迁移
+    python -m app.migrations.runner current   # 查看当前版本
+"""
+import datetime
+import os
+import sys
+from dataclasses import dataclass
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, Integer, String, DateTime, Table, MetaData, select, func
+from sqlalchemy.engine import Connection, Engine
+
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "1") == "1"
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    steps: Tuple[Callable[[Connection], None], ...]
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+def _migrations() -> List[Migration]:
+    from .versions import MIGRATIONS
+    return sorted(MIGRATIONS, key=lambda m: m.version)
+
+def latest_version() -> int:
+    migrations = _migrations()
+    return migrations[-1].version if migrations else 0
+
+def current_version(engine: Engine) -> int:
+    with engine.begin() as conn:
+        schema_migrations.create(bind=conn, checkfirst=True)
+        return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+def upgrade(engine: Engine, target: int = None) -> List[int]:
+    """执行所有未执行的迁移，返回本次执行的版本号"""
+    applied = []
+    current = current_version(engine)
+    for migration in _migrations():
+        if migration.version <= current or (target is not None and migration.version > target):
+            continue
+        for step in migration.steps:
+            with engine.begin() as conn:
+                step(conn)
+        with engine.begin() as conn:
+            conn.execute(schema_migrations.insert().values(
+                version=migration.version,
+                description=migration.description,
+                applied_at=datetime.datetime.utcnow()
+            ))
+        applied.append(migration.version)
+    return applied
+
+def check_schema(engine: Engine):
+    """启动时校验数据库版本与代码一致"""
+    current, latest = current_version(engine), latest_version()
+    if current < latest:
+        raise SchemaVersionError(
+            f"Database schema is at version {current}, expected {latest}; "
+            f"run `python -m app.migrations.runner upgrade`"
+        )
+    if current > latest:
+        raise SchemaVersionError(
+            f"Database schema version {current} is newer than this code ({latest})"
+        )
+
+def run_startup_migrations(engine: Engine):
+    if AUTO_MIGRATE:
+        upgrade(engine)
+    check_schema(engine)
+
+def drop_schema(engine: Engine):
+    """删除全部表、FTS 索引和版本记录（用于测试）"""
+    from ..database import Base
+    from ..services.search import drop_search_indexes
+    with engine.begin() as conn:
+        drop_search_indexes(conn)
+        Base.metadata.drop_all(bind=conn)
+        schema_migrations.drop(bind=conn, checkfirst=True)
+
+if __name__ == "__main__":
+    from ..database import engine
+    from .. import main  # noqa: F401  注册所有模型
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if command == "upgrade":
+        versions = upgrade(engine)
+        print(f"Applied migrations: {versions or 'none'}; now at version {current_version(engine)}")
+    elif command == "current":
+        print(f"Current version: {current_version(engine)} (latest {latest_version()})")
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
@@ -0,0 +1,96 @@
+"""迁移版本列表，新迁移追加到 MIGRATIONS 末尾"""
+from sqlalchemy.engine import Connection
+
+from ..database import Base
+from ..models import user, task, note, tool, project, project_step, project_prompt, counter, sequence, collection_version  # noqa: F401  注册全部模型
+from ..services.search import ensure_search_indexes
+from ..services.counters import ensure_counters
+from ..services.prompt_history import ensure_lineage
+from ..services.ordering import spread_orders
+from ..services.notes import ensure_note_excerpts
+from ..services.etags import ensure_collection_versions
+from .runner import Migration
+
+def create_index(name: str):
+    """按模型中声明的索引建索引（已存在时跳过）"""
+    def step(conn: Connection):
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name == name:
+                    index.create(bind=conn, checkfirst=True)
+                    return
+        raise LookupError(f"Index {name} is not declared on any model")
+    step.__name__ = f"create_index_{name}"
+    return step
+
+def add_column(table_name: str, column_name: str):
+    """按模型中声明的列执行 ALTER TABLE ADD COLUMN（已存在时跳过）"""
+    def step(conn: Connection):
+        existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table_name})")}
+        if column_name in existing:
+            return
+        column = Base.metadata.tables[table_name].columns[column_name]
+        column_type = column.type.compile(dialect=conn.dialect)
+        default = ""
+        if column.default is not None and column.default.is_scalar:
+            default = f" DEFAULT {column.default.arg!r}"
+        conn.exec_driver_sql(f'ALTER TABLE {table_name} ADD COLUMN "{column_name}" {column_type}{default}')
+    step.__name__ = f"add_column_{table_name}_{column_name}"
+    return step
+
+def create_table(name: str):
+    def step(conn: Connection):
+        Base.metadata.tables[name].create(bind=conn, checkfirst=True)
+    step.__name__ = f"create_table_{name}"
+    return step
+
+def drop_sequence(name: str):
+    """删除不再使用的序号范围"""
+    def step(conn: Connection):
+        conn.exec_driver_sql("DELETE FROM sequence_counters WHERE name = ?", (name,))
+    step.__name__ = f"drop_sequence_{name}"
+    return step
+
+def create_tables(conn: Connection):
+    Base.metadata.create_all(bind=conn)
+
+MIGRATIONS = [
+    Migration(1, "baseline tables", (create_tables,)),
+    Migration(2, "FTS5 search indexes", (ensure_search_indexes,)),
+    Migration(3, "per-user entity counters", (ensure_counters,)),
+    Migration(4, "composite indexes for list and ordering queries", (
+        create_index("ix_tasks_user_created"),
+        create_index("ix_tools_user_category"),
+        create_index("ix_projects_user_status"),
+        create_index("ix_notes_user_id"),
+        create_index("ix_project_steps_project_order"),
+        create_index("ix_project_prompts_step_order"),
+        create_index("ix_project_prompts_family_version"),
+    )),
+    Migration(5, "delta-compressed prompt version content", (
+        add_column("project_prompts", "content_delta"),
+        add_column("project_prompts", "delta_base_id"),
+        add_column("project_prompts", "delta_depth"),
+    )),
+    Migration(6, "per-family version and order sequences", (create_table("sequence_counters"),)),
+    Migration(7, "prompt lineage and latest-version flag", (
+        add_column("project_prompts", "lineage_id"),
+        add_column("project_prompts", "is_latest"),
+        ensure_lineage,
+        create_index("ix_project_prompts_lineage_version"),
+        create_index("ix_project_prompts_step_latest"),
+        drop_sequence("prompt_version"),
+    )),
+    Migration(8, "sparse ordering keys for steps and prompts", (
+        spread_orders,
+        drop_sequence("step_order"),
+        drop_sequence("prompt_order"),
+    )),
+    Migration(9, "note excerpts and list indexes", (
+        add_column("notes", "excerpt"),
+        ensure_note_excerpts,
+        create_index("ix_notes_user_created"),
+        create_index("ix_notes_user_updated"),
+    )),
+    Migration(10, "collection versions for conditional GET", (ensure_collection_versions,)),
+]
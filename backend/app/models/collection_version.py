@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from ..database import Base
+
+class CollectionVersion(Base):
+    """按读取范围维护的版本号，由触发器在增删改时递增，用于生成 ETag"""
+    __tablename__ = "collection_versions"
+    
+    scope = Column(String, primary_key=True)    # 例如 "tools:用户ID"、"steps:用户ID:项目ID"
+    version = Column(Integer, nullable=False)
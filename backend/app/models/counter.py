@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from ..database import Base
+
+class EntityCounter(Base):
+    """按用户维护的实体计数，由触发器在增删改时同步更新"""
+    __tablename__ = "entity_counters"
+    
+    user_id = Column(Integer, primary_key=True)
+    entity = Column(String, primary_key=True)   # tasks / tools / projects
+    bucket = Column(String, primary_key=True)   # all 或 status:xxx / category:xxx
+    count = Column(Integer, nullable=False, default=0)
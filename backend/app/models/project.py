@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Enum, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Enum, Boolean, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 import datetime
@@ -12,6 +12,9 @@ class ProjectStatus(str, enum.Enum):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_user_status", "user_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
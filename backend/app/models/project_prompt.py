@@ -1,21 +1,32 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from ..database import Base
 import datetime
 
 class ProjectPrompt(Base):
     __tablename__ = "project_prompts"
+    __table_args__ = (
+        Index("ix_project_prompts_step_order", "step_id", "order"),
+        Index("ix_project_prompts_family_version", "project_id", "step_id", "version"),
+        Index("ix_project_prompts_lineage_version", "lineage_id", "version"),
+        Index("ix_project_prompts_step_latest", "step_id", "is_latest", "order"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"))
     step_id = Column(Integer, ForeignKey("project_steps.id"))
     title = Column(String, index=True)
-    content = Column(Text)        # 提示词内容
+    content = Column(Text)        # 提示词内容（差量存储的版本为空，见 content_delta）
     response = Column(Text)       # AI 响应
     variables = Column(JSON)      # 提示词变量
     version = Column(Integer)     # 提示词版本
+    lineage_id = Column(Integer, nullable=True)   # 版本链标识，等于第一个版本的 ID（插入时由触发器补齐）
+    is_latest = Column(Boolean, default=True)     # 是否为版本链中的最新版本
     order = Column(Integer)       # 提示词顺序
     is_template = Column(Boolean, default=False)  # 是否是模板
+    content_delta = Column(LargeBinary, nullable=True)  # 相对 delta_base_id 的压缩差量
+    delta_base_id = Column(Integer, ForeignKey("project_prompts.id"), nullable=True)
+    delta_depth = Column(Integer, default=0)  # 距最近完整检查点的差量层数
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     
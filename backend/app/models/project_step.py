@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 import datetime
 
 class ProjectStep(Base):
     __tablename__ = "project_steps"
+    __table_args__ = (
+        Index("ix_project_steps_project_order", "project_id", "order"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"))
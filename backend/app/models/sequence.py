@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from ..database import Base
+
+class SequenceCounter(Base):
+    """按范围分配的序号（版本号、顺序号），在插入事务内原子递增"""
+    __tablename__ = "sequence_counters"
+    
+    name = Column(String, primary_key=True)   # prompt_version / prompt_order / step_order
+    key = Column(String, primary_key=True)    # 序号范围，例如 "项目ID:步骤ID"
+    value = Column(Integer, nullable=False)   # 最近一次分配的值
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 import datetime
 
 class Tool(Base):
     __tablename__ = "tools"
+    __table_args__ = (
+        Index("ix_tools_user_category", "user_id", "category"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
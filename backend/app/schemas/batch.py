@@ -0,0 +1,40 @@
+from pydantic import BaseModel
+from typing import Optional, List, Dict, Any, Union
+from enum import Enum
+
+class BatchAction(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+    GET = "get"
+
+class BatchEntity(str, Enum):
+    TASKS = "tasks"
+    NOTES = "notes"
+    TOOLS = "tools"
+    STEPS = "steps"
+    PROMPTS = "prompts"
+
+# ID 可以写成 "$N"，引用同一批次中第 N 个（从 0 开始）create 操作创建的记录
+Reference = Union[int, str]
+
+class BatchOperation(BaseModel):
+    op: BatchAction
+    entity: BatchEntity
+    id: Optional[Reference] = None          # update / delete / 单个 get
+    ids: Optional[List[Reference]] = None   # 批量 get
+    data: Optional[Dict[str, Any]] = None   # create / update 的字段，project_id、step_id 同样可以引用
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+    atomic: bool = False    # 为 True 时任一操作失败则整批回滚
+
+class BatchResult(BaseModel):
+    index: int
+    status: int             # 与单独调用对应接口时的 HTTP 状态码一致
+    data: Optional[Any] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    committed: bool
+    results: List[BatchResult]
@@ -0,0 +1,24 @@
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, model_validator
+
+class CountMode(str, Enum):
+    EXACT = "exact"        # 精确计数
+    CAPPED = "capped"      # 最多数到上限，超过时返回上限并标记为非精确（显示为 "1000+"）
+    ESTIMATE = "estimate"  # 按样本命中率估算
+
+class MoveRequest(BaseModel):
+    """把一项移到锚点之前或之后，两者必须且只能给出一个"""
+    before_id: Optional[int] = None
+    after_id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_anchor(self):
+        if (self.before_id is None) == (self.after_id is None):
+            raise ValueError("Exactly one of before_id and after_id is required")
+        return self
+
+    @property
+    def anchor_id(self) -> int:
+        return self.before_id if self.before_id is not None else self.after_id
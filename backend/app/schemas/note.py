@@ -1,6 +1,12 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
+from enum import Enum
+
+class NoteOrderBy(str, Enum):
+    CREATED_DESC = "created_desc"
+    CREATED_ASC = "created_asc"
+    UPDATED_DESC = "updated_desc"
 
 class NoteBase(BaseModel):
     title: str
@@ -16,7 +22,24 @@ class NoteUpdate(NoteBase):
 class NoteResponse(NoteBase):
     id: int
     user_id: int
+    excerpt: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     
-    model_config = ConfigDict(from_attributes=True) 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True) 
+
+class NoteSummary(BaseModel):
+    """列表项：默认不含正文，include_content=true 时才返回 content"""
+    id: int
+    title: str
+    excerpt: Optional[str] = None
+    content: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+class NoteList(BaseModel):
+    total: int
+    items: List[NoteSummary]
+    next_cursor: Optional[str] = None  # 下一页游标，没有更多数据时为空
@@ -34,6 +34,34 @@ class ProjectResponse(ProjectBase):
 
 class ProjectList(BaseModel):
     total: int
+    total_exact: bool = True          # False 表示 total 为封顶值或估算值
     items: List[ProjectResponse]
+    next_cursor: Optional[str] = None  # 下一页游标，没有更多数据时为空
     
-    model_config = ConfigDict(from_attributes=True) 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True) 
+class ProjectTreePrompt(BaseModel):
+    id: int
+    title: str
+    content: Optional[str] = None     # include_bodies=false 时为空
+    response: Optional[str] = None
+    variables: Optional[Dict[str, str]] = None
+    version: Optional[int] = None
+    lineage_id: Optional[int] = None
+    order: Optional[int] = None
+    is_template: bool = False
+    updated_at: datetime
+
+class ProjectTreeStep(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    order: Optional[int] = None
+    is_completed: bool = False
+    expected_output: Optional[str] = None
+    actual_output: Optional[str] = None
+    notes: Optional[str] = None
+    updated_at: datetime
+    prompts: List[ProjectTreePrompt]
+
+class ProjectTree(ProjectResponse):
+    steps: List[ProjectTreeStep]
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import Optional, List, Dict
+from enum import Enum
+from typing import Optional, List, Dict, Tuple
 
 class PromptBase(BaseModel):
     title: str
@@ -29,6 +30,8 @@ class PromptResponse(PromptBase):
     id: int
     project_id: int
     step_id: Optional[int]
+    lineage_id: Optional[int] = None
+    is_latest: bool = True
     response: Optional[str]
     created_at: datetime
     updated_at: datetime
@@ -47,4 +50,58 @@ class PromptOrderItem(BaseModel):
 
 class PromptReorderRequest(BaseModel):
     step_id: int
-    prompts: List[PromptOrderItem]
\ No newline at end of file
+    prompts: List[PromptOrderItem]
+
+class PromptRenderRequest(BaseModel):
+    variables: Dict[str, str] = {}   # 覆盖提示词自身的 variables
+    strict: bool = False             # 为真时缺少变量返回 400，否则保留占位符原文
+
+class PromptRenderResponse(BaseModel):
+    content: str
+    variables: List[str]             # 模板中出现的变量名
+
+class PromptBatchRenderRequest(BaseModel):
+    rows: List[Dict[str, str]]       # 每行一组变量
+    strict: bool = False
+
+class PromptBatchRenderResponse(BaseModel):
+    items: List[str]                 # 与 rows 一一对应
+    variables: List[str]
+
+class DiffMode(str, Enum):
+    LINE = "line"      # 按行比较
+    WORD = "word"      # 按词比较（汉字和标点逐字）
+
+class DiffField(str, Enum):
+    CONTENT = "content"
+    RESPONSE = "response"
+
+class PromptDiff(BaseModel):
+    from_id: Optional[int]           # 没有更早的版本时为空，与空文本比较
+    to_id: int
+    from_version: Optional[int]
+    to_version: int
+    mode: DiffMode
+    field: DiffField
+    exact: bool                      # 为假时超出时间预算，部分区间按整段替换给出
+    insertions: int                  # 插入的行数或词数
+    deletions: int
+    ops: List[Tuple[str, str]]       # ("equal" | "delete" | "insert", 文本)
+
+class SimilarPrompt(BaseModel):
+    id: int
+    title: Optional[str]
+    project_id: int
+    step_id: Optional[int]
+    version: Optional[int]
+    similarity: float                # 估计的 Jaccard 相似度（字符 5-gram）
+
+class SimilarPromptList(BaseModel):
+    items: List[SimilarPrompt]
+
+class DuplicateCluster(BaseModel):
+    size: int
+    items: List[SimilarPrompt]       # 第一项为代表（ID 最小），similarity 为与代表的相似度
+
+class DuplicateReport(BaseModel):
+    clusters: List[DuplicateCluster]
@@ -5,7 +5,7 @@ from typing import Optional, List
 class StepBase(BaseModel):
     title: str
     description: str
-    order: int
+    order: int    # 稀疏排序键（相邻键之间留有间隔），只用于排序，不等于位置
     expected_output: Optional[str] = None
     actual_output: Optional[str] = None
     notes: Optional[str] = None
@@ -13,6 +13,7 @@ class StepBase(BaseModel):
 
 class StepCreate(StepBase):
     project_id: int
+    order: Optional[int] = None   # 为空时排在最后
 
 class StepUpdate(StepBase):
     title: Optional[str] = None
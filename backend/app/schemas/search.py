@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import List
+from enum import Enum
+
+class SearchType(str, Enum):
+    TASKS = "tasks"
+    NOTES = "notes"
+    TOOLS = "tools"
+    PROJECTS = "projects"
+
+class SearchHit(BaseModel):
+    type: SearchType
+    id: int
+    title: str
+    snippet: str    # 带 <mark> 高亮的匹配片段
+    rank: float     # bm25 得分，越小越相关
+
+class SearchResults(BaseModel):
+    items: List[SearchHit]
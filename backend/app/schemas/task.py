@@ -13,6 +13,7 @@ class TaskOrderBy(str, Enum):
     CREATED_DESC = "created_desc"
     TITLE_ASC = "title_asc"
     TITLE_DESC = "title_desc"
+    RELEVANCE = "relevance"      # 按搜索相关度，仅在 search 时生效
 
 class TaskBase(BaseModel):
     title: str
@@ -36,4 +37,6 @@ class TaskResponse(TaskBase):
 
 class TaskList(BaseModel):
     total: int
-    items: List[TaskResponse]
\ No newline at end of file
+    total_exact: bool = True          # False 表示 total 为封顶值或估算值
+    items: List[TaskResponse]
+    next_cursor: Optional[str] = None  # 下一页游标，没有更多数据时为空
\ No newline at end of file
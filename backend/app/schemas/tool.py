@@ -44,6 +44,8 @@ class ToolResponse(ToolBase):
 
 class ToolList(BaseModel):
     total: int
+    total_exact: bool = True          # False 表示 total 为封顶值或估算值
     items: List[ToolResponse]
+    next_cursor: Optional[str] = None  # 下一页游标，没有更多数据时为空
     
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -0,0 +1,91 @@
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from typing import Optional, List, Dict
+from enum import Enum
+from .project import ProjectStatus
+from .tool import ToolCategory
+
+class ImportFormat(str, Enum):
+    AUTO = "auto"
+    SCRIPT = "script"    # POST /projects/{id}/export 生成的脚本 JSON
+    NDJSON = "ndjson"    # /api/export 生成的 NDJSON
+
+# 导入记录：id / project_id / step_id 为导出文件中的原 ID，导入时重新映射
+class ProjectRecord(BaseModel):
+    id: Optional[int] = None
+    name: str
+    description: Optional[str] = None
+    tech_stack: Optional[Dict[str, List[str]]] = None
+    status: ProjectStatus = ProjectStatus.PLANNING
+    is_template: bool = False
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    model_config = ConfigDict(use_enum_values=True)
+
+class StepRecord(BaseModel):
+    id: Optional[int] = None
+    project_id: Optional[int] = None
+    title: str
+    description: Optional[str] = None
+    order: Optional[int] = None
+    is_completed: bool = False
+    expected_output: Optional[str] = None
+    actual_output: Optional[str] = None
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class PromptRecord(BaseModel):
+    id: Optional[int] = None
+    project_id: Optional[int] = None
+    step_id: Optional[int] = None
+    title: str
+    content: str
+    response: Optional[str] = None
+    variables: Optional[Dict[str, str]] = None
+    version: int = 1
+    lineage_id: Optional[int] = None
+    is_latest: bool = True
+    order: Optional[int] = None
+    is_template: bool = False
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class TaskRecord(BaseModel):
+    title: str
+    description: Optional[str] = None
+    completed: bool = False
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class NoteRecord(BaseModel):
+    title: str
+    content: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class ToolRecord(BaseModel):
+    name: str
+    description: Optional[str] = None
+    url: str
+    icon: Optional[str] = None
+    category: ToolCategory = ToolCategory.OTHER
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    model_config = ConfigDict(use_enum_values=True)
+
+class ImportIssue(BaseModel):
+    record: int           # 记录序号（从 1 开始，NDJSON 即行号）
+    type: str
+    message: str
+
+class ImportReport(BaseModel):
+    format: ImportFormat
+    dry_run: bool
+    counts: Dict[str, int]
+    rows: int
+    elapsed: float            # 秒
+    rows_per_second: float
+    errors: List[ImportIssue] = []
@@ -0,0 +1,276 @@
+"""批量操作：一次认证、一个事务、一次提交
+
+写操作在 SAVEPOINT 中执行，失败时只回滚该操作并记录错误，其余操作照常提交
+（atomic=True 时任一失败则整批回滚）。结果在操作完成时直接从 ORM 实例序列化，不再逐条 refresh。
+pysqlite 只在 DML 前隐式开启事务，SAVEPOINT 之前必须显式 BEGIN，否则释放第一个保存点时就会提交。
+"""
+import os
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..models.task import Task
+from ..models.note import Note
+from ..models.tool import Tool
+from ..models.project import Project
+from ..models.project_step import ProjectStep
+from ..models.project_prompt import ProjectPrompt
+from ..schemas.batch import BatchAction, BatchEntity, BatchOperation, BatchResult, BatchResponse
+from ..schemas.task import TaskCreate, TaskUpdate, TaskResponse
+from ..schemas.note import NoteCreate, NoteUpdate, NoteResponse
+from ..schemas.tool import ToolCreate, ToolUpdate, ToolResponse
+from ..schemas.project_step import StepCreate, StepUpdate, StepResponse
+from ..schemas.project_prompt import PromptCreate, PromptUpdate, PromptResponse
+from .sequences import next_value, advance_to
+from .prompt_history import load_contents, detach_dependents, promote_latest
+from .project_tree import project_cache
+
+MAX_BATCH_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "100"))
+REFERENCE_FIELDS = ("project_id", "step_id")
+
+class BatchOperationError(Exception):
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+def _validation_detail(exc: ValidationError) -> str:
+    first = exc.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+Hook = Callable[[AsyncSession, int, object, dict], Awaitable[None]]
+
+@dataclass(frozen=True)
+class EntitySpec:
+    model: type
+    create_schema: type
+    update_schema: type
+    response_schema: type
+    label: str                                   # 错误信息中的名称，与单独接口一致
+    user_owned: bool = True                      # 直接带 user_id；否则经所属项目校验
+    generated: Tuple[str, ...] = ()              # 由触发器写入的列，写入后需要重新读取
+    before_create: Optional[Hook] = None
+    before_update: Optional[Hook] = None
+    after_delete: Optional[Hook] = None
+
+    def owned(self, user_id: int):
+        if self.user_owned:
+            return select(self.model).filter(self.model.user_id == user_id)
+        return select(self.model).join(Project, self.model.project_id == Project.id).filter(Project.user_id == user_id)
+
+async def _owned_project(db: AsyncSession, user_id: int, project_id) -> Project:
+    project = await db.scalar(select(Project).filter(Project.id == project_id, Project.user_id == user_id))
+    if project is None:
+        raise BatchOperationError(404, "Project not found")
+    return project
+
+async def _create_step(db: AsyncSession, user_id: int, step: ProjectStep, data: dict):
+    await _owned_project(db, user_id, step.project_id)
+    if step.order is None:
+        step.order = await next_value(db, "step_order", project_id=step.project_id)
+    else:
+        await advance_to(db, "step_order", step.order, project_id=step.project_id)
+
+async def _update_step(db: AsyncSession, user_id: int, step: ProjectStep, data: dict):
+    if data.get("order") is not None:
+        await advance_to(db, "step_order", data["order"], project_id=step.project_id)
+
+async def _create_prompt(db: AsyncSession, user_id: int, prompt: ProjectPrompt, data: dict):
+    await _owned_project(db, user_id, prompt.project_id)
+    if prompt.step_id:
+        step_id = await db.scalar(select(ProjectStep.id).filter(
+            ProjectStep.id == prompt.step_id, ProjectStep.project_id == prompt.project_id
+        ))
+        if step_id is None:
+            raise BatchOperationError(404, "Step not found")
+    # 与 POST /project_prompts 一致：新提示词从版本 1 开始，顺序号排在最后
+    prompt.version = 1
+    prompt.order = await next_value(db, "prompt_order", project_id=prompt.project_id, step_id=prompt.step_id)
+
+async def _update_prompt(db: AsyncSession, user_id: int, prompt: ProjectPrompt, data: dict):
+    if "content" in data:
+        await detach_dependents(db, [prompt.id])
+        prompt.content_delta = None
+        prompt.delta_base_id = None
+        prompt.delta_depth = 0
+    if data.get("order") is not None:
+        await advance_to(db, "prompt_order", data["order"], project_id=prompt.project_id, step_id=prompt.step_id)
+
+async def _delete_prompt(db: AsyncSession, user_id: int, prompt: ProjectPrompt, data: dict):
+    if prompt.is_latest:
+        await promote_latest(db, prompt.lineage_id)
+
+ENTITIES: Dict[BatchEntity, EntitySpec] = {
+    BatchEntity.TASKS: EntitySpec(Task, TaskCreate, TaskUpdate, TaskResponse, "Task"),
+    BatchEntity.NOTES: EntitySpec(Note, NoteCreate, NoteUpdate, NoteResponse, "Note", generated=("excerpt",)),
+    BatchEntity.TOOLS: EntitySpec(Tool, ToolCreate, ToolUpdate, ToolResponse, "Tool"),
+    BatchEntity.STEPS: EntitySpec(
+        ProjectStep, StepCreate, StepUpdate, StepResponse, "Step", user_owned=False,
+        before_create=_create_step, before_update=_update_step
+    ),
+    BatchEntity.PROMPTS: EntitySpec(
+        ProjectPrompt, PromptCreate, PromptUpdate, PromptResponse, "Prompt", user_owned=False,
+        before_create=_create_prompt, before_update=_update_prompt, after_delete=_delete_prompt
+    ),
+}
+
+@dataclass
+class BatchRunner:
+    db: AsyncSession
+    user_id: int
+    created: Dict[int, int] = field(default_factory=dict)   # 操作序号 → 新记录 ID
+    projects: Set[int] = field(default_factory=set)        # 写过步骤或提示词的项目，提交后使树缓存失效
+
+    def resolve(self, value):
+        """把 "$N" 引用换成第 N 个操作创建的 ID"""
+        if not isinstance(value, str):
+            return value
+        if value.startswith("$") and value[1:].isdigit() and int(value[1:]) in self.created:
+            return self.created[int(value[1:])]
+        raise BatchOperationError(400, f"Unresolved reference {value!r}")
+
+    def parse(self, schema: type, data: Optional[dict], partial: bool) -> dict:
+        data = dict(data or {})
+        for name in REFERENCE_FIELDS:
+            if name in data:
+                data[name] = self.resolve(data[name])
+        try:
+            record = schema.model_validate(data)
+        except ValidationError as exc:
+            raise BatchOperationError(422, _validation_detail(exc))
+        return record.model_dump(mode="json", exclude_unset=partial)
+
+    async def serialize(self, spec: EntitySpec, items: list) -> list:
+        if spec.model is ProjectPrompt:
+            await load_contents(self.db, items)
+        return [spec.response_schema.model_validate(item).model_dump(mode="json") for item in items]
+
+    async def fetch(self, spec: EntitySpec, item_id) -> object:
+        item = await self.db.scalar(spec.owned(self.user_id).filter(spec.model.id == self.resolve(item_id)))
+        if item is None:
+            raise BatchOperationError(404, f"{spec.label} not found")
+        return item
+
+    async def get(self, spec: EntitySpec, operation: BatchOperation):
+        if operation.ids is None:
+            if operation.id is None:
+                raise BatchOperationError(400, "get requires id or ids")
+            return 200, (await self.serialize(spec, [await self.fetch(spec, operation.id)]))[0]
+        ids = [self.resolve(item_id) for item_id in operation.ids]
+        if len(ids) > MAX_BATCH_OPERATIONS:
+            raise BatchOperationError(400, f"get accepts at most {MAX_BATCH_OPERATIONS} ids")
+        found = {item.id: item for item in (await self.db.scalars(
+            spec.owned(self.user_id).filter(spec.model.id.in_(ids))
+        )).all()}
+        # 按请求顺序返回，不存在或无权访问的 ID 省略
+        return 200, await self.serialize(spec, [found[item_id] for item_id in dict.fromkeys(ids) if item_id in found])
+
+    async def write(self, spec: EntitySpec, index: int, operation: BatchOperation):
+        if operation.op == BatchAction.CREATE:
+            data = self.parse(spec.create_schema, operation.data, partial=False)
+            item = spec.model(**data)
+            if spec.user_owned:
+                item.user_id = self.user_id
+            if spec.before_create:
+                await spec.before_create(self.db, self.user_id, item, data)
+            if not spec.user_owned:
+                self.projects.add(item.project_id)
+            self.db.add(item)
+            await self.db.flush()
+            if spec.model is ProjectPrompt:
+                set_committed_value(item, "lineage_id", item.id)   # 与插入触发器一致，免去 refresh
+            if spec.generated:
+                await self.db.refresh(item, spec.generated)
+            self.created[index] = item.id
+            return 200, (await self.serialize(spec, [item]))[0]
+
+        if operation.id is None:
+            raise BatchOperationError(400, f"{operation.op.value} requires id")
+        item = await self.fetch(spec, operation.id)
+        if not spec.user_owned:
+            self.projects.add(item.project_id)
+        if operation.op == BatchAction.UPDATE:
+            data = self.parse(spec.update_schema, operation.data, partial=True)
+            if spec.before_update:
+                await spec.before_update(self.db, self.user_id, item, data)
+            for name, value in data.items():
+                setattr(item, name, value)
+            await self.db.flush()
+            if spec.generated:
+                await self.db.refresh(item, spec.generated)
+            return 200, (await self.serialize(spec, [item]))[0]
+
+        if spec.model is ProjectPrompt:
+            await detach_dependents(self.db, [item.id])
+        await self.db.delete(item)
+        if spec.after_delete:
+            await spec.after_delete(self.db, self.user_id, item, {})
+        await self.db.flush()
+        return 200, {"message": f"{spec.label} deleted successfully"}
+
+async def _execute(runner: BatchRunner, index: int, operation: BatchOperation) -> BatchResult:
+    spec = ENTITIES[operation.entity]
+    try:
+        if operation.op == BatchAction.GET:
+            status, data = await runner.get(spec, operation)
+        else:
+            status, data = await runner.write(spec, index, operation)
+    except BatchOperationError as exc:
+        return BatchResult(index=index, status=exc.status, error=exc.detail)
+    except IntegrityError as exc:
+        return BatchResult(index=index, status=409, error=str(exc.orig))
+    except ValidationError as exc:
+        # 请求数据之外的校验失败（例如已有记录不满足响应模型）同样只算该操作失败
+        return BatchResult(index=index, status=422, error=_validation_detail(exc))
+    except (ValueError, TypeError, OverflowError) as exc:
+        # 字段值无法写入数据库（例如超出 SQLite 整数范围）
+        return BatchResult(index=index, status=400, error=str(exc))
+    return BatchResult(index=index, status=status, data=data)
+
+async def run_batch(db: AsyncSession, user_id: int, operations: List[BatchOperation], atomic: bool = False) -> BatchResponse:
+    """执行一批操作并提交（atomic 且有失败时回滚）"""
+    runner = BatchRunner(db, user_id)
+    results: Dict[int, BatchResult] = {}
+    writing = any(operation.op != BatchAction.GET for operation in operations)
+    if writing:
+        # 立即取得写锁：整批只排队一次，也避免读事务中途升级为写事务时遇到 SQLITE_BUSY
+        await db.execute(text("BEGIN IMMEDIATE"))
+
+    # 连续成功的操作共用一个保存点（每个保存点都有额外的往返）；
+    # 有写操作失败时回滚整组，再让组内操作逐个在各自的保存点中重放
+    group: List[int] = []
+    savepoint = None
+    for index, operation in enumerate(operations):
+        if writing and savepoint is None:
+            savepoint = await db.begin_nested()
+        result = await _execute(runner, index, operation)
+        results[index] = result
+        if result.error is None:
+            group.append(index)
+            continue
+        if savepoint is None or operation.op == BatchAction.GET:
+            continue
+        await savepoint.rollback()
+        savepoint = None
+        for replay in group + [index]:
+            async with db.begin_nested() as replay_savepoint:
+                results[replay] = await _execute(runner, replay, operations[replay])
+                if results[replay].error is not None:
+                    await replay_savepoint.rollback()
+        group = []
+    if savepoint is not None:
+        await savepoint.commit()
+
+    ordered = [results[index] for index in range(len(operations))]
+    if atomic and any(result.error is not None for result in ordered):
+        await db.rollback()
+        return BatchResponse(committed=False, results=ordered)
+    await db.commit()
+    project_cache.invalidate(*runner.projects)
+    return BatchResponse(committed=True, results=ordered)
@@ -0,0 +1,102 @@
+"""项目树的批量复制
+
+复制项目、保存为模板、从模板创建共用同一套逻辑：用固定的 3 次查询读出源项目、步骤和提示词，
+在写锁内为新步骤和提示词预先分配连续 ID 完成旧 ID → 新 ID 的映射，再批量写入步骤和提示词。查询次数与步骤数无关。
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.project import Project, ProjectStatus
+from ..models.project_step import ProjectStep
+from ..models.project_prompt import ProjectPrompt
+from .prompt_history import resolve_contents
+
+STEP_FIELDS = ("title", "description", "order", "expected_output")
+PROGRESS_FIELDS = ("actual_output", "notes")   # 只有复制项目时保留
+PROMPT_FIELDS = ("title", "content", "variables", "order", "version", "is_latest")
+
+@dataclass(frozen=True)
+class CloneOptions:
+    name: str
+    status: Optional[str] = None        # 为空时使用模型默认值
+    is_template: bool = False
+    copy_progress: bool = False         # 是否复制步骤的实际输出和笔记
+
+async def load_source(db: AsyncSession, project_id: int, user_id: int, template_only: bool = False) -> Optional[Project]:
+    query = select(Project).filter(Project.id == project_id, Project.user_id == user_id)
+    if template_only:
+        query = query.filter(Project.is_template == True)
+    return await db.scalar(query)
+
+async def clone_project(db: AsyncSession, source: Project, options: CloneOptions) -> Project:
+    """复制项目树，返回新项目（未提交）"""
+    step_fields = STEP_FIELDS + (PROGRESS_FIELDS if options.copy_progress else ())
+    steps = (await db.execute(
+        select(ProjectStep.id, *(getattr(ProjectStep, f) for f in step_fields))
+        .filter(ProjectStep.project_id == source.id)
+        .order_by(ProjectStep.id)
+    )).all()
+    prompts = (await db.execute(
+        select(
+            ProjectPrompt.id, ProjectPrompt.step_id, ProjectPrompt.content_delta, ProjectPrompt.delta_base_id,
+            ProjectPrompt.lineage_id, *(getattr(ProjectPrompt, f) for f in PROMPT_FIELDS)
+        )
+        .join(ProjectStep, ProjectPrompt.step_id == ProjectStep.id)
+        .filter(ProjectStep.project_id == source.id)
+        .order_by(ProjectPrompt.id)
+    )).all()
+
+    project = Project(
+        name=options.name,
+        description=source.description,
+        tech_stack=source.tech_stack,
+        is_template=options.is_template,
+        user_id=source.user_id
+    )
+    if options.status is not None:
+        project.status = options.status
+    db.add(project)
+    await db.flush()
+
+    step_ids = {}
+    if steps:
+        # 写入项目后本事务已持有 SQLite 写锁，max(id) 之后的 ID 段不会被其他连接占用；
+        # SQLite 的批量 INSERT ... RETURNING 不保证返回顺序，这里直接分配 ID。
+        # 走 Core 的 executemany：ORM 批量插入会按空值分组拆成多条语句
+        next_id = (await db.scalar(select(func.max(ProjectStep.id))) or 0) + 1
+        step_ids = {row.id: next_id + i for i, row in enumerate(steps)}
+        await db.execute(insert(ProjectStep.__table__), [
+            dict(zip(step_fields, row[1:]), id=step_ids[row.id], project_id=project.id)
+            for row in steps
+        ])
+
+    if prompts:
+        # 副本一律存完整内容；提示词同样预分配 ID，以便把版本链映射到新 ID
+        contents = await resolve_contents(db, prompts)
+        next_id = (await db.scalar(select(func.max(ProjectPrompt.id))) or 0) + 1
+        prompt_ids = {row.id: next_id + i for i, row in enumerate(prompts)}
+        await db.execute(insert(ProjectPrompt.__table__), [
+            dict(
+                zip(PROMPT_FIELDS, row[5:]),
+                id=prompt_ids[row.id],
+                content=contents[row.id],
+                project_id=project.id,
+                step_id=step_ids[row.step_id],
+                lineage_id=prompt_ids.get(row.lineage_id, prompt_ids[row.id]),
+                is_template=options.is_template
+            )
+            for row in prompts
+        ])
+    return project
+
+def duplicate_options(source: Project) -> CloneOptions:
+    return CloneOptions(name=f"{source.name} (复制)", status=ProjectStatus.PLANNING, copy_progress=True)
+
+def template_options(source: Project) -> CloneOptions:
+    return CloneOptions(name=f"{source.name} (Template)", is_template=True)
+
+def from_template_options(template: Project) -> CloneOptions:
+    return CloneOptions(name=template.name.replace(" (Template)", ""))
@@ -0,0 +1,132 @@
+"""按用户维护的列表计数
+
+无过滤或只按状态/分类过滤时，总数直接读取 entity_counters 中由触发器维护的计数行；
+带全文检索条件时按请求的 CountMode 返回精确值、封顶值或估算值。
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.counter import EntityCounter
+from ..schemas.common import CountMode
+
+COUNT_CAP = 1000          # capped 模式的上限
+ESTIMATE_SAMPLE = 1000    # estimate 模式的样本行数
+
+@dataclass(frozen=True)
+class CounterSpec:
+    entity: str
+    bucket_column: str
+    bucket_prefix: str
+
+    def bucket_sql(self, row: str) -> str:
+        return f"'{self.bucket_prefix}:' || coalesce({row}.{self.bucket_column}, '')"
+
+COUNTER_SPECS = {
+    "tasks": CounterSpec("tasks", "completed", "completed"),
+    "tools": CounterSpec("tools", "category", "category"),
+    "projects": CounterSpec("projects", "status", "status"),
+}
+
+def bucket(entity: str, value) -> str:
+    """与触发器中的 bucket 表达式保持一致"""
+    spec = COUNTER_SPECS[entity]
+    if isinstance(value, bool):
+        value = int(value)
+    return f"{spec.bucket_prefix}:{getattr(value, 'value', value)}"
+
+def _bump(spec: CounterSpec, row: str, bucket_sql: str, delta: int) -> str:
+    if delta > 0:
+        return (
+            f"INSERT INTO entity_counters(user_id, entity, bucket, count) "
+            f"VALUES ({row}.user_id, '{spec.entity}', {bucket_sql}, 1) "
+            f"ON CONFLICT(user_id, entity, bucket) DO UPDATE SET count = count + 1;"
+        )
+    return (
+        f"UPDATE entity_counters SET count = count - 1 "
+        f"WHERE user_id = {row}.user_id AND entity = '{spec.entity}' AND bucket = {bucket_sql};"
+    )
+
+def _triggers(spec: CounterSpec) -> dict:
+    name = f"{spec.entity}_counters"
+    on_insert = _bump(spec, "new", "'all'", 1) + _bump(spec, "new", spec.bucket_sql("new"), 1)
+    on_delete = _bump(spec, "old", "'all'", -1) + _bump(spec, "old", spec.bucket_sql("old"), -1)
+    return {
+        f"{name}_ai": f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {spec.entity} BEGIN {on_insert} END",
+        f"{name}_ad": f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {spec.entity} BEGIN {on_delete} END",
+        f"{name}_au": (
+            f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {spec.bucket_column}, user_id "
+            f"ON {spec.entity} BEGIN {on_delete} {on_insert} END"
+        ),
+    }
+
+def _backfill(conn, spec: CounterSpec):
+    conn.exec_driver_sql("DELETE FROM entity_counters WHERE entity = ?", (spec.entity,))
+    conn.exec_driver_sql(
+        f"INSERT INTO entity_counters(user_id, entity, bucket, count) "
+        f"SELECT user_id, '{spec.entity}', 'all', count(*) FROM {spec.entity} GROUP BY user_id"
+    )
+    conn.exec_driver_sql(
+        f"INSERT INTO entity_counters(user_id, entity, bucket, count) "
+        f"SELECT user_id, '{spec.entity}', {spec.bucket_sql(spec.entity)}, count(*) "
+        f"FROM {spec.entity} GROUP BY user_id, 3"
+    )
+
+def ensure_counters(conn: Connection):
+    """创建计数表和触发器；有新建触发器时从实体表重新统计"""
+    EntityCounter.__table__.create(bind=conn, checkfirst=True)
+    existing = set(conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+    ).scalars())
+    for spec in COUNTER_SPECS.values():
+        triggers = _triggers(spec)
+        if set(triggers) <= existing:
+            continue
+        for statement in triggers.values():
+            conn.exec_driver_sql(statement)
+        _backfill(conn, spec)
+
+async def counter_total(db: AsyncSession, user_id: int, entity: str, bucket_name: str = "all") -> int:
+    count = await db.scalar(select(EntityCounter.count).filter(
+        EntityCounter.user_id == user_id,
+        EntityCounter.entity == entity,
+        EntityCounter.bucket == bucket_name
+    ))
+    return count or 0
+
+async def search_total(
+    db: AsyncSession,
+    query,
+    base_query,
+    model,
+    base_total: int,
+    mode: CountMode
+) -> Tuple[int, bool]:
+    """带全文检索条件时的总数，返回 (total, 是否精确)
+
+    base_query 为不含检索条件的查询，base_total 为其总数（来自计数行）。
+    """
+    if mode == CountMode.EXACT:
+        return await db.scalar(select(func.count()).select_from(query.subquery())), True
+
+    if mode == CountMode.CAPPED:
+        capped = await db.scalar(
+            select(func.count()).select_from(query.limit(COUNT_CAP + 1).subquery())
+        )
+        if capped > COUNT_CAP:
+            return COUNT_CAP, False
+        return capped, True
+
+    # 估算：统计前 ESTIMATE_SAMPLE 行中的命中数，再按总行数放大
+    boundary: Optional[int] = await db.scalar(
+        base_query.with_only_columns(model.id).order_by(model.id).offset(ESTIMATE_SAMPLE - 1).limit(1)
+    )
+    if boundary is None:
+        return await db.scalar(select(func.count()).select_from(query.subquery())), True
+    sample_hits = await db.scalar(
+        select(func.count()).select_from(query.filter(model.id <= boundary).subquery())
+    )
+    return round(sample_hits * base_total / ESTIMATE_SAMPLE), False
@@ -0,0 +1,194 @@
+"""提示词版本间的差异计算
+
+文本先按行或按词切分，词元映射为整数后用 Myers 的线性空间算法（中间蛇分治）求最短编辑脚本，
+每层只保留两条 O(N+M) 的前沿数组。每次计算有 CPU 时间预算：超时后尚未处理的区间直接记为整段删除加整段插入，
+结果仍然正确但不一定最短（exact 为假）。结果按版本对缓存，键中带内容哈希，提示词被原地修改后不会命中旧结果。
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DIFF_TIME_BUDGET = float(os.getenv("PROMPT_DIFF_TIME_BUDGET_MS", "500")) / 1000
+DIFF_CACHE_SIZE = int(os.getenv("PROMPT_DIFF_CACHE_SIZE", "256"))
+
+# 按词切分：连续的字母数字、连续的空白各为一个词元，汉字和标点逐字切分
+WORD = re.compile(r"[^\W\u3400-\u9fff\uf900-\ufaff]+|\s+|.", re.DOTALL)
+
+def tokenize(text: str, mode: str) -> List[str]:
+    if mode == "line":
+        return text.splitlines(keepends=True)
+    return WORD.findall(text)
+
+class _Budget:
+    __slots__ = ("deadline", "exceeded")
+
+    def __init__(self, seconds: float):
+        self.deadline = time.perf_counter() + seconds
+        self.exceeded = False
+
+    def spent(self) -> bool:
+        if not self.exceeded and time.perf_counter() > self.deadline:
+            self.exceeded = True
+        return self.exceeded
+
+def _middle_snake(a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int,
+                  budget: _Budget) -> Optional[Tuple[int, int, int, int]]:
+    """返回中间蛇的起点和终点 (x0, y0, x1, y1)（相对 alo/blo）；超出预算返回 None"""
+    n, m = ahi - alo, bhi - blo
+    delta = n - m
+    odd = delta & 1
+    limit = (n + m + 1) // 2
+    offset = limit + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+    for d in range(limit + 1):
+        if budget.spent():
+            return None
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            # 反向第 d-1 步已到达的对角线为 delta-(d-1) .. delta+(d-1)
+            if odd and delta - d < k < delta + d and x + backward[offset + delta - k] >= n:
+                return x0, y0, x, y
+        for k in range(-d, d + 1, 2):
+            # 反向坐标：x' = n - x，y' = m - y，对角线 k' = x' - y' 对应正向对角线 delta - k'
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if not odd and -d <= delta - k <= d and x + forward[offset + delta - k] >= n:
+                return n - x, m - y, n - x0, m - y0
+    return None   # 不会到达：D 不超过 n + m
+
+def _diff(a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int,
+          budget: _Budget, out: List[Tuple[str, int, int]]):
+    """把 a[alo:ahi] 到 b[blo:bhi] 的编辑脚本追加到 out：("equal", i, j) 与 ("delete", i, j) 指 a 的区间，("insert", i, j) 指 b 的区间"""
+    start = alo
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        alo += 1
+        blo += 1
+    if alo > start:
+        out.append(("equal", start, alo))
+    suffix = 0
+    while alo < ahi - suffix and blo < bhi - suffix and a[ahi - 1 - suffix] == b[bhi - 1 - suffix]:
+        suffix += 1
+    ahi -= suffix
+    bhi -= suffix
+
+    snake = None
+    if alo < ahi and blo < bhi:
+        snake = _middle_snake(a, alo, ahi, b, blo, bhi, budget)
+    if snake is None:
+        if alo < ahi:
+            out.append(("delete", alo, ahi))
+        if blo < bhi:
+            out.append(("insert", blo, bhi))
+    else:
+        x0, y0, x1, y1 = snake
+        _diff(a, alo, alo + x0, b, blo, blo + y0, budget, out)
+        if x1 > x0:
+            out.append(("equal", alo + x0, alo + x1))
+        _diff(a, alo + x1, ahi, b, blo + y1, bhi, budget, out)
+    if suffix:
+        out.append(("equal", ahi, ahi + suffix))
+
+def _ops(old_tokens: List[str], new_tokens: List[str], timer: _Budget, ops: List[List[str]], counts: Dict[str, int]):
+    """把两段词元的差异合并追加到 ops"""
+    ids: Dict[str, int] = {}
+    a = [ids.setdefault(token, len(ids)) for token in old_tokens]
+    b = [ids.setdefault(token, len(ids)) for token in new_tokens]
+    script: List[Tuple[str, int, int]] = []
+    _diff(a, 0, len(a), b, 0, len(b), timer, script)
+    for tag, i, j in script:
+        text = "".join(new_tokens[i:j] if tag == "insert" else old_tokens[i:j])
+        if tag != "equal":
+            counts[tag] += j - i
+        if ops and ops[-1][0] == tag:
+            ops[-1][1] += text
+        else:
+            ops.append([tag, text])
+
+def diff_texts(old: str, new: str, mode: str = "line", budget: float = DIFF_TIME_BUDGET) -> dict:
+    """计算 old 到 new 的差异，相邻同类片段合并；insertions/deletions 为插入和删除的词元数
+
+    按词比较时先按行求差异，只在改动的行块内部再按词细分（与 git diff --word-diff 相同），
+    长文本中分散的小改动不必在整篇词元序列上求解。
+    """
+    timer = _Budget(budget)
+    ops: List[List[str]] = []
+    counts = {"insert": 0, "delete": 0}
+    if mode == "line":
+        _ops(tokenize(old, "line"), tokenize(new, "line"), timer, ops, counts)
+    else:
+        lines: List[List[str]] = []
+        _ops(tokenize(old, "line"), tokenize(new, "line"), timer, lines, {"insert": 0, "delete": 0})
+        removed = added = ""
+        for tag, text in lines + [["equal", ""]]:
+            if tag == "delete":
+                removed += text
+            elif tag == "insert":
+                added += text
+            else:
+                if removed or added:
+                    _ops(tokenize(removed, "word"), tokenize(added, "word"), timer, ops, counts)
+                    removed = added = ""
+                if text:
+                    if ops and ops[-1][0] == "equal":
+                        ops[-1][1] += text
+                    else:
+                        ops.append(["equal", text])
+    return {"exact": not timer.exceeded, "insertions": counts["insert"], "deletions": counts["delete"], "ops": ops}
+
+class DiffCache:
+    """差异结果的 LRU 缓存（接口在线程池中调用，读写加锁，计算在锁外进行）"""
+
+    def __init__(self, maxsize: int = DIFF_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def diff(self, old_id: Optional[int], new_id: int, old: str, new: str, mode: str, field: str = "content") -> dict:
+        key = (old_id, new_id, mode, field, hash(old), hash(new))
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return result
+            self.misses += 1
+        result = diff_texts(old, new, mode)
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[key] = result
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+diff_cache = DiffCache()
@@ -0,0 +1,103 @@
+"""条件请求（ETag / If-None-Match）
+
+每个读取范围（某用户的工具、某项目的步骤……）在 collection_versions 中有一个版本号，
+由触发器在对应行增删改时递增。ETag 由版本号、请求路径、查询参数和响应格式计算，
+读取版本号只需一次主键查询，客户端带着匹配的 If-None-Match 轮询时直接返回 304，不查询也不序列化实体。
+范围中包含所属用户 ID，不同用户之间不会互相命中。
+"""
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.collection_version import CollectionVersion
+from .serialization import wants_msgpack
+
+@dataclass(frozen=True)
+class VersionedCollection:
+    name: str
+    table: str
+    scope_sql: str    # 由行计算范围的 SQL 表达式，{row} 为 new / old / 表名；结果为 NULL 时不记录
+
+    def scope(self, row: str) -> str:
+        return self.scope_sql.format(row=row)
+
+def _owner(row: str) -> str:
+    return f"(SELECT user_id FROM projects WHERE id = {row}.project_id)"
+
+VERSIONED_COLLECTIONS = {
+    "tools": VersionedCollection("tools", "tools", "'tools:' || {row}.user_id"),
+    "notes": VersionedCollection("notes", "notes", "'notes:' || {row}.user_id"),
+    "project": VersionedCollection("project", "projects", "'project:' || {row}.user_id || ':' || {row}.id"),
+    "steps": VersionedCollection(
+        "steps", "project_steps", "'steps:' || " + _owner("{row}") + " || ':' || {row}.project_id"
+    ),
+    "prompts": VersionedCollection(
+        "prompts", "project_prompts", "'prompts:' || " + _owner("{row}") + " || ':' || {row}.step_id"
+    ),
+}
+
+def scope_key(name: str, *parts) -> str:
+    """与触发器中的范围表达式保持一致"""
+    return ":".join([name, *(str(part) for part in parts)])
+
+def _bump(scope_sql: str) -> str:
+    return (
+        f"INSERT INTO collection_versions(scope, version) SELECT scope, 1 FROM (SELECT {scope_sql} AS scope) "
+        f"WHERE scope IS NOT NULL ON CONFLICT(scope) DO UPDATE SET version = version + 1;"
+    )
+
+def _triggers(collection: VersionedCollection) -> dict:
+    name = f"{collection.table}_versions"
+    new, old = _bump(collection.scope("new")), _bump(collection.scope("old"))
+    return {
+        f"{name}_ai": f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {collection.table} BEGIN {new} END",
+        f"{name}_ad": f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {collection.table} BEGIN {old} END",
+        # 行移到另一个范围（例如提示词换了步骤）时两边都要失效
+        f"{name}_au": f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE ON {collection.table} BEGIN {old} {new} END",
+    }
+
+def ensure_collection_versions(conn: Connection):
+    """创建版本表和触发器，并为已有数据的范围写入初始版本"""
+    CollectionVersion.__table__.create(bind=conn, checkfirst=True)
+    for collection in VERSIONED_COLLECTIONS.values():
+        for statement in _triggers(collection).values():
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(
+            f"INSERT OR IGNORE INTO collection_versions(scope, version) "
+            f"SELECT DISTINCT {collection.scope(collection.table)}, 1 FROM {collection.table} "
+            f"WHERE {collection.scope(collection.table)} IS NOT NULL"
+        )
+
+async def collection_etag(db: AsyncSession, request: Request, name: str, *parts) -> Optional[str]:
+    """范围当前的强 ETag；范围还没有版本记录（从未写入或不属于当前用户）时返回 None"""
+    scope = scope_key(name, *parts)
+    version = await db.scalar(select(CollectionVersion.version).filter(CollectionVersion.scope == scope))
+    if version is None:
+        return None
+    variant = "\n".join([
+        scope, request.url.path, str(sorted(request.query_params.multi_items())),
+        "msgpack" if wants_msgpack(request) else "json",
+    ])
+    return f'"{version}-{hashlib.blake2b(variant.encode(), digest_size=8).hexdigest()}"'
+
+def is_not_modified(request: Request, etag: Optional[str]) -> bool:
+    """If-None-Match 是否命中（按弱比较，忽略 W/ 前缀）"""
+    header = request.headers.get("if-none-match")
+    if etag is None or not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept"})
+
+def with_etag(response: Response, etag: Optional[str]) -> Response:
+    if etag is not None:
+        response.headers["ETag"] = etag
+    return response
@@ -0,0 +1,85 @@
+"""NDJSON 流式导出
+
+每行一条记录：{"type": "...", "data": {...}}。第一行是 header，之后依次为
+project、step、prompt（账户导出再追加 task、note、tool）。记录保留原 ID，
+step/prompt 通过 project_id、step_id 引用父记录，导入时据此重新映射。
+每类记录用 yield_per 分批读取，逐批写出，内存占用与数据量无关。
+"""
+import datetime
+import json
+from typing import AsyncIterator, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ..models.project import Project
+from ..models.project_step import ProjectStep
+from ..models.project_prompt import ProjectPrompt
+from ..models.task import Task
+from ..models.note import Note
+from ..models.tool import Tool
+from .prompt_history import resolve_contents
+
+EXPORT_FORMAT = "promptgenius.ndjson"
+EXPORT_VERSION = 1
+BATCH_SIZE = 500
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+def ndjson_line(record_type: str, data: dict) -> str:
+    return json.dumps({"type": record_type, "data": data}, ensure_ascii=False, default=_json_default) + "\n"
+
+# 导入时归属于当前用户，不导出 user_id；提示词的差量存储列在导出时还原为完整内容
+EXCLUDED_COLUMNS = {"user_id", "content_delta", "delta_base_id", "delta_depth"}
+
+def _columns(model):
+    return [column for column in model.__table__.columns if column.key not in EXCLUDED_COLUMNS]
+
+def _statements(user_id: int, project_ids: Optional[Sequence[int]], include_account: bool):
+    projects = select(Project.id).filter(Project.user_id == user_id)
+    if project_ids is not None:
+        projects = projects.filter(Project.id.in_(project_ids))
+    project_scope = projects.scalar_subquery()
+
+    yield "project", select(*_columns(Project)).filter(Project.id.in_(project_scope)).order_by(Project.id)
+    yield "step", select(*_columns(ProjectStep)).filter(
+        ProjectStep.project_id.in_(project_scope)
+    ).order_by(ProjectStep.id)
+    yield "prompt", select(
+        *_columns(ProjectPrompt), ProjectPrompt.content_delta, ProjectPrompt.delta_base_id
+    ).filter(
+        ProjectPrompt.project_id.in_(project_scope)
+    ).order_by(ProjectPrompt.id)
+    if include_account:
+        for record_type, model in (("task", Task), ("note", Note), ("tool", Tool)):
+            yield record_type, select(*_columns(model)).filter(model.user_id == user_id).order_by(model.id)
+
+async def export_ndjson(
+    session_factory: async_sessionmaker,
+    user_id: int,
+    scope: str,
+    project_ids: Optional[Sequence[int]] = None,
+    include_account: bool = False
+) -> AsyncIterator[bytes]:
+    """按批生成 NDJSON 字节块"""
+    yield ndjson_line("header", {
+        "format": EXPORT_FORMAT,
+        "version": EXPORT_VERSION,
+        "scope": scope,
+        "exported_at": datetime.datetime.utcnow(),
+    }).encode()
+    async with session_factory() as db:
+        for record_type, statement in _statements(user_id, project_ids, include_account):
+            result = await db.stream(statement.execution_options(yield_per=BATCH_SIZE))
+            async for rows in result.partitions():
+                records = [row._asdict() for row in rows]
+                if record_type == "prompt":
+                    contents = await resolve_contents(db, rows)
+                    for record in records:
+                        record["content"] = contents[record["id"]]
+                        del record["content_delta"], record["delta_base_id"]
+                yield "".join(ndjson_line(record_type, record) for record in records).encode()
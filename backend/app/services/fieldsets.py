@@ -0,0 +1,113 @@
+"""稀疏字段集（?fields=）
+
+列表接口的 fields 参数按资源白名单（响应模型中对应数据表列的字段）校验，
+只 SELECT 所需的列。id 总是返回；排序键所需的列会一并查询但不输出。
+未传 fields 时查询响应模型的全部列；结果行直接构造为响应（见 serialization）。
+"""
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from pydantic import ConfigDict, Field, create_model
+
+from ..models.task import Task
+from ..models.tool import Tool
+from ..models.project import Project
+from ..models.project_step import ProjectStep
+from ..models.project_prompt import ProjectPrompt
+from ..schemas.task import TaskResponse
+from ..schemas.tool import ToolResponse
+from ..schemas.project import ProjectResponse
+from ..schemas.project_step import StepResponse
+from ..schemas.project_prompt import PromptResponse
+from .pagination import SortKey
+from .serialization import MSGPACK_MEDIA_TYPES, VALIDATE_RESPONSES, negotiated_response
+
+@lru_cache(maxsize=256)
+def narrow_schema(schema: type, names: Tuple[str, ...]) -> type:
+    """只保留 names 中字段的响应模型"""
+    fields = {name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in names}
+    return create_model(
+        f"{schema.__name__}Fields", __config__=ConfigDict(from_attributes=True), **fields
+    )
+
+@lru_cache(maxsize=32)
+def sparse_list_schema(list_schema: type, item_schema: type, names: Tuple[str, ...]) -> type:
+    """文档用的列表模型：条目只含 names 中的字段，除 id 外都可能因 fields 参数而省略"""
+    item_fields = {
+        name: (item_schema.model_fields[name].annotation, ... if name == "id" else Field(None))
+        for name in names
+    }
+    item = create_model(f"{item_schema.__name__}Sparse", **item_fields)
+    return create_model(
+        f"{list_schema.__name__}Sparse", __base__=list_schema,
+        items=(List[item], Field(..., description="未在 fields 中请求的字段不出现在条目中"))
+    )
+
+@dataclass(frozen=True)
+class Fieldset:
+    model: type
+    response_schema: type
+    # 输出某字段时还需要查询的列，例如差量存储的提示词内容
+    requires: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+
+    @property
+    def allowed(self) -> Tuple[str, ...]:
+        columns = {column.key for column in self.model.__table__.columns}
+        return tuple(name for name in self.response_schema.model_fields if name in columns)
+
+    def responses(self, list_schema: type) -> dict:
+        """路由的 responses 参数：列表接口直接返回投影后的 Response，文档按实际输出描述条目和媒体类型"""
+        return {200: {
+            "model": sparse_list_schema(list_schema, self.response_schema, self.allowed),
+            "content": {MSGPACK_MEDIA_TYPES[0]: {}},
+        }}
+
+    def parse(self, fields: Optional[str]) -> Tuple[str, ...]:
+        """校验 fields 参数，返回按响应模型顺序排列的字段名；未传时返回全部字段"""
+        if fields is None:
+            return self.allowed
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = sorted(requested - set(self.allowed))
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(self.allowed)}"
+            )
+        return tuple(name for name in self.allowed if name in requested or name == "id")
+
+    def project(self, query, names: Sequence[str], keys: Sequence[SortKey] = ()):
+        """把查询的列替换为所需字段、依赖列和排序键"""
+        wanted = list(names)
+        for name in names:
+            wanted += [extra for extra in self.requires.get(name, ()) if extra not in wanted]
+        columns = [getattr(self.model, name) for name in wanted]
+        columns += [key.column.label(key.name) for key in keys if key.name not in wanted]
+        return query.with_only_columns(*columns, maintain_column_froms=True)
+
+    def dump(self, names: Tuple[str, ...], rows, overrides: Optional[Dict[str, Dict]] = None) -> list:
+        """把查询行转为字典列表；overrides 为 {字段: {id: 值}}，替换查询得到的值"""
+        # project() 把所需字段放在查询列的最前面
+        items = [dict(zip(names, row)) for row in rows]
+        for name, values in (overrides or {}).items():
+            for item in items:
+                if item["id"] in values:
+                    item[name] = values[item["id"]]
+        if VALIDATE_RESPONSES:
+            schema = narrow_schema(self.response_schema, names)
+            items = [schema.model_validate(item).model_dump(mode="json") for item in items]
+        return items
+
+    def response(self, request: Request, names: Tuple[str, ...], rows,
+                 overrides: Optional[Dict[str, Dict]] = None, **page) -> Response:
+        return negotiated_response(request, {**page, "items": self.dump(names, rows, overrides)})
+
+FIELDSETS = {
+    "tasks": Fieldset(Task, TaskResponse),
+    "tools": Fieldset(Tool, ToolResponse),
+    "projects": Fieldset(Project, ProjectResponse),
+    "steps": Fieldset(ProjectStep, StepResponse),
+    "prompts": Fieldset(ProjectPrompt, PromptResponse, {"content": ("content_delta", "delta_base_id")}),
+}
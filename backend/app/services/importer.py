@@ -0,0 +1,356 @@
+"""项目脚本 / NDJSON 的流式导入
+
+请求体按块增量解析，不会整体读入内存：
+- NDJSON（/api/export 的输出）逐行解析；
+- 脚本 JSON（POST /projects/{id}/export 的输出）逐个解析 steps 数组中的元素。
+解析出的记录按类型攒批，每批用 pydantic 校验后以 executemany 写入，整个导入在同一个事务中完成。
+导出文件中的原 ID 只用于建立引用关系：项目逐个插入拿到新 ID，步骤和提示词在写锁内预分配连续 ID，
+提示词的 lineage_id 据此映射到新 ID（版本链的根总是先于其后续版本导出）。
+dry_run 时只解析和校验（包括引用关系），不写库。
+"""
+import codecs
+import datetime
+import json
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.project import Project
+from ..models.project_step import ProjectStep
+from ..models.project_prompt import ProjectPrompt
+from ..models.task import Task
+from ..models.note import Note
+from ..models.tool import Tool
+from ..schemas.transfer import (
+    ImportFormat, ImportIssue, ImportReport,
+    ProjectRecord, StepRecord, PromptRecord, TaskRecord, NoteRecord, ToolRecord
+)
+from .export import EXPORT_FORMAT
+
+BATCH_SIZE = 1000
+MAX_ERRORS = 50
+
+# 写入顺序：父记录先于子记录
+RECORD_TYPES: Dict[str, Tuple[type, type]] = {
+    "project": (ProjectRecord, Project),
+    "step": (StepRecord, ProjectStep),
+    "prompt": (PromptRecord, ProjectPrompt),
+    "task": (TaskRecord, Task),
+    "note": (NoteRecord, Note),
+    "tool": (ToolRecord, Tool),
+}
+
+class ImportParseError(ValueError):
+    pass
+
+class _TextReader:
+    """在增量解码的文本缓冲上逐个解析 JSON 值"""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self.chunks = chunks.__aiter__()
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.decode_json = json.JSONDecoder().raw_decode
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    async def fill(self) -> bool:
+        if self.eof:
+            return False
+        try:
+            chunk = await self.chunks.__anext__()
+        except StopAsyncIteration:
+            self.eof = True
+            self.buffer = self.buffer[self.pos:] + self.decoder.decode(b"", final=True)
+            self.pos = 0
+            return False
+        self.buffer = self.buffer[self.pos:] + self.decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    async def peek(self) -> str:
+        """跳过空白，返回下一个字符（结束时为空串）"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer) or not await self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    async def expect(self, char: str):
+        if await self.peek() != char:
+            raise ImportParseError(f"Expected '{char}' in script JSON")
+        self.pos += 1
+
+    async def value(self):
+        await self.peek()
+        while True:
+            try:
+                value, end = self.decode_json(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if await self.fill():
+                    continue
+                raise ImportParseError("Malformed or truncated script JSON")
+            # 数字可能被块边界截断
+            if end == len(self.buffer) and isinstance(value, (int, float)) and await self.fill():
+                continue
+            self.pos = end
+            return value
+
+    async def lines(self) -> AsyncIterator[str]:
+        while True:
+            newline = self.buffer.find("\n", self.pos)
+            if newline >= 0:
+                line, self.pos = self.buffer[self.pos:newline], newline + 1
+                yield line
+            elif not await self.fill():
+                if self.pos < len(self.buffer):
+                    line, self.pos = self.buffer[self.pos:], len(self.buffer)
+                    yield line
+                return
+
+async def detect_format(reader: _TextReader) -> ImportFormat:
+    """NDJSON 记录以 {"type": 开头，脚本 JSON 以 {"project" 或 {"steps" 开头"""
+    if await reader.peek() != "{":
+        raise ImportParseError("Import body must be a JSON object or NDJSON records")
+    start = reader.pos
+    reader.pos += 1
+    first_key = await reader.value() if await reader.peek() == '"' else None
+    reader.pos = start
+    return ImportFormat.NDJSON if first_key == "type" else ImportFormat.SCRIPT
+
+async def ndjson_records(reader: _TextReader) -> AsyncIterator[Tuple[int, str, dict]]:
+    line_no = 0
+    async for line in reader.lines():
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ImportParseError(f"Line {line_no}: {exc.msg}")
+        if not isinstance(record, dict) or not isinstance(record.get("data"), dict):
+            raise ImportParseError(f"Line {line_no}: expected {{\"type\": ..., \"data\": {{...}}}}")
+        record_type = record.get("type")
+        if record_type == "header":
+            if record["data"].get("format") != EXPORT_FORMAT:
+                raise ImportParseError(f"Line {line_no}: unsupported export format")
+            continue
+        yield line_no, record_type, record["data"]
+
+async def script_records(reader: _TextReader) -> AsyncIterator[Tuple[int, str, dict]]:
+    """脚本没有 ID，用序号作为原 ID：项目为 0，步骤为其下标，提示词为记录序号
+
+    提示词的 lineage 是导出时的版本链标识，同一条链的版本以链中第一个出现的提示词为根。
+    JSON 对象的键没有固定顺序：steps 出现在 project 之前时，先暂存步骤和提示词，读到项目后再输出。
+    """
+    record_no = 0
+    lineages: Dict[object, int] = {}
+    held: Optional[List[Tuple[int, str, dict]]] = []   # 读到项目之前的记录；之后为 None
+    await reader.expect("{")
+    while await reader.peek() != "}":
+        key = await reader.value()
+        await reader.expect(":")
+        if key == "steps":
+            await reader.expect("[")
+            step_index = 0
+            while await reader.peek() != "]":
+                step = await reader.value()
+                if not isinstance(step, dict):
+                    raise ImportParseError("Each step must be an object")
+                prompts = step.pop("prompts", None) or []
+                record_no += 1
+                records = [(record_no, "step", {**step, "id": step_index, "project_id": 0})]
+                for prompt in prompts:
+                    record_no += 1
+                    if isinstance(prompt, dict) and prompt.get("lineage") is not None:
+                        lineage_id = lineages.setdefault(prompt["lineage"], record_no)
+                        prompt = dict(prompt, id=record_no, lineage_id=lineage_id)
+                    records.append((record_no, "prompt", {**prompt, "project_id": 0, "step_id": step_index}))
+                if held is not None:
+                    held.extend(records)
+                else:
+                    for record in records:
+                        yield record
+                step_index += 1
+                if await reader.peek() == ",":
+                    reader.pos += 1
+            reader.pos += 1
+        elif key == "project":
+            project = await reader.value()
+            record_no += 1
+            yield record_no, "project", {**project, "id": 0} if isinstance(project, dict) else project
+            for record in held or ():
+                yield record
+            held = None
+        else:
+            await reader.value()
+        if await reader.peek() == ",":
+            reader.pos += 1
+        elif await reader.peek() != "}":
+            raise ImportParseError("Expected ',' or '}' in script JSON")
+    # 没有项目时照常输出，由导入器报告找不到项目
+    for record in held or ():
+        yield record
+
+class Importer:
+    def __init__(self, db: AsyncSession, user_id: int, dry_run: bool = False):
+        self.db = db
+        self.user_id = user_id
+        self.dry_run = dry_run
+        self.pending: Dict[str, List[Tuple[int, dict]]] = {name: [] for name in RECORD_TYPES}
+        self.counts = {name: 0 for name in RECORD_TYPES}
+        self.errors: List[ImportIssue] = []
+        self.project_ids: Dict[int, int] = {}   # 原 ID → 新 ID
+        self.step_ids: Dict[int, int] = {}
+        self.prompt_ids: Dict[int, int] = {}
+        self.next_ids: Dict[str, int] = {}
+        self.now = datetime.datetime.utcnow()
+
+    def error(self, record_no: int, record_type: str, message: str):
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(ImportIssue(record=record_no, type=record_type, message=message))
+
+    @property
+    def writing(self) -> bool:
+        # 出现错误后整个事务会回滚，之后只继续校验
+        return not self.dry_run and not self.errors
+
+    async def add(self, record_no: int, record_type: str, data):
+        if record_type not in RECORD_TYPES:
+            self.error(record_no, str(record_type), "Unknown record type")
+            return
+        self.pending[record_type].append((record_no, data))
+        if len(self.pending[record_type]) >= BATCH_SIZE:
+            await self.flush()
+
+    async def flush(self):
+        for record_type in RECORD_TYPES:
+            batch, self.pending[record_type] = self.pending[record_type], []
+            if batch:
+                await self._flush(record_type, batch)
+
+    def _validate(self, record_type: str, batch) -> List[Tuple[int, BaseModel]]:
+        schema = RECORD_TYPES[record_type][0]
+        valid = []
+        for record_no, data in batch:
+            try:
+                valid.append((record_no, schema.model_validate(data)))
+            except ValidationError as exc:
+                first = exc.errors()[0]
+                location = ".".join(str(part) for part in first["loc"])
+                self.error(record_no, record_type, f"{location}: {first['msg']}" if location else first["msg"])
+        return valid
+
+    def _row(self, record: BaseModel) -> dict:
+        row = record.model_dump(exclude={"id", "project_id", "step_id", "lineage_id"})
+        row["created_at"] = row["created_at"] or self.now
+        row["updated_at"] = row["updated_at"] or row["created_at"]
+        return row
+
+    def _resolve(self, record_no: int, record_type: str, mapping: Dict[int, int], source_id, label: str):
+        if source_id not in mapping:
+            self.error(record_no, record_type, f"Unknown {label} {source_id}")
+            return None
+        return mapping[source_id]
+
+    async def _allocate_id(self, record_type: str) -> int:
+        if self.dry_run:
+            new_id = self.next_ids.get(record_type, -1)
+            self.next_ids[record_type] = new_id - 1
+            return new_id
+        if record_type not in self.next_ids:
+            # 步骤和提示词总是在项目之后写入，此时本事务已持有写锁，max(id) 之后的 ID 段不会被占用
+            model = RECORD_TYPES[record_type][1]
+            self.next_ids[record_type] = (await self.db.scalar(select(func.max(model.id))) or 0) + 1
+        new_id = self.next_ids[record_type]
+        self.next_ids[record_type] = new_id + 1
+        return new_id
+
+    async def _flush(self, record_type: str, batch):
+        valid = self._validate(record_type, batch)
+        model = RECORD_TYPES[record_type][1]
+        rows = []
+
+        if record_type == "project":
+            for record_no, record in valid:
+                row = dict(self._row(record), user_id=self.user_id)
+                if not self.writing:
+                    new_id = -(len(self.project_ids) + 1)
+                else:
+                    new_id = await self.db.scalar(insert(Project.__table__).returning(Project.id), row)
+                self.project_ids[record.id] = new_id
+            self.counts[record_type] += len(valid)
+            return
+
+        if record_type == "step":
+            for record_no, record in valid:
+                project_id = self._resolve(record_no, record_type, self.project_ids, record.project_id, "project")
+                if project_id is None:
+                    continue
+                rows.append((record, dict(self._row(record), project_id=project_id)))
+            for record, row in rows:
+                self.step_ids[record.id] = row["id"] = await self._allocate_id(record_type)
+            rows = [row for _, row in rows]
+        elif record_type == "prompt":
+            for record_no, record in valid:
+                project_id = self._resolve(record_no, record_type, self.project_ids, record.project_id, "project")
+                step_id = None
+                if record.step_id is not None:
+                    step_id = self._resolve(record_no, record_type, self.step_ids, record.step_id, "step")
+                    if step_id is None:
+                        continue
+                if project_id is None:
+                    continue
+                row = dict(self._row(record), project_id=project_id, step_id=step_id)
+                row["id"] = await self._allocate_id(record_type)
+                if record.id is not None:
+                    self.prompt_ids[record.id] = row["id"]
+                # 找不到版本链的根时自成一条链
+                row["lineage_id"] = self.prompt_ids.get(record.lineage_id, row["id"])
+                rows.append(row)
+        else:
+            rows = [dict(self._row(record), user_id=self.user_id) for _, record in valid]
+
+        if rows and self.writing:
+            await self.db.execute(insert(model.__table__), rows)
+        self.counts[record_type] += len(rows)
+
+async def import_records(
+    db: AsyncSession,
+    user_id: int,
+    chunks: AsyncIterator[bytes],
+    import_format: ImportFormat = ImportFormat.AUTO,
+    dry_run: bool = False
+) -> ImportReport:
+    """解析并写入（不提交），返回导入报告；有错误时调用方负责回滚"""
+    started = time.perf_counter()
+    reader = _TextReader(chunks)
+    importer = Importer(db, user_id, dry_run)
+    try:
+        if import_format == ImportFormat.AUTO:
+            import_format = await detect_format(reader)
+        records = ndjson_records(reader) if import_format == ImportFormat.NDJSON else script_records(reader)
+        async for record_no, record_type, data in records:
+            await importer.add(record_no, record_type, data)
+            if len(importer.errors) >= MAX_ERRORS:
+                break
+        await importer.flush()
+    except ImportParseError as exc:
+        importer.error(0, "parse", str(exc))
+    except UnicodeDecodeError:
+        importer.error(0, "parse", "Import body must be UTF-8")
+
+    elapsed = time.perf_counter() - started
+    rows = sum(importer.counts.values())
+    return ImportReport(
+        format=import_format,
+        dry_run=dry_run,
+        counts=importer.counts,
+        rows=rows,
+        elapsed=round(elapsed, 4),
+        rows_per_second=round(rows / elapsed, 1) if elapsed else 0.0,
+        errors=importer.errors
+    )
@@ -0,0 +1,33 @@
+"""笔记摘要
+
+列表默认只返回摘要：excerpt 由触发器在写入 content 时生成（换行和制表符替换为空格，截取前 NOTE_EXCERPT_LENGTH 个字符），
+所有写入路径（接口、批量、导入）都无需额外处理，列表查询也不必读取完整正文。
+"""
+from sqlalchemy.engine import Connection
+
+# 写在触发器定义中：已有数据库上的触发器不会重建，修改长度需要新的迁移删除并重建触发器
+NOTE_EXCERPT_LENGTH = 200
+
+def excerpt_sql(content: str) -> str:
+    flattened = f"trim(replace(replace(replace({content}, char(13), ' '), char(10), ' '), char(9), ' '))"
+    return (
+        f"CASE WHEN length({flattened}) > {NOTE_EXCERPT_LENGTH} "
+        f"THEN substr({flattened}, 1, {NOTE_EXCERPT_LENGTH}) || '…' ELSE {flattened} END"
+    )
+
+EXCERPT_TRIGGERS = {
+    "notes_excerpt_ai": (
+        "CREATE TRIGGER IF NOT EXISTS notes_excerpt_ai AFTER INSERT ON notes "
+        f"BEGIN UPDATE notes SET excerpt = {excerpt_sql('new.content')} WHERE id = new.id; END"
+    ),
+    "notes_excerpt_au": (
+        "CREATE TRIGGER IF NOT EXISTS notes_excerpt_au AFTER UPDATE OF content ON notes "
+        f"BEGIN UPDATE notes SET excerpt = {excerpt_sql('new.content')} WHERE id = new.id; END"
+    ),
+}
+
+def ensure_note_excerpts(conn: Connection):
+    """创建生成摘要的触发器，并为已有笔记回填摘要"""
+    for statement in EXCERPT_TRIGGERS.values():
+        conn.exec_driver_sql(statement)
+    conn.exec_driver_sql(f"UPDATE notes SET excerpt = {excerpt_sql('content')} WHERE excerpt IS NULL")
@@ -0,0 +1,156 @@
+"""步骤和提示词的稀疏排序键
+
+order 之间留出 ORDER_GAP 的间隔：追加时取最大值 + ORDER_GAP（见 sequences），移动时取锚点与其相邻键的中点，
+一次插入或移动只写一行（提示词以版本链为单位排序，同一链的各版本共用 order，一条 UPDATE 一起改）。
+相邻键之间已没有整数可取时，在当前事务内重排整个列表再取中点；取到的键离相邻键小于 REBALANCE_MIN_GAP 时，
+由调用方安排后台重排，使后续移动仍只写一行。
+order 只用于排序，不等于位置；批量重排接口仍接受从 1 开始的位置，写入前换算为稀疏键（见 reorder）。
+"""
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, update, func, bindparam
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..models.project_step import ProjectStep
+from ..models.project_prompt import ProjectPrompt
+from .sequences import advance_to, ORDER_GAP
+
+REBALANCE_MIN_GAP = int(os.getenv("ORDER_REBALANCE_MIN_GAP", "16"))
+
+@dataclass(frozen=True)
+class OrderedList:
+    model: type
+    scope: Tuple[str, ...]   # 决定列表范围的列
+    unit: str                # 排序单位：步骤为 id，提示词为 lineage_id
+    sequence: str            # 追加时使用的序号范围
+
+    @property
+    def order_column(self):
+        return self.model.order
+
+    @property
+    def unit_column(self):
+        return getattr(self.model, self.unit)
+
+    def where(self, scope: dict):
+        # 提示词可以不属于任何步骤，step_id 为空时用 IS 比较
+        return [getattr(self.model, name).is_not_distinct_from(scope[name]) for name in self.scope]
+
+ORDERED_LISTS = {
+    "step": OrderedList(ProjectStep, ("project_id",), "id", "step_order"),
+    "prompt": OrderedList(ProjectPrompt, ("project_id", "step_id"), "lineage_id", "prompt_order"),
+}
+
+def key_between(low: Optional[int], high: Optional[int]) -> Optional[int]:
+    """取 low 与 high 之间的键；一侧为空时向外延伸 ORDER_GAP，没有可用整数时返回 None"""
+    if low is None and high is None:
+        return ORDER_GAP
+    if low is None:
+        return high - ORDER_GAP
+    if high is None:
+        return low + ORDER_GAP
+    if high - low < 2:
+        return None
+    return (low + high) // 2
+
+def _units(spec: OrderedList, scope: Optional[dict] = None):
+    """按当前顺序列出排序单位；空 order 排在最后，顺序相同时按 ID"""
+    first_order = func.min(spec.order_column)
+    scope_columns = [getattr(spec.model, name) for name in spec.scope]
+    query = select(*scope_columns, spec.unit_column).group_by(*scope_columns, spec.unit_column)
+    if scope is not None:
+        query = query.filter(*spec.where(scope))
+    return query.order_by(*scope_columns, first_order.is_(None), first_order, func.min(spec.model.id))
+
+def _renumber(spec: OrderedList, rows) -> list:
+    params = []
+    previous_scope, position = None, 0
+    for row in rows:
+        scope, unit_value = tuple(row[:-1]), row[-1]
+        position = position + 1 if scope == previous_scope else 1
+        previous_scope = scope
+        params.append({"_unit": unit_value, "_order": position * ORDER_GAP})
+    return params
+
+def _renumber_statement(spec: OrderedList):
+    return update(spec.model.__table__).where(
+        spec.unit_column == bindparam("_unit")
+    ).values(order=bindparam("_order"))
+
+async def rebalance(db: AsyncSession, spec: OrderedList, scope: dict) -> int:
+    """把列表的键重新等距分布，返回排序单位数"""
+    params = _renumber(spec, (await db.execute(_units(spec, scope))).all())
+    if params:
+        await db.execute(_renumber_statement(spec), params)
+        await advance_to(db, spec.sequence, len(params) * ORDER_GAP, **scope)
+    return len(params)
+
+async def reorder(db: AsyncSession, spec: OrderedList, scope: dict, positions: Dict[int, int]) -> int:
+    """按客户端给出的位置批量重排（未提交），返回改写的排序单位数
+
+    positions 为 {排序单位: 位置}，位置从 1 开始。未列出的单位保留当前位置，位置相同时列出的单位在前；
+    结果重新编号为等距的稀疏键，只写键有变化的单位。
+    """
+    first_order = func.min(spec.order_column)
+    rows = (await db.execute(select(spec.unit_column, first_order).filter(*spec.where(scope)).group_by(
+        spec.unit_column
+    ).order_by(first_order.is_(None), first_order, func.min(spec.model.id)))).all()
+    ranked = sorted(
+        (positions.get(unit_value, rank), unit_value not in positions, rank, unit_value, order)
+        for rank, (unit_value, order) in enumerate(rows, 1)
+    )
+    params = [
+        {"_unit": unit_value, "_order": position * ORDER_GAP}
+        for position, (*_, unit_value, order) in enumerate(ranked, 1) if order != position * ORDER_GAP
+    ]
+    if params:
+        await db.execute(_renumber_statement(spec), params)
+        await advance_to(db, spec.sequence, len(rows) * ORDER_GAP, **scope)
+    return len(params)
+
+async def rebalance_later(session_factory: async_sessionmaker, kind: str, scope: dict):
+    """后台任务：在独立会话中重排列表"""
+    async with session_factory() as db:
+        await rebalance(db, ORDERED_LISTS[kind], scope)
+        await db.commit()
+
+def spread_orders(conn: Connection):
+    """迁移：把旧数据中连续的 order 改为稀疏键"""
+    for spec in ORDERED_LISTS.values():
+        params = _renumber(spec, conn.execute(_units(spec)).all())
+        if params:
+            conn.execute(_renumber_statement(spec), params)
+
+async def _order_of(db: AsyncSession, spec: OrderedList, unit_value: int) -> Optional[int]:
+    return await db.scalar(select(func.min(spec.order_column)).filter(spec.unit_column == unit_value))
+
+async def move(
+    db: AsyncSession, spec: OrderedList, scope: dict, unit_value: int, anchor: int, before: bool
+) -> Tuple[int, bool]:
+    """把排序单位移到锚点之前或之后（未提交），返回 (新键, 是否需要后台重排)"""
+    for attempt in range(2):
+        anchor_order = await _order_of(db, spec, anchor)
+        if anchor_order is not None:
+            order = spec.order_column
+            neighbor = select(order).filter(*spec.where(scope), spec.unit_column != unit_value)
+            if before:
+                neighbor = neighbor.filter(order < anchor_order).order_by(order.desc())
+            else:
+                neighbor = neighbor.filter(order > anchor_order).order_by(order)
+            neighbor_order = await db.scalar(neighbor.limit(1))
+            low, high = (neighbor_order, anchor_order) if before else (anchor_order, neighbor_order)
+            key = key_between(low, high)
+            if key is not None:
+                break
+        if attempt:
+            raise RuntimeError("No ordering key available after rebalance")
+        # 间隔耗尽（或锚点还没有键）：先在本事务内重排
+        await rebalance(db, spec, scope)
+
+    await db.execute(update(spec.model.__table__).where(spec.unit_column == unit_value).values(order=key))
+    await advance_to(db, spec.sequence, key, **scope)
+    dense = any(bound is not None and abs(key - bound) < REBALANCE_MIN_GAP for bound in (low, high))
+    return key, dense
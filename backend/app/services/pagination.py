@@ -0,0 +1,85 @@
+"""键集（游标）分页
+
+按稳定的排序键 (..., id) 翻页：游标记录上一页最后一行的排序键值，
+下一页通过 WHERE (键) > (游标值) 直接定位，深分页时不需要扫描并丢弃前面的行。
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, and_, or_, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+@dataclass(frozen=True)
+class SortKey:
+    name: str               # 行上的属性名或附加列的 label
+    column: ColumnElement
+    descending: bool = False
+
+    def order_clause(self):
+        return self.column.desc() if self.descending else self.column.asc()
+
+def encode_cursor(scope: str, values: Sequence) -> str:
+    payload = json.dumps({"s": scope, "v": list(values)}, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, scope: str, keys: Sequence[SortKey]) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != scope or len(payload["v"]) != len(keys):
+            raise ValueError("cursor does not match this query")
+        return [_decode_value(key, value) for key, value in zip(keys, payload["v"])]
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Unsupported cursor value: {value!r}")
+
+def _decode_value(key: SortKey, value):
+    if value is not None and isinstance(key.column.type, DateTime):
+        return datetime.fromisoformat(value)
+    return value
+
+def _after(keys: Sequence[SortKey], values: Sequence):
+    """严格位于游标之后的行"""
+    if len({key.descending for key in keys}) == 1:
+        # 方向一致时使用行值比较，SQLite 可以直接利用复合索引
+        columns = tuple_(*(key.column for key in keys))
+        return columns < tuple_(*values) if keys[0].descending else columns > tuple_(*values)
+    clauses = []
+    for i, key in enumerate(keys):
+        prefix = [keys[j].column == values[j] for j in range(i)]
+        prefix.append(key.column < values[i] if key.descending else key.column > values[i])
+        clauses.append(and_(*prefix))
+    return or_(*clauses)
+
+def apply_keyset(query, keys: Sequence[SortKey], scope: str, cursor: Optional[str], page: int, page_size: int):
+    """排序并定位到目标页；多取一行用于判断是否还有下一页"""
+    query = query.order_by(*(key.order_clause() for key in keys))
+    if cursor:
+        query = query.filter(_after(keys, decode_cursor(cursor, scope, keys)))
+    else:
+        query = query.offset((page - 1) * page_size)
+    return query.limit(page_size + 1)
+
+def split_page(rows: List, keys: Sequence[SortKey], scope: str, page_size: int, entities: bool = True):
+    """返回 (当前页实体, next_cursor)；entities=False 时查询的是列，直接返回行"""
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    items = [row[0] for row in rows] if entities else rows
+    if not has_more or not rows:
+        return items, None
+    last = rows[-1]
+    mapping = last._mapping
+    values = [
+        mapping[key.name] if key.name in mapping or not entities else getattr(last[0], key.name)
+        for key in keys
+    ]
+    return items, encode_cursor(scope, values)
@@ -0,0 +1,228 @@
+"""项目树（项目 + 有序步骤 + 有序提示词）快照及其缓存
+
+项目详情类读取（项目、步骤列表、步骤的提示词、整棵树）都由同一份快照提供。快照按项目 ID 缓存在进程内，
+以元组按字段顺序存放各行（字段顺序见 FIELDSETS），包含全部版本且正文已还原，总大小受 PROJECT_CACHE_BYTES 约束（LRU 淘汰）。
+
+写接口在提交后调用 project_cache.invalidate 立即释放对应快照；另外每次命中都用一条查询核对
+collection_versions 中项目、步骤和各步骤提示词的版本号（见 etags），
+批量接口、导入、后台重排或其他进程写入后也不会读到旧数据。这条查询同时按用户 ID 限定范围，命中时不再做所有权查询。
+"""
+import os
+import sys
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.project import Project
+from ..models.project_step import ProjectStep
+from ..models.project_prompt import ProjectPrompt
+from ..schemas.project import ProjectTreeStep, ProjectTreePrompt
+from .fieldsets import FIELDSETS
+from .etags import scope_key
+from .prompt_history import resolve_contents
+
+PROJECT_CACHE_BYTES = int(os.getenv("PROJECT_CACHE_BYTES", str(32 * 2**20)))
+PROMPT_BODY_FIELDS = ("content", "response")
+
+PROJECT_FIELDS = FIELDSETS["projects"].allowed
+STEP_FIELDS = FIELDSETS["steps"].allowed
+PROMPT_FIELDS = FIELDSETS["prompts"].allowed
+STEP_SLOTS = {name: index for index, name in enumerate(STEP_FIELDS)}
+PROMPT_SLOTS = {name: index for index, name in enumerate(PROMPT_FIELDS)}
+TREE_STEP_FIELDS = tuple(name for name in ProjectTreeStep.model_fields if name != "prompts")
+TREE_PROMPT_FIELDS = tuple(ProjectTreePrompt.model_fields)
+
+Row = Tuple
+
+# 项目行、步骤行和这些步骤下提示词所在范围的版本号，按范围排序拼接；
+# 任一范围有写入或步骤增减都会改变结果（用求和会在删除步骤时与其他范围的递增相互抵消）
+STAMP_SQL = text(
+    "SELECT coalesce(group_concat(scope || '=' || version, ','), '') FROM ("
+    "SELECT scope, version FROM collection_versions "
+    "WHERE scope IN (:project_scope, :steps_scope) "
+    "OR scope IN (SELECT :prompts_prefix || id FROM project_steps WHERE project_id = :project_id) "
+    "ORDER BY scope)"
+)
+
+async def current_stamp(db: AsyncSession, project_id: int, user_id: int) -> str:
+    return await db.scalar(STAMP_SQL, {
+        "project_scope": scope_key("project", user_id, project_id),
+        "steps_scope": scope_key("steps", user_id, project_id),
+        "prompts_prefix": scope_key("prompts", user_id, ""),
+        "project_id": project_id,
+    })
+
+def _sizeof(value) -> int:
+    """快照占用的近似字节数"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(_sizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(_sizeof(key) + _sizeof(item) for key, item in value.items())
+    return size
+
+def _pick(row: Row, names: Iterable[str], slots: Dict[str, int]) -> dict:
+    return {name: row[slots[name]] for name in names}
+
+class ProjectSnapshot:
+    __slots__ = ("project_id", "user_id", "stamp", "project", "steps", "prompts", "size")
+
+    def __init__(self, project_id: int, user_id: int, stamp: str, project: Row,
+                 steps: Tuple[Row, ...], prompts: Dict[int, Tuple[Row, ...]]):
+        self.project_id = project_id
+        self.user_id = user_id
+        self.stamp = stamp
+        self.project = project        # PROJECT_FIELDS 顺序
+        self.steps = steps            # 按顺序排列，STEP_FIELDS 顺序
+        self.prompts = prompts        # 步骤 ID → 按顺序、版本倒序排列的提示词，PROMPT_FIELDS 顺序
+        self.size = _sizeof(project) + _sizeof(steps) + _sizeof(prompts)
+
+    def has_step(self, step_id: int) -> bool:
+        return any(step[STEP_SLOTS["id"]] == step_id for step in self.steps)
+
+    def project_item(self) -> dict:
+        return dict(zip(PROJECT_FIELDS, self.project))
+
+    def step_items(self, names: Iterable[str] = STEP_FIELDS) -> list:
+        return [_pick(step, names, STEP_SLOTS) for step in self.steps]
+
+    def prompt_items(self, step_id: int, names: Iterable[str] = PROMPT_FIELDS, latest_only: bool = False) -> list:
+        latest = PROMPT_SLOTS["is_latest"]
+        return [
+            _pick(prompt, names, PROMPT_SLOTS)
+            for prompt in self.prompts.get(step_id, ()) if prompt[latest] or not latest_only
+        ]
+
+    def tree(self, include_bodies: bool = True, include_history: bool = False) -> dict:
+        """与 ProjectTree 一致的字典；include_bodies=False 时正文和 AI 响应为空"""
+        steps = []
+        for step in self.steps:
+            prompts = self.prompt_items(step[STEP_SLOTS["id"]], TREE_PROMPT_FIELDS, latest_only=not include_history)
+            if not include_bodies:
+                for prompt in prompts:
+                    prompt.update(dict.fromkeys(PROMPT_BODY_FIELDS))
+            steps.append({**_pick(step, TREE_STEP_FIELDS, STEP_SLOTS), "prompts": prompts})
+        return {**self.project_item(), "steps": steps}
+
+def _step_sort_key(step: Row):
+    order = step[STEP_SLOTS["order"]]
+    return (order is None, order or 0, step[STEP_SLOTS["id"]])
+
+def _prompt_sort_key(prompt: Row):
+    # 与 /project_prompts/step/{id} 一致：先按顺序，再按版本倒序
+    order, version = prompt[PROMPT_SLOTS["order"]], prompt[PROMPT_SLOTS["version"]]
+    return (order is None, order or 0, -(version or 0), prompt[PROMPT_SLOTS["id"]])
+
+async def load_snapshot(db: AsyncSession, project_id: int, user_id: int) -> Optional[ProjectSnapshot]:
+    """读取项目树快照；项目不存在或不属于该用户时返回 None
+
+    版本号在读取数据之前获取：期间发生的写入只会让快照的版本号偏旧，下次读取时重新加载。
+    """
+    stamp = await current_stamp(db, project_id, user_id)
+    project = (await db.execute(FIELDSETS["projects"].project(
+        select(Project).filter(Project.id == project_id, Project.user_id == user_id), PROJECT_FIELDS
+    ))).first()
+    if project is None:
+        return None
+    steps = (await db.execute(FIELDSETS["steps"].project(
+        select(ProjectStep).filter(ProjectStep.project_id == project_id), STEP_FIELDS
+    ))).all()
+    rows = (await db.execute(FIELDSETS["prompts"].project(
+        select(ProjectPrompt).filter(
+            ProjectPrompt.step_id.in_(select(ProjectStep.id).filter(ProjectStep.project_id == project_id))
+        ), PROMPT_FIELDS
+    ))).all()
+    contents = await resolve_contents(db, rows)
+
+    content = PROMPT_SLOTS["content"]
+    prompts: Dict[int, list] = {}
+    for row in rows:
+        prompt = tuple(row[:len(PROMPT_FIELDS)])
+        if row.id in contents:
+            prompt = prompt[:content] + (contents[row.id],) + prompt[content + 1:]
+        prompts.setdefault(row.step_id, []).append(prompt)
+    return ProjectSnapshot(
+        project_id, user_id, stamp, tuple(project[:len(PROJECT_FIELDS)]),
+        tuple(sorted((tuple(step[:len(STEP_FIELDS)]) for step in steps), key=_step_sort_key)),
+        {step_id: tuple(sorted(items, key=_prompt_sort_key)) for step_id, items in prompts.items()},
+    )
+
+class ProjectTreeCache:
+    """按项目 ID 缓存项目树快照（LRU，按字节预算淘汰）"""
+
+    def __init__(self, max_bytes: int = PROJECT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, ProjectSnapshot]" = OrderedDict()
+        self._step_projects: Dict[int, int] = {}   # 步骤 ID → 项目 ID，供按步骤读取时定位快照
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get(self, db: AsyncSession, project_id: int, user_id: int) -> Optional[ProjectSnapshot]:
+        snapshot = self._entries.get(project_id)
+        if snapshot is not None and snapshot.user_id == user_id:
+            if await current_stamp(db, project_id, user_id) == snapshot.stamp:
+                self.hits += 1
+                self._entries.move_to_end(project_id)
+                return snapshot
+            self.stale += 1
+            self._remove(project_id)
+        self.misses += 1
+        snapshot = await load_snapshot(db, project_id, user_id)
+        if snapshot is not None:
+            self.put(snapshot)
+        return snapshot
+
+    def project_of_step(self, step_id: int) -> Optional[int]:
+        return self._step_projects.get(step_id)
+
+    def forget_step(self, step_id: int, project_id: int):
+        """丢弃过期的步骤映射（步骤已删除或 ID 被复用）"""
+        if self._step_projects.get(step_id) == project_id:
+            del self._step_projects[step_id]
+
+    def put(self, snapshot: ProjectSnapshot):
+        if snapshot.size > self.max_bytes:
+            return
+        self._remove(snapshot.project_id)
+        while self._entries and self.bytes + snapshot.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        self._entries[snapshot.project_id] = snapshot
+        self.bytes += snapshot.size
+        for step in snapshot.steps:
+            self._step_projects[step[STEP_SLOTS["id"]]] = snapshot.project_id
+
+    def invalidate(self, *project_ids: Optional[int]):
+        for project_id in project_ids:
+            if project_id in self._entries:
+                self._remove(project_id)
+                self.invalidations += 1
+
+    def _remove(self, project_id: int):
+        snapshot = self._entries.pop(project_id, None)
+        if snapshot is None:
+            return
+        self.bytes -= snapshot.size
+        for step in snapshot.steps:
+            self._step_projects.pop(step[STEP_SLOTS["id"]], None)
+
+    def clear(self):
+        self._entries.clear()
+        self._step_projects.clear()
+        self.bytes = 0
+        self.hits = self.misses = self.stale = self.evictions = self.invalidations = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes,
+            "hits": self.hits, "misses": self.misses, "stale": self.stale,
+            "evictions": self.evictions, "invalidations": self.invalidations,
+        }
+
+project_cache = ProjectTreeCache()
@@ -0,0 +1,235 @@
+"""提示词版本历史的差量存储
+
+新版本的 content 存为相对其来源版本的按行差量（zlib 压缩），每 CHECKPOINT_INTERVAL 层
+或差量不划算时存完整内容作为检查点。读取时沿 delta_base_id 链回溯到检查点再逐层还原，
+还原结果放进 LRU 缓存；提示词内容被修改或删除前需要先调用 detach_dependents。
+"""
+import difflib
+import json
+import os
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..models.project_prompt import ProjectPrompt
+
+CHECKPOINT_INTERVAL = int(os.getenv("PROMPT_CHECKPOINT_INTERVAL", "16"))
+MATERIALIZED_CACHE_SIZE = int(os.getenv("PROMPT_MATERIALIZED_CACHE_SIZE", "2048"))
+
+def encode_delta(base: str, target: str) -> bytes:
+    """按行比较：整数对 [i, j] 表示复制 base 的第 i..j 行，字符串表示插入的文本"""
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(target_lines[j1:j2]))
+    return zlib.compress(json.dumps(ops, ensure_ascii=False, separators=(",", ":")).encode())
+
+def apply_delta(base: str, delta: bytes) -> str:
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(zlib.decompress(delta)):
+        parts.append("".join(base_lines[op[0]:op[1]]) if isinstance(op, list) else op)
+    return "".join(parts)
+
+class MaterializedCache:
+    """已还原版本内容的 LRU 缓存
+
+    键为 (提示词 ID, 差量哈希)：SQLite 会复用被删除的最大 ID，带上差量哈希后旧条目不会被新行命中。
+    """
+
+    def __init__(self, maxsize: int = MATERIALIZED_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[int, int], str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, prompt_id: int, delta: bytes) -> Optional[str]:
+        key = (prompt_id, hash(delta))
+        content = self._entries.get(key)
+        if content is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return content
+
+    def put(self, prompt_id: int, delta: bytes, content: str):
+        if self.maxsize <= 0:
+            return
+        key = (prompt_id, hash(delta))
+        self._entries[key] = content
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+materialized_cache = MaterializedCache()
+
+async def resolve_contents(db: AsyncSession, rows: Iterable) -> Dict[int, Optional[str]]:
+    """还原一批提示词的内容，返回 {id: content}
+
+    rows 为带 id/content/content_delta/delta_base_id 属性的对象（ORM 实例或查询行）。
+    缓存未命中的差量版本按层批量查询其基础版本，查询次数不超过检查点间隔。
+    """
+    known = {}
+    for row in rows:
+        known[row.id] = (row.content, row.content_delta, row.delta_base_id)
+    resolved: Dict[int, Optional[str]] = {}
+
+    def cached(prompt_id: int) -> Optional[str]:
+        content, delta, base_id = known[prompt_id]
+        if prompt_id not in resolved and delta is not None:
+            hit = materialized_cache.get(prompt_id, delta)
+            if hit is not None:
+                resolved[prompt_id] = hit
+        return resolved.get(prompt_id)
+
+    def lookup(prompt_id: int) -> Optional[str]:
+        # 沿链回溯到完整内容或缓存，再逐层应用差量
+        chain = []
+        current = prompt_id
+        while True:
+            if current in resolved or cached(current) is not None:
+                content = resolved[current]
+                break
+            content, delta, base_id = known[current]
+            if delta is None:
+                break
+            chain.append((current, delta))
+            current = base_id
+        for chain_id, delta in reversed(chain):
+            content = apply_delta(content or "", delta)
+            materialized_cache.put(chain_id, delta, content)
+            resolved[chain_id] = content
+        return content
+
+    checked = set()
+    while True:
+        missing = set()
+        for prompt_id in set(known) - checked:
+            checked.add(prompt_id)
+            content, delta, base_id = known[prompt_id]
+            if delta is not None and cached(prompt_id) is None and base_id not in known:
+                missing.add(base_id)
+        if not missing:
+            break
+        for row in (await db.execute(
+            select(ProjectPrompt.id, ProjectPrompt.content, ProjectPrompt.content_delta, ProjectPrompt.delta_base_id)
+            .filter(ProjectPrompt.id.in_(missing))
+        )).all():
+            known[row.id] = (row.content, row.content_delta, row.delta_base_id)
+        for base_id in missing - set(known):
+            known[base_id] = (None, None, None)  # 基础版本已丢失
+
+    return {row_id: lookup(row_id) for row_id in list(known)}
+
+LINEAGE_TRIGGER = (
+    "CREATE TRIGGER IF NOT EXISTS project_prompts_lineage AFTER INSERT ON project_prompts "
+    "WHEN new.lineage_id IS NULL "
+    "BEGIN UPDATE project_prompts SET lineage_id = new.id WHERE id = new.id; END"
+)
+
+def _guess_lineages(rows) -> dict:
+    """旧数据把同一 (project_id, step_id) 下的提示词都当作版本。
+    version 为 1 的是新版本链；更高版本归入此前同标题的最近一条链，没有同标题时归入最近一条链。"""
+    roots = {}
+    lineages = {}
+    for prompt_id, project_id, step_id, title, version in rows:
+        family = roots.setdefault((project_id, step_id), [])
+        if not family or not version or version <= 1:
+            family.append((prompt_id, title))
+            lineages[prompt_id] = prompt_id
+            continue
+        same_title = [root_id for root_id, root_title in family if root_title == title]
+        lineages[prompt_id] = same_title[-1] if same_title else family[-1][0]
+    return lineages
+
+def ensure_lineage(conn: Connection):
+    """创建补齐 lineage_id 的触发器，并回填旧数据的版本链和 is_latest"""
+    conn.exec_driver_sql(LINEAGE_TRIGGER)
+    rows = conn.exec_driver_sql(
+        "SELECT id, project_id, step_id, title, version FROM project_prompts "
+        "WHERE lineage_id IS NULL ORDER BY id"
+    ).all()
+    if not rows:
+        return
+    lineages = _guess_lineages(rows)
+    conn.exec_driver_sql(
+        "UPDATE project_prompts SET lineage_id = ? WHERE id = ?",
+        [(lineage_id, prompt_id) for prompt_id, lineage_id in lineages.items()]
+    )
+    conn.exec_driver_sql(
+        "UPDATE project_prompts SET is_latest = (id = ("
+        "SELECT p.id FROM project_prompts p WHERE p.lineage_id = project_prompts.lineage_id "
+        "ORDER BY p.version DESC, p.id DESC LIMIT 1))"
+    )
+
+async def load_contents(db: AsyncSession, prompts: Iterable[ProjectPrompt]):
+    """为差量存储的 ORM 实例填充 content（不标记为已修改）"""
+    pending = [p for p in prompts if p.content is None and p.content_delta is not None]
+    if not pending:
+        return
+    contents = await resolve_contents(db, pending)
+    for prompt in pending:
+        set_committed_value(prompt, "content", contents[prompt.id])
+
+async def store_version(db: AsyncSession, prompt: ProjectPrompt, base: ProjectPrompt, content: str):
+    """把新版本的内容写为相对 base 的差量；层数达到检查点间隔或差量不划算时存完整内容"""
+    depth = (base.delta_depth or 0) + 1
+    base_content = base.content
+    if base_content is None:
+        base_content = (await resolve_contents(db, [base]))[base.id]
+    if content and depth < CHECKPOINT_INTERVAL and base_content is not None:
+        delta = encode_delta(base_content, content)
+        if len(delta) < len(content.encode()) // 2:
+            prompt.content = None
+            prompt.content_delta = delta
+            prompt.delta_base_id = base.id
+            prompt.delta_depth = depth
+            return
+    prompt.content = content
+    prompt.content_delta = None
+    prompt.delta_base_id = None
+    prompt.delta_depth = 0
+
+async def detach_dependents(db: AsyncSession, prompt_ids: Iterable[int]):
+    """修改或删除提示词内容前，把以它为基础的版本改存为完整内容"""
+    prompt_ids = list(prompt_ids)
+    if not prompt_ids:
+        return
+    dependents = (await db.execute(
+        select(ProjectPrompt.id, ProjectPrompt.content, ProjectPrompt.content_delta, ProjectPrompt.delta_base_id)
+        .filter(ProjectPrompt.delta_base_id.in_(prompt_ids))
+    )).all()
+    if dependents:
+        contents = await resolve_contents(db, dependents)
+        for dependent in dependents:
+            await db.execute(
+                update(ProjectPrompt.__table__).where(ProjectPrompt.id == dependent.id).values(
+                    content=contents[dependent.id], content_delta=None, delta_base_id=None, delta_depth=0
+                )
+            )
+
+async def promote_latest(db: AsyncSession, lineage_id: int):
+    """删除最新版本后，把版本链中剩余的最高版本标记为最新"""
+    await db.flush()
+    latest = select(ProjectPrompt.id).filter(
+        ProjectPrompt.lineage_id == lineage_id
+    ).order_by(ProjectPrompt.version.desc()).limit(1).scalar_subquery()
+    await db.execute(update(ProjectPrompt.__table__).where(ProjectPrompt.id == latest).values(is_latest=True))
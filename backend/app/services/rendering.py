@@ -0,0 +1,97 @@
+"""提示词模板渲染
+
+占位符写作 {{name}}（括号内两侧可有空白）。模板按版本编译一次：文本中的花括号转义后，
+每个占位符替换为一个位置参数，得到 str.format 的格式串，渲染时只需按顺序取值再调用一次 format。
+编译结果放进 LRU 缓存，键为 (提示词 ID, 内容哈希)，与 prompt_history 的缓存一样不会被复用 ID 的新行命中。
+
+取值顺序为：渲染时传入的变量 → 提示词自身的 variables → 保留占位符原文（strict 时报错）。
+"""
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TEMPLATE_CACHE_SIZE = int(os.getenv("PROMPT_TEMPLATE_CACHE_SIZE", "1024"))
+MAX_RENDER_ROWS = int(os.getenv("PROMPT_MAX_RENDER_ROWS", "10000"))
+
+PLACEHOLDER = re.compile(r"\{\{\s*([^{}]+?)\s*\}\}")
+
+class MissingVariables(ValueError):
+    def __init__(self, names: Iterable[str], row: Optional[int] = None):
+        self.names = sorted(names)
+        self.row = row
+        where = f"Row {row}: " if row is not None else ""
+        super().__init__(f"{where}missing variables: {', '.join(self.names)}")
+
+class CompiledTemplate:
+    __slots__ = ("format", "slots", "names")
+
+    def __init__(self, content: str):
+        parts = []
+        slots: List[Tuple[str, str]] = []   # 每个占位符的 (变量名, 原文)
+        position = 0
+        for match in PLACEHOLDER.finditer(content):
+            parts.append(content[position:match.start()].replace("{", "{{").replace("}", "}}"))
+            parts.append("{%d}" % len(slots))
+            slots.append((match.group(1), match.group(0)))
+            position = match.end()
+        parts.append(content[position:].replace("{", "{{").replace("}", "}}"))
+        self.format = "".join(parts)
+        self.slots = tuple(slots)
+        self.names = frozenset(name for name, _ in slots)
+
+    def render_many(self, rows: Iterable[Dict[str, str]], defaults: Optional[Dict[str, str]] = None,
+                    strict: bool = False) -> List[str]:
+        """按同一模板渲染多组变量；strict 时缺少变量抛出 MissingVariables"""
+        defaults = defaults or {}
+        # 每个占位符的后备值只算一次，逐行只需查本行变量
+        fallbacks = tuple((name, defaults.get(name, raw)) for name, raw in self.slots)
+        required = self.names - defaults.keys() if strict else frozenset()
+        render = self.format.format
+        results = []
+        for index, row in enumerate(rows):
+            if required and not required <= row.keys():
+                raise MissingVariables(required - row.keys(), index)
+            get = row.get
+            results.append(render(*[get(name, fallback) for name, fallback in fallbacks]))
+        return results
+
+    def render(self, values: Dict[str, str], defaults: Optional[Dict[str, str]] = None,
+               strict: bool = False) -> str:
+        try:
+            return self.render_many([values], defaults, strict)[0]
+        except MissingVariables as error:
+            raise MissingVariables(error.names) from None
+
+class TemplateCache:
+    """已编译模板的 LRU 缓存"""
+
+    def __init__(self, maxsize: int = TEMPLATE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[int, int], CompiledTemplate]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, prompt_id: int, content: str) -> CompiledTemplate:
+        key = (prompt_id, hash(content))
+        template = self._entries.get(key)
+        if template is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return template
+        self.misses += 1
+        template = CompiledTemplate(content)
+        if self.maxsize > 0:
+            self._entries[key] = template
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return template
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+template_cache = TemplateCache()
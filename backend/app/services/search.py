@@ -0,0 +1,131 @@
+"""基于 SQLite FTS5 的全文检索
+
+每个实体对应一张 external content 的 FTS5 表（trigram 分词，支持中文子串匹配），
+由触发器在写入时同步维护。查询词少于 3 个字符时 trigram 无法匹配，退回 LIKE。
+"""
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+from sqlalchemy import Float, Integer, String, or_, text
+from sqlalchemy.engine import Connection
+
+from ..models.task import Task
+from ..models.note import Note
+from ..models.tool import Tool
+from ..models.project import Project
+
+MIN_TRIGRAM_LENGTH = 3
+
+@dataclass(frozen=True)
+class SearchIndex:
+    name: str                  # 实体类型，也是内容表名
+    model: type
+    columns: Tuple[str, ...]   # 参与检索的列
+    title_column: str
+
+    @property
+    def fts_table(self) -> str:
+        return f"{self.name}_fts"
+
+SEARCH_INDEXES = {
+    "tasks": SearchIndex("tasks", Task, ("title", "description"), "title"),
+    "notes": SearchIndex("notes", Note, ("title", "content"), "title"),
+    "tools": SearchIndex("tools", Tool, ("name", "description"), "name"),
+    "projects": SearchIndex("projects", Project, ("name", "description"), "name"),
+}
+
+def _ddl(index: SearchIndex) -> list:
+    fts = index.fts_table
+    cols = ", ".join(index.columns)
+    new_values = ", ".join(f"new.{c}" for c in index.columns)
+    old_values = ", ".join(f"old.{c}" for c in index.columns)
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, {cols}, user_id) "
+        f"VALUES ('delete', old.id, {old_values}, old.user_id);"
+    )
+    insert_new = (
+        f"INSERT INTO {fts}(rowid, {cols}, user_id) "
+        f"VALUES (new.id, {new_values}, new.user_id);"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, user_id UNINDEXED, content='{index.name}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {index.name} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {index.name} BEGIN {delete_old} END",
+        # 只有检索列或归属变化时才重建索引条目
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols}, user_id ON {index.name} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+def _search_objects(index: SearchIndex) -> set:
+    fts = index.fts_table
+    return {fts, f"{fts}_ai", f"{fts}_ad", f"{fts}_au"}
+
+def ensure_search_indexes(conn: Connection):
+    """创建缺失的 FTS 表和触发器；有新建时从内容表重建索引"""
+    existing = set(conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+    ).scalars())
+    for index in SEARCH_INDEXES.values():
+        if _search_objects(index) <= existing:
+            continue
+        for statement in _ddl(index):
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(f"INSERT INTO {index.fts_table}({index.fts_table}) VALUES ('rebuild')")
+
+def drop_search_indexes(conn: Connection):
+    for index in SEARCH_INDEXES.values():
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {index.fts_table}")
+
+def fts_phrase(term: str) -> str:
+    """把用户输入转为 FTS5 短语，避免语法注入"""
+    return '"' + term.replace('"', '""') + '"'
+
+def can_use_index(term: str) -> bool:
+    return len(term.strip()) >= MIN_TRIGRAM_LENGTH
+
+def match_subquery(index: SearchIndex, user_id: int, term: str, columns: Optional[Sequence[str]] = None):
+    """返回 (id, rank) 子查询；rank 为 bm25，越小越相关"""
+    fts = index.fts_table
+    query = fts_phrase(term.strip())
+    if columns:
+        query = "{" + " ".join(columns) + "} : " + query
+    return text(
+        f"SELECT rowid AS id, bm25({fts}) AS rank FROM {fts} "
+        f"WHERE {fts} MATCH :fts_query AND user_id = :fts_user_id"
+    ).bindparams(fts_query=query, fts_user_id=user_id).columns(id=Integer, rank=Float).subquery()
+
+def apply_search(query, index_name: str, user_id: int, term: str, columns: Optional[Sequence[str]] = None):
+    """为列表查询加上全文检索条件，返回 (query, rank 列或 None)"""
+    index = SEARCH_INDEXES[index_name]
+    model = index.model
+    columns = columns or index.columns
+    if not can_use_index(term):
+        query = query.filter(or_(*(getattr(model, c).ilike(f"%{term}%") for c in columns)))
+        return query, None
+    matches = match_subquery(index, user_id, term, columns)
+    query = query.join(matches, matches.c.id == model.id)
+    return query, matches.c.rank
+
+def hits_statement(index_name: str, user_id: int, term: str, limit: int):
+    """带高亮片段的排序检索结果：(id, title, snippet, rank)"""
+    index = SEARCH_INDEXES[index_name]
+    fts = index.fts_table
+    if not can_use_index(term):
+        like_clause = " OR ".join(f"{c} LIKE :like_term" for c in index.columns)
+        return text(
+            f"SELECT id, {index.title_column} AS title, "
+            f"substr(coalesce({index.columns[-1]}, ''), 1, 64) AS snippet, 0.0 AS rank "
+            f"FROM {index.name} WHERE user_id = :user_id AND ({like_clause}) "
+            f"ORDER BY id DESC LIMIT :limit"
+        ).bindparams(like_term=f"%{term}%", user_id=user_id, limit=limit).columns(
+            id=Integer, title=String, snippet=String, rank=Float
+        )
+    return text(
+        f"SELECT rowid AS id, {index.title_column} AS title, "
+        f"snippet({fts}, -1, '<mark>', '</mark>', '…', 16) AS snippet, bm25({fts}) AS rank "
+        f"FROM {fts} WHERE {fts} MATCH :fts_query AND user_id = :user_id "
+        f"ORDER BY rank LIMIT :limit"
+    ).bindparams(fts_query=fts_phrase(term.strip()), user_id=user_id, limit=limit).columns(
+        id=Integer, title=String, snippet=String, rank=Float
+    )
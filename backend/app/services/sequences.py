@@ -0,0 +1,65 @@
+"""按范围的序号分配
+
+版本号和顺序号保存在 sequence_counters 中，用一条 UPSERT ... RETURNING 原子递增：
+语句本身取得 SQLite 写锁，并发的分配会在 busy_timeout 内排队，不会拿到重复的值。
+某个范围第一次分配时用已有数据的最大值作为起点，因此旧数据、复制或导入的数据无需回填。
+分配在调用方的事务内进行，事务回滚时分配一并撤销。
+顺序号按 ORDER_GAP 递增，给稀疏排序键留出插入空间（见 ordering）。
+"""
+import os
+from dataclasses import dataclass
+from typing import Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+ORDER_GAP = int(os.getenv("ORDER_GAP", "65536"))
+
+@dataclass(frozen=True)
+class SequenceSpec:
+    name: str
+    scope: Tuple[str, ...]   # 决定序号范围的参数
+    seed_sql: str            # 该范围已有的最大值，以 scope 中的参数为绑定参数
+    increment: int = 1
+
+    def key(self, params: dict) -> str:
+        return ":".join("" if params[p] is None else str(params[p]) for p in self.scope)
+
+SEQUENCES = {
+    "lineage_version": SequenceSpec(
+        "lineage_version", ("lineage_id",),
+        "SELECT max(version) FROM project_prompts WHERE lineage_id = :lineage_id"
+    ),
+    "prompt_order": SequenceSpec(
+        "prompt_order", ("project_id", "step_id"),
+        'SELECT max("order") FROM project_prompts WHERE project_id = :project_id AND step_id IS :step_id',
+        ORDER_GAP
+    ),
+    "step_order": SequenceSpec(
+        "step_order", ("project_id",),
+        'SELECT max("order") FROM project_steps WHERE project_id = :project_id',
+        ORDER_GAP
+    ),
+}
+
+def next_value_statement(name: str):
+    spec = SEQUENCES[name]
+    return text(
+        f"INSERT INTO sequence_counters(name, key, value) "
+        f"VALUES (:name, :key, coalesce(({spec.seed_sql}), 0) + {spec.increment}) "
+        f"ON CONFLICT(name, key) DO UPDATE SET value = value + {spec.increment} "
+        f"RETURNING value"
+    )
+
+async def next_value(db: AsyncSession, name: str, **scope) -> int:
+    """分配下一个序号（未提交），例如 next_value(db, "step_order", project_id=1)"""
+    spec = SEQUENCES[name]
+    return await db.scalar(next_value_statement(name), {"name": name, "key": spec.key(scope), **scope})
+
+async def advance_to(db: AsyncSession, name: str, value: int, **scope):
+    """数据被直接改到 value 时（例如移动到末尾），保证之后分配的序号大于它；计数器已更大时不写"""
+    spec = SEQUENCES[name]
+    await db.execute(
+        text("UPDATE sequence_counters SET value = :value WHERE name = :name AND key = :key AND value < :value"),
+        {"name": name, "key": spec.key(scope), "value": value}
+    )
@@ -0,0 +1,63 @@
+"""列表响应的快速序列化
+
+列表接口直接从查询得到的列元组构造响应（数据来自数据库，不再逐条经 Pydantic 校验），
+用 orjson 编码；请求头 Accept 包含 application/msgpack 且安装了 msgpack 时返回 MessagePack。
+两个库都是可选依赖，缺少 orjson 时退回标准库 json。
+"""
+import json
+import os
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+# 设置为 1 时列表响应仍按响应模型逐条校验，用于排查数据问题
+VALIDATE_RESPONSES = os.getenv("RESPONSE_VALIDATION", "0") == "1"
+
+def _default(value: Any):
+    """标准库 json / msgpack 不支持的类型，与 Pydantic 的 JSON 输出保持一致"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPES[0]
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_default, datetime=False)
+
+def wants_msgpack(request: Request) -> bool:
+    accept = request.headers.get("accept", "")
+    return msgpack is not None and any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+def negotiated_response(request: Request, content: Any) -> Response:
+    """按 Accept 选择 MessagePack 或 JSON"""
+    response = MsgPackResponse(content) if wants_msgpack(request) else FastJSONResponse(content)
+    response.headers["Vary"] = "Accept"
+    return response
@@ -0,0 +1,318 @@
+"""提示词近似重复检测（MinHash + LSH）
+
+内容规范化（大小写折叠、空白合并）后取字符 5-gram 作为 shingle，汉字文本不需要分词。
+签名为 NUM_PERM 个 multiply-shift 哈希在各 shingle 上的最小值，两条签名相同位置相等的比例即 Jaccard 相似度的估计；
+一批文本的签名用 numpy 一次算出（NUM_PERM × shingle 数的矩阵按文档 minimum.reduceat）。
+签名按 BANDS 段分桶，任一段完全相同的提示词才作为候选，查询只比较候选，不必与全部提示词逐一比较。
+
+索引按用户保存在进程内。每次使用前读取该用户各步骤提示词范围在 collection_versions 中的版本号（见 etags，
+先比较它们的数量和总和，有变化时再逐个比较），只重新计算版本号变化的步骤：单条接口、批量接口、导入、复制和模板等任何写入都会反映出来。
+未归属步骤的提示词没有版本号，不进入索引。查询结果会回表读取（同时校验所有权），已删除的提示词不会出现在结果中。
+签名计算和重复分组在线程池中进行，不阻塞事件循环；索引的刷新和分组持有该索引的锁，线程中读取时索引不会被修改。
+"""
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+
+from ..models.project import Project
+from ..models.project_prompt import ProjectPrompt
+from .etags import scope_key
+from .prompt_history import resolve_contents
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS          # 每段 4 个哈希：相似度 0.7 时成为候选的概率约 0.99，0.3 时约 0.12
+SIGNATURE_CHUNK = 1 << 14         # 每批 shingle 数，临时矩阵为 NUM_PERM × 8 字节 × 批大小（8 MiB）
+PAIRWISE_LIMIT = 128              # 桶内成员不超过该数时两两比较，否则与桶内第一个比较
+STEP_CHUNK = 500                  # IN 列表的最大长度
+SIMILARITY_MAX_USERS = int(os.getenv("SIMILARITY_MAX_USERS", "64"))
+
+similarity_available = np is not None
+
+if similarity_available:
+    # 固定种子，签名在进程之间可比较
+    _rng = np.random.default_rng(0x5EED)
+    _MULTIPLIERS = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    _OFFSETS = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+    _POWERS = np.uint64(1000003) ** np.arange(SHINGLE_SIZE - 1, -1, -1, dtype=np.uint64)
+
+VERSIONS_SQL = text("SELECT scope, version FROM collection_versions WHERE scope > :low AND scope < :high")
+# 版本号只增不减、范围行不会删除，数量和版本号之和都不变即没有任何写入
+FINGERPRINT_SQL = text(
+    "SELECT count(*) || ':' || total(version) FROM collection_versions WHERE scope > :low AND scope < :high"
+)
+
+def normalize(content: Optional[str]) -> str:
+    return " ".join((content or "").casefold().split())
+
+def _shingle_hashes(normalized: str):
+    """各 shingle 的 64 位哈希（多项式滚动哈希后再做 fmix64 混合）"""
+    codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < SHINGLE_SIZE:
+        hashes = (codes * _POWERS[SHINGLE_SIZE - len(codes):]).sum(keepdims=True)
+    else:
+        hashes = (np.lib.stride_tricks.sliding_window_view(codes, SHINGLE_SIZE) * _POWERS).sum(axis=1)
+    hashes ^= hashes >> np.uint64(33)
+    hashes *= np.uint64(0xFF51AFD7ED558CCD)
+    hashes ^= hashes >> np.uint64(33)
+    return hashes
+
+def compute_signatures(contents: Sequence[Optional[str]]):
+    """返回 (签名矩阵, 下标列表)：规范化后为空的内容没有签名，下标列表给出每行签名对应的 contents 下标"""
+    signatures, positions = [], []
+    batch, starts, size = [], [], 0
+
+    def flush():
+        values = np.multiply(_MULTIPLIERS[:, None], np.concatenate(batch)[None, :])
+        values += _OFFSETS[:, None]
+        # 取高 32 位是单调的，先取最小值再移位
+        signatures.append((np.minimum.reduceat(values, starts, axis=1).T >> np.uint64(32)).astype(np.uint32))
+
+    for position, content in enumerate(contents):
+        normalized = normalize(content)
+        if not normalized:
+            continue
+        hashes = _shingle_hashes(normalized)
+        if batch and size + len(hashes) > SIGNATURE_CHUNK:
+            flush()
+            batch, starts, size = [], [], 0
+        starts.append(size)
+        batch.append(hashes)
+        size += len(hashes)
+        positions.append(position)
+    if batch:
+        flush()
+    if not signatures:
+        return np.empty((0, NUM_PERM), np.uint32), positions
+    return np.concatenate(signatures), positions
+
+def _band_keys(signature) -> List[bytes]:
+    return [signature[band * ROWS:(band + 1) * ROWS].tobytes() for band in range(BANDS)]
+
+class SimilarityIndex:
+    """单个用户的提示词签名和 LSH 分桶"""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.versions: Dict[str, int] = {}          # 已反映到索引中的步骤范围版本号
+        self.fingerprint: Optional[str] = None      # 上述版本号的数量和总和
+        self.signatures = np.empty((0, NUM_PERM), np.uint32)
+        self.slots: Dict[int, int] = {}             # 提示词 ID → 签名行
+        self.free: List[int] = []
+        self.used = 0
+        self.meta: Dict[int, Tuple[int, int, bool]] = {}   # 提示词 ID → (步骤 ID, 版本链 ID, 是否最新)
+        self.by_step: Dict[int, Set[int]] = {}
+        # 每段的桶：大多数桶只有一个提示词，直接存 ID，有多个时才用集合（数十万个集合会拖慢垃圾回收）
+        self.buckets: List[Dict[bytes, Union[int, Set[int]]]] = [{} for _ in range(BANDS)]
+        self.shared: List[Set[bytes]] = [set() for _ in range(BANDS)]   # 各段中有多个提示词的桶
+        self.lock = asyncio.Lock()                  # 刷新和线程池中的分组互斥
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def _slot(self) -> int:
+        if self.free:
+            return self.free.pop()
+        if self.used == len(self.signatures):
+            grown = np.empty((max(64, self.used * 2), NUM_PERM), np.uint32)
+            grown[:self.used] = self.signatures[:self.used]
+            self.signatures = grown
+        self.used += 1
+        return self.used - 1
+
+    def add(self, prompt_id: int, step_id: int, lineage_id: int, is_latest: bool, signature):
+        self.remove(prompt_id)
+        slot = self._slot()
+        self.signatures[slot] = signature
+        self.slots[prompt_id] = slot
+        self.meta[prompt_id] = (step_id, lineage_id, bool(is_latest))
+        self.by_step.setdefault(step_id, set()).add(prompt_id)
+        for buckets, shared, key in zip(self.buckets, self.shared, _band_keys(signature)):
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = prompt_id
+            elif isinstance(bucket, set):
+                bucket.add(prompt_id)
+            else:
+                buckets[key] = {bucket, prompt_id}
+                shared.add(key)
+
+    def remove(self, prompt_id: int):
+        slot = self.slots.pop(prompt_id, None)
+        if slot is None:
+            return
+        for buckets, shared, key in zip(self.buckets, self.shared, _band_keys(self.signatures[slot])):
+            bucket = buckets[key]
+            if not isinstance(bucket, set):
+                del buckets[key]
+                continue
+            bucket.discard(prompt_id)
+            if len(bucket) == 1:
+                buckets[key] = bucket.pop()
+                shared.discard(key)
+        self.free.append(slot)
+        step_id = self.meta.pop(prompt_id)[0]
+        members = self.by_step[step_id]
+        members.discard(prompt_id)
+        if not members:
+            del self.by_step[step_id]
+
+    def drop_step(self, step_id: int):
+        for prompt_id in list(self.by_step.get(step_id, ())):
+            self.remove(prompt_id)
+
+    def signature_of(self, prompt_id: int):
+        slot = self.slots.get(prompt_id)
+        return None if slot is None else self.signatures[slot]
+
+    def _eligible(self, prompt_id: int, include_versions: bool) -> bool:
+        return include_versions or self.meta[prompt_id][2]
+
+    def query(self, signature, exclude_id: Optional[int] = None, lineage_id: Optional[int] = None,
+              threshold: float = 0.7, include_versions: bool = False) -> List[Tuple[int, float]]:
+        """与 signature 估计相似度不低于 threshold 的提示词，按相似度降序；默认跳过同一版本链和非最新版本"""
+        candidates = set()
+        for buckets, key in zip(self.buckets, _band_keys(signature)):
+            bucket = buckets.get(key)
+            if isinstance(bucket, set):
+                candidates.update(bucket)
+            elif bucket is not None:
+                candidates.add(bucket)
+        candidates.discard(exclude_id)
+        ids = [
+            prompt_id for prompt_id in candidates
+            if include_versions or (self.meta[prompt_id][2] and self.meta[prompt_id][1] != lineage_id)
+        ]
+        if not ids:
+            return []
+        scores = (self.signatures[[self.slots[prompt_id] for prompt_id in ids]] == signature).mean(axis=1)
+        return sorted(
+            ((prompt_id, float(score)) for prompt_id, score in zip(ids, scores) if score >= threshold),
+            key=lambda match: (-match[1], match[0])
+        )
+
+    def clusters(self, threshold: float = 0.8, include_versions: bool = False,
+                 min_size: int = 2) -> List[List[Tuple[int, float]]]:
+        """估计相似度不低于 threshold 的提示词连成的组，按组大小降序；组内以 ID 最小者为代表，附与代表的相似度"""
+        parent: Dict[int, int] = {}
+
+        def find(prompt_id: int) -> int:
+            root = parent.setdefault(prompt_id, prompt_id)
+            while root != parent[root]:
+                parent[root] = parent[parent[root]]
+                root = parent[root]
+            return root
+
+        for buckets, shared in zip(self.buckets, self.shared):
+            for key in shared:
+                members = buckets[key]
+                ids = sorted(prompt_id for prompt_id in members if self._eligible(prompt_id, include_versions))
+                if len(ids) < 2 or len({find(prompt_id) for prompt_id in ids}) == 1:
+                    continue
+                signatures = self.signatures[[self.slots[prompt_id] for prompt_id in ids]]
+                if len(ids) <= PAIRWISE_LIMIT:
+                    scores = (signatures[:, None, :] == signatures[None, :, :]).mean(axis=2)
+                    pairs = zip(*np.nonzero(np.triu(scores >= threshold, 1)))
+                else:
+                    scores = (signatures == signatures[0]).mean(axis=1)
+                    pairs = ((0, j) for j in np.nonzero(scores >= threshold)[0] if j)
+                for i, j in pairs:
+                    parent[find(ids[j])] = find(ids[i])
+
+        groups: Dict[int, List[int]] = {}
+        for prompt_id in parent:
+            groups.setdefault(find(prompt_id), []).append(prompt_id)
+        clusters = []
+        for members in groups.values():
+            if len(members) < min_size:
+                continue
+            members.sort()
+            representative = self.signatures[self.slots[members[0]]]
+            scores = (self.signatures[[self.slots[prompt_id] for prompt_id in members]] == representative).mean(axis=1)
+            clusters.append([(prompt_id, float(score)) for prompt_id, score in zip(members, scores)])
+        clusters.sort(key=lambda cluster: (-len(cluster), cluster[0][0]))
+        return clusters
+
+class SimilarityIndexes:
+    """按用户缓存的相似度索引（LRU），取用时按步骤增量刷新"""
+
+    def __init__(self, max_users: int = SIMILARITY_MAX_USERS):
+        self.max_users = max_users
+        self._entries: "OrderedDict[int, SimilarityIndex]" = OrderedDict()
+        self.refreshes = 0        # 有步骤需要重新计算的取用次数
+        self.unchanged = 0        # 无需刷新的取用次数
+        self.signed = 0           # 累计计算签名的提示词数
+        self.evictions = 0
+
+    async def get(self, db: AsyncSession, user_id: int) -> SimilarityIndex:
+        index = self._entries.get(user_id)
+        if index is None:
+            index = self._entries[user_id] = SimilarityIndex(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        self._entries.move_to_end(user_id)
+        async with index.lock:
+            await self._refresh(db, index)
+        return index
+
+    async def _refresh(self, db: AsyncSession, index: SimilarityIndex):
+        # 版本号在读取数据之前获取：期间的写入只会让记录的版本号偏旧，下次取用时重新计算
+        prefix = scope_key("prompts", index.user_id, "")
+        bounds = {"low": prefix, "high": prefix[:-1] + ";"}
+        fingerprint = await db.scalar(FINGERPRINT_SQL, bounds)
+        if fingerprint == index.fingerprint:
+            self.unchanged += 1
+            return
+        current = dict((await db.execute(VERSIONS_SQL, bounds)).all())
+        changed = [scope for scope, version in current.items() if index.versions.get(scope) != version]
+        changed += [scope for scope in index.versions if scope not in current]
+        if not changed:
+            index.fingerprint = fingerprint
+            self.unchanged += 1
+            return
+        self.refreshes += 1
+        step_ids = [int(scope[len(prefix):]) for scope in changed]
+        for step_id in step_ids:
+            index.drop_step(step_id)
+        for start in range(0, len(step_ids), STEP_CHUNK):
+            rows = (await db.execute(select(
+                ProjectPrompt.id, ProjectPrompt.step_id, ProjectPrompt.lineage_id, ProjectPrompt.is_latest,
+                ProjectPrompt.content, ProjectPrompt.content_delta, ProjectPrompt.delta_base_id
+            ).join(Project).filter(
+                ProjectPrompt.step_id.in_(step_ids[start:start + STEP_CHUNK]),
+                Project.user_id == index.user_id
+            ))).all()
+            contents = await resolve_contents(db, rows)
+            signatures, positions = await run_in_threadpool(compute_signatures, [contents[row.id] for row in rows])
+            for signature, position in zip(signatures, positions):
+                row = rows[position]
+                index.add(row.id, row.step_id, row.lineage_id or row.id, row.is_latest, signature)
+            self.signed += len(positions)
+        index.versions = current
+        index.fingerprint = fingerprint
+
+    def clear(self):
+        self._entries.clear()
+        self.refreshes = self.unchanged = self.signed = self.evictions = 0
+
+    def stats(self) -> dict:
+        return {
+            "available": similarity_available, "users": len(self._entries),
+            "prompts": sum(len(index) for index in self._entries.values()),
+            "refreshes": self.refreshes, "unchanged": self.unchanged,
+            "signed": self.signed, "evictions": self.evictions,
+        }
+
+similarity_indexes = SimilarityIndexes()
@@ -0,0 +1,114 @@
+"""异步数据库层并发基准
+
+对比同一批并发请求分别走同步 Session 与 AsyncSession 时的表现：
+- wall: 全部请求完成的总耗时
+- max_in_flight: 同一时刻正在执行的 SQL 数量峰值（>1 说明请求发生了重叠）
+- loop_lag: 事件循环心跳的最大延迟（同步路径会把事件循环整个卡住）
+
+运行方式（在 backend 目录下）：
+    python -m benchmarks.bench_async_db [并发数] [每次查询的递归行数]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+# 模拟一次较重的查询：SQLite 在执行期间会释放 GIL
+HEAVY_SQL = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < :n) "
+    "SELECT count(*) FROM c"
+)
+
+class InFlightCounter:
+    """通过引擎事件统计并发执行中的 SQL 数量"""
+
+    def __init__(self, sync_engine):
+        self.current = 0
+        self.peak = 0
+        event.listen(sync_engine, "before_cursor_execute", self._before)
+        event.listen(sync_engine, "after_cursor_execute", self._after)
+
+    def _before(self, *args):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+
+    def _after(self, *args):
+        self.current -= 1
+
+async def heartbeat(stop: asyncio.Event, interval: float = 0.005):
+    """记录事件循环心跳的最大延迟"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+async def run_sync_path(url: str, concurrency: int, rows: int):
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    counter = InFlightCounter(engine)
+    Session = sessionmaker(bind=engine)
+
+    async def handler():
+        # 与旧路由一致：async def 中直接调用同步 Session
+        with Session() as db:
+            db.execute(HEAVY_SQL, {"n": rows}).scalar()
+
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    stop.set()
+    lag = await beat
+    engine.dispose()
+    return wall, counter.peak, lag
+
+async def run_async_path(url: str, concurrency: int, rows: int):
+    engine = create_async_engine(
+        url.replace("sqlite://", "sqlite+aiosqlite://", 1),
+        connect_args={"check_same_thread": False},
+        pool_size=concurrency
+    )
+    counter = InFlightCounter(engine.sync_engine)
+    Session = async_sessionmaker(bind=engine)
+
+    async def handler():
+        async with Session() as db:
+            (await db.execute(HEAVY_SQL, {"n": rows})).scalar()
+
+    # 预热连接池
+    await asyncio.gather(*(handler() for _ in range(concurrency)))
+    counter.peak = 0
+
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    stop.set()
+    lag = await beat
+    await engine.dispose()
+    return wall, counter.peak, lag
+
+async def main(concurrency: int, rows: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        print(f"concurrency={concurrency} rows_per_query={rows}")
+        for name, runner in (("sync Session", run_sync_path), ("AsyncSession", run_async_path)):
+            wall, peak, lag = await runner(url, concurrency, rows)
+            print(
+                f"{name:>14}: wall={wall * 1000:8.1f}ms  "
+                f"max_in_flight={peak:3d}  loop_lag={lag * 1000:8.1f}ms"
+            )
+
+if __name__ == "__main__":
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 300_000
+    asyncio.run(main(concurrency, rows))
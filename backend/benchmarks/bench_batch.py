@@ -0,0 +1,64 @@
+"""批量接口基准
+
+同步 N 条任务/笔记变更：逐个请求（每次认证、开会话、提交、refresh）对比一次 POST /api/batch。
+通过 ASGI 直接调用应用，不经过网络。
+
+运行方式（在 backend 目录下）：
+    python -m benchmarks.bench_batch [操作数]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+def operations(count: int):
+    for i in range(count):
+        if i % 2:
+            yield "notes", {"title": f"note {i}", "content": "同步内容" * 20}
+        else:
+            yield "tasks", {"title": f"task {i}", "description": "d"}
+
+async def main(count: int):
+    import httpx
+    from sqlalchemy import create_engine
+    from app.main import app
+    from app.migrations.runner import upgrade
+    from app.models.user import User
+    from app.utils.auth import get_password_hash, create_access_token
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {
+            "username": "bench", "email": "bench@example.com", "hashed_password": get_password_hash("x")
+        })
+    engine.dispose()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/api/tasks/", headers=headers)   # 预热认证缓存和连接
+
+        started = time.perf_counter()
+        for entity, data in operations(count):
+            response = await client.post(f"/api/{entity}/", json=data, headers=headers)
+            assert response.status_code == 200, response.text
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = await client.post("/api/batch/", json={"operations": [
+            {"op": "create", "entity": entity, "data": data} for entity, data in operations(count)
+        ]}, headers=headers)
+        assert response.status_code == 200 and response.json()["committed"], response.text
+        batched = time.perf_counter() - started
+
+    print(f"operations={count}")
+    print(f"  per-request: {single * 1000:8.1f} ms  ({count / single:8.1f} ops/s)")
+    print(f"        batch: {batched * 1000:8.1f} ms  ({count / batched:8.1f} ops/s)")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        # 必须在导入应用之前指定数据库
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100))
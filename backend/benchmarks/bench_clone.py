@@ -0,0 +1,96 @@
+"""项目复制基准
+
+对比旧的逐行复制（每个步骤 flush 一次）与批量复制服务，输出耗时和执行的 SQL 数量。
+
+运行方式（在 backend 目录下）：
+    python -m benchmarks.bench_clone [步骤数] [每个步骤的提示词数]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.database import install_sqlite_pragmas, SQLITE_PRAGMAS
+from app.migrations.runner import upgrade
+from app.models.user import User
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.models.project_prompt import ProjectPrompt
+from app.services.cloning import clone_project, duplicate_options
+
+def seed(engine, steps: int, prompts: int):
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {"username": "bench", "email": "bench@example.com", "hashed_password": "x"})
+        conn.execute(Project.__table__.insert(), {
+            "name": "bench", "description": "d", "tech_stack": {"backend": ["FastAPI"]}, "user_id": 1
+        })
+        conn.execute(ProjectStep.__table__.insert(), [
+            {"id": i + 1, "project_id": 1, "title": f"step {i}", "description": "d" * 200, "order": i}
+            for i in range(steps)
+        ])
+        conn.execute(ProjectPrompt.__table__.insert(), [
+            {"project_id": 1, "step_id": i + 1, "title": f"prompt {j}", "content": "c" * 500,
+             "variables": {"x": j}, "version": 1, "order": j}
+            for i in range(steps) for j in range(prompts)
+        ])
+
+async def legacy_clone(db: AsyncSession):
+    """旧实现：读出整棵树后逐个步骤 flush"""
+    source = await db.scalar(select(Project).options(
+        selectinload(Project.steps).selectinload(ProjectStep.prompts)
+    ).filter(Project.id == 1))
+    project = Project(name=f"{source.name} (复制)", description=source.description,
+                      tech_stack=source.tech_stack, user_id=source.user_id)
+    db.add(project)
+    await db.flush()
+    for step in source.steps:
+        new_step = ProjectStep(project_id=project.id, title=step.title, description=step.description,
+                               order=step.order, expected_output=step.expected_output)
+        db.add(new_step)
+        await db.flush()
+        for prompt in step.prompts:
+            db.add(ProjectPrompt(project_id=project.id, step_id=new_step.id, title=prompt.title,
+                                 content=prompt.content, variables=prompt.variables, version=1))
+    await db.commit()
+
+async def bulk_clone(db: AsyncSession):
+    source = await db.get(Project, 1)
+    await clone_project(db, source, duplicate_options(source))
+    await db.commit()
+
+async def measure(url: str, clone) -> tuple:
+    engine = create_async_engine(url)
+    install_sqlite_pragmas(engine.sync_engine, SQLITE_PRAGMAS)
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(1))
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    started = time.perf_counter()
+    async with Session() as db:
+        await clone(db)
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return elapsed, len(statements)
+
+def main(steps: int, prompts: int):
+    print(f"steps={steps} prompts_per_step={prompts}")
+    for name, clone in (("legacy", legacy_clone), ("bulk", bulk_clone)):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            engine = create_engine(f"sqlite:///{path}")
+            install_sqlite_pragmas(engine, SQLITE_PRAGMAS)
+            upgrade(engine)
+            seed(engine, steps, prompts)
+            engine.dispose()
+            elapsed, statements = asyncio.run(measure(f"sqlite+aiosqlite:///{path}", clone))
+        print(f"{name:>7}: {elapsed * 1000:9.1f} ms  statements={statements}")
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    )
@@ -0,0 +1,86 @@
+"""提示词版本差异基准
+
+长提示词的两个版本（分散的若干处改动）：difflib 按行/按词比较对比 diff_texts，再测差异接口首次计算与命中缓存的耗时。
+difflib 使用默认的 autojunk；关闭后按词比较在数万词元上接近平方级，要数十秒。
+通过 ASGI 直接调用应用，不经过网络。
+
+运行方式（在 backend 目录下）：
+    python -m benchmarks.bench_diff [行数] [改动行数]
+"""
+import asyncio
+import difflib
+import os
+import random
+import sys
+import tempfile
+import time
+
+async def main(lines: int, changes: int):
+    import httpx
+    from sqlalchemy import create_engine
+    from app.main import app
+    from app.migrations.runner import upgrade
+    from app.models.user import User
+    from app.models.project import Project
+    from app.models.project_step import ProjectStep
+    from app.models.project_prompt import ProjectPrompt
+    from app.services.diffing import diff_texts, tokenize, diff_cache
+    from app.utils.auth import get_password_hash, create_access_token
+
+    rng = random.Random(0)
+    old_lines = [f"第 {i} 步：使用 FastAPI 实现 endpoint_{i} 并编写测试 " + "说明" * rng.randint(0, 20) + "\n"
+                 for i in range(lines)]
+    new_lines = list(old_lines)
+    for _ in range(changes):
+        index = rng.randrange(lines)
+        new_lines[index] = new_lines[index].replace("FastAPI", "Starlette")
+    old, new = "".join(old_lines), "".join(new_lines)
+
+    print(f"lines={lines} changed lines={changes}")
+    print(f"{'method':>24} {'ms':>9}")
+    for mode in ("line", "word"):
+        a, b = tokenize(old, mode), tokenize(new, mode)
+        started = time.perf_counter()
+        list(difflib.SequenceMatcher(None, a, b).get_opcodes())
+        print(f"{'difflib ' + mode:>24} {(time.perf_counter() - started) * 1000:9.2f}")
+        started = time.perf_counter()
+        result = diff_texts(old, new, mode)
+        print(f"{'diff_texts ' + mode:>24} {(time.perf_counter() - started) * 1000:9.2f}  exact={result['exact']}")
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {
+            "username": "bench", "email": "bench@example.com", "hashed_password": get_password_hash("x")
+        })
+        conn.execute(Project.__table__.insert(), {"name": "p", "description": "d", "tech_stack": {}, "user_id": 1})
+        conn.execute(ProjectStep.__table__.insert(), {"project_id": 1, "title": "s", "order": 1})
+        conn.execute(ProjectPrompt.__table__.insert(), [
+            {"project_id": 1, "step_id": 1, "title": "t", "content": content, "version": version,
+             "lineage_id": 1, "is_latest": version == 2, "order": 1}
+            for version, content in ((1, old), (2, new))
+        ])
+    engine.dispose()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode in ("line", "word"):
+            url = f"/api/project_prompts/2/diff?mode={mode}"
+            await client.get("/api/project_prompts/step/1", headers=headers)   # 预热认证缓存
+            diff_cache.clear()
+            started = time.perf_counter()
+            assert (await client.get(url, headers=headers)).status_code == 200
+            cold = time.perf_counter() - started
+            started = time.perf_counter()
+            assert (await client.get(url, headers=headers)).status_code == 200
+            cached = time.perf_counter() - started
+            print(f"{'endpoint ' + mode:>24} {cold * 1000:9.2f}  cached {cached * 1000:.2f}")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        # 必须在导入应用之前指定数据库
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 30
+        ))
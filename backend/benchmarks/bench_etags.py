@@ -0,0 +1,89 @@
+"""条件请求基准
+
+前端轮询数据未变化的列表：普通 GET（查询并序列化整页）对比带 If-None-Match 的 GET（读取版本号后返回 304）。
+通过 ASGI 直接调用应用，不经过网络。
+
+运行方式（在 backend 目录下）：
+    python -m benchmarks.bench_etags [每个列表的条数] [轮询次数]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+async def main(count: int, polls: int):
+    import httpx
+    from sqlalchemy import create_engine
+    from app.main import app
+    from app.migrations.runner import upgrade
+    from app.models.user import User
+    from app.models.note import Note
+    from app.models.tool import Tool
+    from app.models.project import Project
+    from app.models.project_step import ProjectStep
+    from app.models.project_prompt import ProjectPrompt
+    from app.utils.auth import get_password_hash, create_access_token
+
+    text = "这是一段用于基准测试的较长描述文本。" * 20
+    engine = create_engine(os.environ["DATABASE_URL"])
+    upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {
+            "username": "bench", "email": "bench@example.com", "hashed_password": get_password_hash("x")
+        })
+        conn.execute(Project.__table__.insert(), {"name": "p", "description": text, "tech_stack": {}, "user_id": 1})
+        conn.execute(ProjectStep.__table__.insert(), [
+            {"project_id": 1, "title": f"step {i}", "description": text, "order": i} for i in range(count)
+        ])
+        conn.execute(ProjectPrompt.__table__.insert(), [
+            {"project_id": 1, "step_id": 1, "title": f"prompt {i}", "content": text, "version": 1, "order": i}
+            for i in range(count)
+        ])
+        conn.execute(Tool.__table__.insert(), [
+            {"name": f"tool {i}", "description": text, "url": "https://example.com/", "category": "code", "user_id": 1}
+            for i in range(count)
+        ])
+        conn.execute(Note.__table__.insert(), [
+            {"title": f"note {i}", "content": text, "user_id": 1} for i in range(count)
+        ])
+    engine.dispose()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+    urls = {
+        "project": "/api/projects/1",
+        "steps": "/api/project_steps/project/1",
+        "prompts": "/api/project_prompts/step/1",
+        "tools": "/api/tools/?page_size=100",
+        "notes": "/api/notes/?page_size=100",
+    }
+
+    print(f"rows per list={count} polls={polls}  (median ms per poll)")
+    print(f"{'endpoint':>9} {'full GET':>9} {'304':>8} {'bytes':>8}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, url in urls.items():
+            first = await client.get(url, headers=headers)   # 同时预热认证缓存
+            etag = first.headers["etag"]
+            full, conditional = [], []
+            for _ in range(polls):
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                full.append(time.perf_counter() - started)
+                assert response.status_code == 200
+
+                started = time.perf_counter()
+                response = await client.get(url, headers={**headers, "If-None-Match": etag})
+                conditional.append(time.perf_counter() - started)
+                assert response.status_code == 304
+            print(f"{name:>9} {statistics.median(full) * 1000:9.2f} {statistics.median(conditional) * 1000:8.2f} "
+                  f"{len(first.content):8d}")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        # 必须在导入应用之前指定数据库
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 50
+        ))
@@ -0,0 +1,91 @@
+"""流式导出内存基准
+
+对不同数据量分别运行旧的整体构建脚本（selectinload 整棵树后拼 dict 再序列化）
+与 NDJSON 流式导出，用 tracemalloc 记录 Python 堆峰值。流式导出的峰值应与数据量无关。
+
+运行方式（在 backend 目录下）：
+    python -m benchmarks.bench_export [每个提示词的响应字节数]
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import selectinload
+
+from app.database import install_sqlite_pragmas, SQLITE_PRAGMAS
+from app.migrations.runner import upgrade
+from app.models.user import User
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.models.project_prompt import ProjectPrompt
+from app.services.export import export_ndjson
+
+def seed(engine, steps: int, response_bytes: int):
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {"username": "bench", "email": "bench@example.com", "hashed_password": "x"})
+        conn.execute(Project.__table__.insert(), {"name": "bench", "description": "d", "tech_stack": {}, "user_id": 1})
+        conn.execute(ProjectStep.__table__.insert(), [
+            {"id": i + 1, "project_id": 1, "title": f"step {i}", "order": i} for i in range(steps)
+        ])
+        conn.execute(ProjectPrompt.__table__.insert(), [
+            {"project_id": 1, "step_id": i + 1, "title": "p", "content": "c" * 200,
+             "response": "r" * response_bytes, "version": 1, "order": 1}
+            for i in range(steps)
+        ])
+
+async def legacy_export(Session):
+    async with Session() as db:
+        project = await db.scalar(select(Project).options(
+            selectinload(Project.steps).selectinload(ProjectStep.prompts)
+        ).filter(Project.id == 1))
+        script = {"project": {"name": project.name}, "steps": [
+            {"title": step.title, "prompts": [
+                {"title": p.title, "content": p.content, "response": p.response} for p in step.prompts
+            ]}
+            for step in project.steps
+        ]}
+        return len(json.dumps(script))
+
+async def streaming_export(Session):
+    size = 0
+    async for chunk in export_ndjson(Session, 1, "project", project_ids=[1]):
+        size += len(chunk)
+    return size
+
+async def measure(url: str, export) -> tuple:
+    engine = create_async_engine(url)
+    install_sqlite_pragmas(engine.sync_engine, SQLITE_PRAGMAS)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = await export(Session)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    await engine.dispose()
+    return size, elapsed, peak
+
+def main(response_bytes: int):
+    print(f"response_bytes={response_bytes}")
+    for steps in (1000, 5000, 20000):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            engine = create_engine(f"sqlite:///{path}")
+            upgrade(engine)
+            seed(engine, steps, response_bytes)
+            engine.dispose()
+            for name, export in (("legacy", legacy_export), ("ndjson", streaming_export)):
+                size, elapsed, peak = asyncio.run(measure(f"sqlite+aiosqlite:///{path}", export))
+                print(
+                    f"steps={steps:>6} {name:>7}: {elapsed * 1000:8.1f} ms  "
+                    f"output={size / 2**20:7.1f} MiB  peak_heap={peak / 2**20:7.1f} MiB"
+                )
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 4096)
@@ -0,0 +1,78 @@
+"""笔记列表基准
+
+对比旧接口（一次返回全部笔记及完整正文）与分页摘要列表的响应体积和耗时。
+通过 ASGI 直接调用应用，不经过网络。
+
+运行方式（在 backend 目录下）：
+    python -m benchmarks.bench_notes [笔记数] [每篇正文字符数]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+async def main(count: int, length: int):
+    import httpx
+    from sqlalchemy import create_engine, select
+    from app.main import app
+    from app.migrations.runner import upgrade
+    from app.models.user import User
+    from app.models.note import Note
+    from app.utils.auth import get_password_hash, create_access_token
+    from app.database import AsyncSessionLocal
+    from app.schemas.note import NoteResponse
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {
+            "username": "bench", "email": "bench@example.com", "hashed_password": get_password_hash("x")
+        })
+        conn.execute(Note.__table__.insert(), [
+            {"title": f"note {i}", "content": ("笔记正文 " * length)[:length], "user_id": 1} for i in range(count)
+        ])
+    engine.dispose()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+
+    async def legacy():
+        # 旧接口：查询全部笔记并序列化完整正文
+        async with AsyncSessionLocal() as db:
+            notes = (await db.scalars(select(Note).filter(Note.user_id == 1))).all()
+            return "[" + ",".join(NoteResponse.model_validate(n).model_dump_json() for n in notes) + "]"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/api/notes/", headers=headers)   # 预热认证缓存和连接
+
+        started = time.perf_counter()
+        body = await legacy()
+        legacy_time, legacy_size = time.perf_counter() - started, len(body.encode())
+
+        started = time.perf_counter()
+        response = await client.get("/api/notes/", params={"page_size": 20}, headers=headers)
+        page_time, page_size = time.perf_counter() - started, len(response.content)
+
+        started = time.perf_counter()
+        pages, cursor = 0, None
+        while True:
+            params = {"page_size": 100, **({"cursor": cursor} if cursor else {})}
+            cursor = (await client.get("/api/notes/", params=params, headers=headers)).json().get("next_cursor")
+            pages += 1
+            if not cursor:
+                break
+        walk_time = time.perf_counter() - started
+
+    print(f"notes={count} content_chars={length}")
+    print(f"   legacy (all, full content): {legacy_time * 1000:8.1f} ms  {legacy_size / 2**20:8.2f} MiB")
+    print(f"  summary page (page_size=20): {page_time * 1000:8.1f} ms  {page_size / 2**10:8.2f} KiB")
+    print(f"  all summaries ({pages} cursor pages): {walk_time * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        # 必须在导入应用之前指定数据库
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+        ))
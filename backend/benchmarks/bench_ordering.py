@@ -0,0 +1,86 @@
+"""步骤排序基准
+
+在一个大项目中把第一个步骤挪到末尾、再删除第一个步骤，对比旧实现（连续 order，逐行改写后续步骤）
+与稀疏排序键（只写被移动的一行），输出耗时和实际改写的行数。
+
+运行方式（在 backend 目录下）：
+    python -m benchmarks.bench_ordering [步骤数]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.database import install_sqlite_pragmas, SQLITE_PRAGMAS
+from app.migrations.runner import upgrade
+from app.models.user import User
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.services.ordering import ORDERED_LISTS, ORDER_GAP, move
+
+def seed(engine, steps: int, gap: int):
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {"username": "bench", "email": "bench@example.com", "hashed_password": "x"})
+        conn.execute(Project.__table__.insert(), {"name": "bench", "description": "d", "tech_stack": {}, "user_id": 1})
+        conn.execute(ProjectStep.__table__.insert(), [
+            {"id": i + 1, "project_id": 1, "title": f"step {i}", "description": "d", "order": (i + 1) * gap}
+            for i in range(steps)
+        ])
+
+async def legacy(db: AsyncSession, steps: int):
+    """旧实现：批量重排提交整张列表，删除时逐行把后续步骤的 order 减一"""
+    rows = (await db.scalars(select(ProjectStep).filter(ProjectStep.project_id == 1))).all()
+    new_orders = {step.id: (step.order - 1 if step.id != 1 else steps) for step in rows}
+    for step in rows:
+        step.order = new_orders[step.id]
+    await db.commit()
+    step = await db.get(ProjectStep, 2)
+    for subsequent in (await db.scalars(select(ProjectStep).filter(
+        ProjectStep.project_id == 1, ProjectStep.order > step.order
+    ))).all():
+        subsequent.order -= 1
+    await db.delete(step)
+    await db.commit()
+
+async def sparse(db: AsyncSession, steps: int):
+    await move(db, ORDERED_LISTS["step"], {"project_id": 1}, 1, steps, before=False)
+    await db.commit()
+    await db.delete(await db.get(ProjectStep, 2))
+    await db.commit()
+
+async def run(path: str, action, steps: int):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    install_sqlite_pragmas(engine.sync_engine, SQLITE_PRAGMAS)
+    written = []
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def count_rows(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("UPDATE", "DELETE")):
+            written.append(max(cursor.rowcount, 0))
+
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with Session() as db:
+        started = time.perf_counter()
+        await action(db, steps)
+        elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return elapsed, sum(written)
+
+def main(steps: int):
+    print(f"steps={steps}: move first step to the end, then delete the new first step")
+    for label, action, gap in (("legacy", legacy, 1), ("sparse", sparse, ORDER_GAP)):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            engine = create_engine(f"sqlite:///{path}")
+            upgrade(engine)
+            seed(engine, steps, gap)
+            engine.dispose()
+            elapsed, written = asyncio.run(run(path, action, steps))
+        print(f"{label:>7}: {elapsed * 1000:8.1f} ms  rows written={written}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
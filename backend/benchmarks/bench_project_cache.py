@@ -0,0 +1,79 @@
+"""项目树缓存基准
+
+同一项目反复读取项目详情、步骤列表、步骤的提示词和整棵树：每次读取前清空缓存（加载快照）对比缓存命中（只核对版本号）。
+通过 ASGI 直接调用应用，不经过网络。
+
+运行方式（在 backend 目录下）：
+    python -m benchmarks.bench_project_cache [步骤数] [每步提示词数] [读取次数]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+async def main(steps: int, prompts: int, reads: int):
+    import httpx
+    from sqlalchemy import create_engine
+    from app.main import app
+    from app.migrations.runner import upgrade
+    from app.models.user import User
+    from app.models.project import Project
+    from app.models.project_step import ProjectStep
+    from app.models.project_prompt import ProjectPrompt
+    from app.services.project_tree import project_cache
+    from app.utils.auth import get_password_hash, create_access_token
+
+    text = "这是一段用于基准测试的较长描述文本。" * 20
+    engine = create_engine(os.environ["DATABASE_URL"])
+    upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {
+            "username": "bench", "email": "bench@example.com", "hashed_password": get_password_hash("x")
+        })
+        conn.execute(Project.__table__.insert(), {"name": "p", "description": text, "tech_stack": {}, "user_id": 1})
+        conn.execute(ProjectStep.__table__.insert(), [
+            {"project_id": 1, "title": f"step {i}", "description": text, "order": i} for i in range(steps)
+        ])
+        conn.execute(ProjectPrompt.__table__.insert(), [
+            {"project_id": 1, "step_id": step + 1, "title": f"prompt {i}", "content": text, "version": 1, "order": i}
+            for step in range(steps) for i in range(prompts)
+        ])
+    engine.dispose()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+    urls = {
+        "project": "/api/projects/1",
+        "steps": "/api/project_steps/project/1",
+        "prompts": "/api/project_prompts/step/1",
+        "tree": "/api/projects/1/tree",
+    }
+
+    print(f"steps={steps} prompts per step={prompts} reads={reads}  (median ms per read)")
+    print(f"{'endpoint':>9} {'cold':>8} {'cached':>8}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, url in urls.items():
+            await client.get(url, headers=headers)   # 预热认证缓存
+            cold, cached = [], []
+            for _ in range(reads):
+                project_cache.clear()
+                started = time.perf_counter()
+                assert (await client.get(url, headers=headers)).status_code == 200
+                cold.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                assert (await client.get(url, headers=headers)).status_code == 200
+                cached.append(time.perf_counter() - started)
+            print(f"{name:>9} {statistics.median(cold) * 1000:8.2f} {statistics.median(cached) * 1000:8.2f}")
+    print(project_cache.stats())
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        # 必须在导入应用之前指定数据库
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+            int(sys.argv[3]) if len(sys.argv) > 3 else 30
+        ))
@@ -0,0 +1,117 @@
+"""提示词版本差量存储基准
+
+构造一条 1000 个版本的提示词链（每个版本改动少量行），对比完整存储与差量存储：
+- 存储：content + content_delta 的字节数
+- 读取：列出全部版本、读取单个版本的耗时（冷缓存 / 热缓存）
+
+运行方式（在 backend 目录下）：
+    python -m benchmarks.bench_prompt_history [版本数] [提示词行数]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, select, func, cast, LargeBinary
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.database import install_sqlite_pragmas, SQLITE_PRAGMAS
+from app.migrations.runner import upgrade
+from app.models.user import User
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.models.project_prompt import ProjectPrompt
+from app.services.prompt_history import store_version, load_contents, materialized_cache
+
+def make_versions(count: int, lines: int):
+    rng = random.Random(42)
+    current = [f"line {i}: 请根据以下需求生成实现方案，并说明取舍与边界条件。\n" for i in range(lines)]
+    versions = ["".join(current)]
+    for i in range(1, count):
+        for _ in range(rng.randint(1, 3)):
+            current[rng.randrange(len(current))] = f"revision {i}: 调整措辞并补充约束 {rng.random():.6f}\n"
+        if rng.random() < 0.2:
+            current.insert(rng.randrange(len(current)), f"inserted at {i}\n")
+        versions.append("".join(current))
+    return versions
+
+async def build_chain(Session, versions, use_deltas: bool):
+    async with Session() as db:
+        previous = None
+        for number, content in enumerate(versions, start=1):
+            prompt = ProjectPrompt(project_id=1, step_id=1, title="bench", version=number, variables={})
+            if use_deltas and previous is not None:
+                await store_version(db, prompt, previous, content)
+            else:
+                prompt.content = content
+            db.add(prompt)
+            await db.flush()
+            await load_contents(db, [prompt])
+            previous = prompt
+        await db.commit()
+        # 按字节统计：content 转为 BLOB 再取长度
+        content_bytes = func.coalesce(func.length(cast(ProjectPrompt.content, LargeBinary)), 0)
+        delta_bytes = func.coalesce(func.length(ProjectPrompt.content_delta), 0)
+        return await db.scalar(select(func.sum(content_bytes + delta_bytes)))
+
+async def time_reads(Session, versions):
+    async def list_all():
+        async with Session() as db:
+            prompts = (await db.scalars(select(ProjectPrompt).order_by(ProjectPrompt.version.desc()))).all()
+            await load_contents(db, prompts)
+            assert prompts[0].content == versions[-1]
+
+    async def read_one(version: int):
+        async with Session() as db:
+            prompt = await db.scalar(select(ProjectPrompt).filter(ProjectPrompt.version == version))
+            await load_contents(db, [prompt])
+            assert prompt.content == versions[version - 1]
+
+    results = {}
+    for label, action in (("list_all", list_all), ("read_one", lambda: read_one(len(versions) - 1))):
+        materialized_cache.clear()
+        started = time.perf_counter()
+        await action()
+        cold = time.perf_counter() - started
+        started = time.perf_counter()
+        await action()
+        results[label] = (cold, time.perf_counter() - started)
+    return results
+
+async def run(path: str, versions, use_deltas: bool):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    install_sqlite_pragmas(engine.sync_engine, SQLITE_PRAGMAS)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    stored = await build_chain(Session, versions, use_deltas)
+    reads = await time_reads(Session, versions)
+    await engine.dispose()
+    return stored, reads
+
+def main(count: int, lines: int):
+    versions = make_versions(count, lines)
+    raw = sum(len(v.encode()) for v in versions)
+    print(f"versions={count} lines={lines} raw_content={raw / 2**20:.2f} MiB")
+    for label, use_deltas in (("full", False), ("delta", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            engine = create_engine(f"sqlite:///{path}")
+            upgrade(engine)
+            with engine.begin() as conn:
+                conn.execute(User.__table__.insert(), {"username": "b", "email": "b@example.com", "hashed_password": "x"})
+                conn.execute(Project.__table__.insert(), {"name": "b", "description": "", "tech_stack": {}, "user_id": 1})
+                conn.execute(ProjectStep.__table__.insert(), {"project_id": 1, "title": "s", "order": 1})
+            engine.dispose()
+            stored, reads = asyncio.run(run(path, versions, use_deltas))
+        print(
+            f"{label:>6}: stored={stored / 2**20:7.2f} MiB ({stored / raw:6.1%})  "
+            f"list_all cold/warm={reads['list_all'][0] * 1000:7.1f}/{reads['list_all'][1] * 1000:7.1f} ms  "
+            f"read_one cold/warm={reads['read_one'][0] * 1000:6.1f}/{reads['read_one'][1] * 1000:6.1f} ms"
+        )
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 80
+    )
@@ -0,0 +1,136 @@
+"""列表序列化基准
+
+每种资源 100 条一页，对比现有路径（ORM 实体 → 响应模型 from_attributes 校验 → 标准库 json）
+与快速路径（列元组 → 字典 → orjson / MessagePack）。分别统计只序列化和查询加序列化的耗时（取中位数）。
+
+运行方式（在 backend 目录下）：
+    python -m benchmarks.bench_serialization [每页条数] [重复次数]
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+def median_ms(samples):
+    return statistics.median(samples) * 1000
+
+async def main(page_size: int, repeat: int):
+    from sqlalchemy import create_engine, select
+    from app.migrations.runner import upgrade
+    from app.database import AsyncSessionLocal
+    from app.models.user import User
+    from app.models.task import Task
+    from app.models.tool import Tool
+    from app.models.project import Project
+    from app.models.project_step import ProjectStep
+    from app.models.project_prompt import ProjectPrompt
+    from app.schemas.task import TaskList
+    from app.schemas.tool import ToolList
+    from app.schemas.project import ProjectList
+    from app.schemas.project_step import StepList
+    from app.schemas.project_prompt import PromptList
+    from app.services.fieldsets import FIELDSETS
+    from app.services.serialization import dumps, msgpack
+    from app.services.prompt_history import load_contents
+    from app.utils.auth import get_password_hash
+
+    text = "这是一段用于基准测试的较长描述文本。" * 20
+    engine = create_engine(os.environ["DATABASE_URL"])
+    upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {
+            "username": "bench", "email": "bench@example.com", "hashed_password": get_password_hash("x")
+        })
+        conn.execute(Task.__table__.insert(), [
+            {"title": f"task {i}", "description": text, "user_id": 1} for i in range(page_size)
+        ])
+        conn.execute(Tool.__table__.insert(), [
+            {"name": f"tool {i}", "description": text, "url": f"https://example.com/{i}", "category": "code",
+             "user_id": 1} for i in range(page_size)
+        ])
+        conn.execute(Project.__table__.insert(), [
+            {"name": f"project {i}", "description": text, "tech_stack": {"backend": ["fastapi", "sqlalchemy"]},
+             "user_id": 1} for i in range(page_size)
+        ])
+        conn.execute(ProjectStep.__table__.insert(), [
+            {"project_id": 1, "title": f"step {i}", "description": text, "order": i, "actual_output": text}
+            for i in range(page_size)
+        ])
+        conn.execute(ProjectPrompt.__table__.insert(), [
+            {"project_id": 1, "step_id": 1, "title": f"prompt {i}", "content": text, "version": 1, "order": i,
+             "variables": {"name": "名称"}, "response": text} for i in range(page_size)
+        ])
+    engine.dispose()
+
+    resources = [
+        ("tasks", TaskList, select(Task).filter(Task.user_id == 1).order_by(Task.id)),
+        ("tools", ToolList, select(Tool).filter(Tool.user_id == 1).order_by(Tool.id)),
+        ("projects", ProjectList, select(Project).filter(Project.user_id == 1).order_by(Project.id)),
+        ("steps", StepList, select(ProjectStep).filter(ProjectStep.project_id == 1).order_by(ProjectStep.order)),
+        ("prompts", PromptList, select(ProjectPrompt).filter(ProjectPrompt.step_id == 1).order_by(ProjectPrompt.order)),
+    ]
+
+    def page_fields(schema):
+        page = {"total": page_size, "total_exact": True, "next_cursor": None}
+        return {key: value for key, value in page.items() if key in schema.model_fields}
+
+    def legacy_encode(schema, entities):
+        # 与 response_model 的处理一致：from_attributes 校验、按 JSON 模式导出、标准库 json 编码
+        payload = schema.model_validate({**page_fields(schema), "items": entities}).model_dump(mode="json")
+        return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    print(f"page_size={page_size} repeat={repeat}  (median ms)")
+    print(f"{'resource':>9} {'legacy ser':>11} {'fast ser':>9} {'msgpack':>8} {'legacy e2e':>11} {'fast e2e':>9}")
+    async with AsyncSessionLocal() as db:
+        for name, schema, query in resources:
+            fieldset = FIELDSETS[name]
+            page = page_fields(schema)
+            names = fieldset.allowed
+            entities = (await db.scalars(query)).all()
+            if name == "prompts":
+                await load_contents(db, entities)
+            rows = (await db.execute(fieldset.project(query, names))).all()
+            assert json.loads(legacy_encode(schema, entities)) == json.loads(dumps({**page, "items": fieldset.dump(names, rows)}))
+
+            timings = {key: [] for key in ("legacy", "fast", "msgpack", "legacy_e2e", "fast_e2e")}
+            for _ in range(repeat):
+                started = time.perf_counter()
+                legacy_encode(schema, entities)
+                timings["legacy"].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                dumps({**page, "items": fieldset.dump(names, rows)})
+                timings["fast"].append(time.perf_counter() - started)
+
+                if msgpack is not None:
+                    started = time.perf_counter()
+                    msgpack.packb({**page, "items": fieldset.dump(names, rows)}, default=str, datetime=False)
+                    timings["msgpack"].append(time.perf_counter() - started)
+
+                db.expunge_all()
+                started = time.perf_counter()
+                fresh = (await db.scalars(query)).all()
+                if name == "prompts":
+                    await load_contents(db, fresh)
+                legacy_encode(schema, fresh)
+                timings["legacy_e2e"].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                dumps({**page, "items": fieldset.dump(names, (await db.execute(fieldset.project(query, names))).all())})
+                timings["fast_e2e"].append(time.perf_counter() - started)
+
+            packed = f"{median_ms(timings['msgpack']):8.2f}" if timings["msgpack"] else f"{'n/a':>8}"
+            print(f"{name:>9} {median_ms(timings['legacy']):11.2f} {median_ms(timings['fast']):9.2f} {packed} "
+                  f"{median_ms(timings['legacy_e2e']):11.2f} {median_ms(timings['fast_e2e']):9.2f}")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        # 必须在导入应用之前指定数据库
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 50
+        ))
@@ -0,0 +1,112 @@
+"""近似重复检测基准
+
+一个用户的大量提示词（其中一部分是改动过少量文字的副本）：首次建立索引、修改一条后的增量刷新、
+相似提示词查询（LSH 候选对比与全部签名逐一比较）以及重复分组报告的耗时。通过 ASGI 直接调用应用，不经过网络。
+
+运行方式（在 backend 目录下）：
+    python -m benchmarks.bench_similarity [提示词数] [每步骤提示词数] [查询次数]
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+async def main(count: int, per_step: int, queries: int):
+    import httpx
+    import numpy as np
+    from sqlalchemy import create_engine
+    from app.main import app
+    from app.database import AsyncSessionLocal
+    from app.migrations.runner import upgrade
+    from app.models.user import User
+    from app.models.project import Project
+    from app.models.project_step import ProjectStep
+    from app.models.project_prompt import ProjectPrompt
+    from app.services.similarity import similarity_indexes
+    from app.utils.auth import get_password_hash, create_access_token
+
+    rng = random.Random(0)
+    vocabulary = ["设计", "接口", "模型", "测试", "部署", "数据库", "缓存", "权限", "日志", "性能",
+                  "FastAPI", "SQLAlchemy", "React", "用户", "项目", "步骤", "提示词", "版本", "导出", "搜索"]
+    contents = []
+    for i in range(count):
+        if contents and rng.random() < 0.1:
+            # 约 10% 是已有提示词的副本，替换其中一个词
+            source = rng.choice(contents)
+            contents.append(source.replace(rng.choice(vocabulary), rng.choice(vocabulary), 1))
+        else:
+            contents.append(f"任务 {i}：" + "".join(rng.choice(vocabulary) for _ in range(60)))
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    upgrade(engine)
+    steps = (count + per_step - 1) // per_step
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {
+            "username": "bench", "email": "bench@example.com", "hashed_password": get_password_hash("x")
+        })
+        conn.execute(Project.__table__.insert(), {"name": "p", "description": "d", "tech_stack": {}, "user_id": 1})
+        conn.execute(ProjectStep.__table__.insert(), [
+            {"project_id": 1, "title": f"step {i}", "order": i} for i in range(steps)
+        ])
+        conn.execute(ProjectPrompt.__table__.insert(), [
+            {"project_id": 1, "step_id": i // per_step + 1, "title": f"prompt {i}", "content": content,
+             "version": 1, "order": i}
+            for i, content in enumerate(contents)
+        ])
+    engine.dispose()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+
+    print(f"prompts={count} steps={steps}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        assert (await client.get("/api/project_prompts/1/similar", headers=headers)).status_code == 200
+        print(f"{'first query (build index)':>30} {(time.perf_counter() - started) * 1000:10.1f} ms")
+
+        await client.put("/api/project_prompts/2", json={"content": contents[0]}, headers=headers)
+        started = time.perf_counter()
+        await client.get("/api/project_prompts/1/similar", headers=headers)
+        print(f"{'query after one edit':>30} {(time.perf_counter() - started) * 1000:10.1f} ms")
+
+        ids = [rng.randrange(1, count + 1) for _ in range(queries)]
+        timings = []
+        for prompt_id in ids:
+            started = time.perf_counter()
+            await client.get(f"/api/project_prompts/{prompt_id}/similar", headers=headers)
+            timings.append(time.perf_counter() - started)
+        print(f"{'similar endpoint (median)':>30} {statistics.median(timings) * 1000:10.2f} ms")
+
+        async with AsyncSessionLocal() as db:
+            index = await similarity_indexes.get(db, 1)
+        signatures = [index.signature_of(prompt_id) for prompt_id in ids]
+        started = time.perf_counter()
+        for signature in signatures:
+            index.query(signature)
+        lsh = (time.perf_counter() - started) / queries
+        matrix = index.signatures[:index.used]
+        started = time.perf_counter()
+        for signature in signatures:
+            scores = (matrix == signature).mean(axis=1)
+            np.nonzero(scores >= 0.7)
+        scan = (time.perf_counter() - started) / queries
+        print(f"{'LSH lookup':>30} {lsh * 1000:10.3f} ms")
+        print(f"{'scan all signatures':>30} {scan * 1000:10.3f} ms")
+
+        started = time.perf_counter()
+        report = (await client.get("/api/project_prompts/duplicates?limit=500", headers=headers)).json()
+        print(f"{'duplicate clusters report':>30} {(time.perf_counter() - started) * 1000:10.1f} ms"
+              f"  ({len(report['clusters'])} clusters)")
+    print(similarity_indexes.stats())
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        # 必须在导入应用之前指定数据库
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+            int(sys.argv[3]) if len(sys.argv) > 3 else 100
+        ))
@@ -0,0 +1,101 @@
+"""SQLite 连接调优配置基准
+
+在混合读写负载下对比各个 SQLite 配置（legacy 即 SQLite 默认值）：
+多个写线程不断插入/更新任务，多个读线程同时分页查询任务列表。
+输出每秒完成的读写次数以及 database is locked 错误数。
+
+运行方式（在 backend 目录下）：
+    python -m benchmarks.bench_sqlite_profile [秒数] [写线程数] [读线程数]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import Base, SQLITE_PROFILES, install_sqlite_pragmas
+from app.models.user import User
+from app.models.task import Task
+# 注册所有模型，保证建表完整
+from app.models import note, tool, project, project_step, project_prompt  # noqa: F401
+
+def run_profile(profile: str, seconds: float, writers: int, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        # timeout=0：不使用 pysqlite 自带的忙等待，只看 PRAGMA busy_timeout 的效果
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            connect_args={"check_same_thread": False, "timeout": 0}
+        )
+        install_sqlite_pragmas(engine, SQLITE_PROFILES[profile])
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(User.__table__.insert(), {"username": "bench", "email": "bench@example.com", "hashed_password": "x"})
+            conn.execute(Task.__table__.insert(), [
+                {"title": f"task {i}", "description": "seed " * 20, "completed": False, "user_id": 1}
+                for i in range(5000)
+            ])
+
+        counts = {"reads": 0, "writes": 0, "locked": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def bump(key):
+            with lock:
+                counts[key] += 1
+
+        def writer():
+            i = 0
+            while time.perf_counter() < deadline:
+                i += 1
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(Task.__table__.insert(), {"title": f"new {i}", "description": "w", "completed": False, "user_id": 1})
+                        conn.execute(text("UPDATE tasks SET completed = NOT completed WHERE id = :id"), {"id": i % 5000 + 1})
+                    bump("writes")
+                except OperationalError:
+                    bump("locked")
+
+        def reader():
+            page = 0
+            while time.perf_counter() < deadline:
+                page = (page + 1) % 50
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(text(
+                            "SELECT * FROM tasks WHERE user_id = 1 ORDER BY created_at DESC LIMIT 20 OFFSET :o"
+                        ), {"o": page * 20}).fetchall()
+                        conn.execute(text("SELECT count(*) FROM tasks WHERE user_id = 1")).scalar()
+                    bump("reads")
+                except OperationalError:
+                    bump("locked")
+
+        threads = [threading.Thread(target=writer) for _ in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    return {
+        "reads/s": counts["reads"] / elapsed,
+        "writes/s": counts["writes"] / elapsed,
+        "locked": counts["locked"],
+    }
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    readers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    print(f"duration={seconds}s writers={writers} readers={readers}")
+    for profile in ("legacy", "production"):
+        result = run_profile(profile, seconds, writers, readers)
+        print(
+            f"{profile:>11}: reads/s={result['reads/s']:9.1f}  "
+            f"writes/s={result['writes/s']:9.1f}  locked_errors={result['locked']}"
+        )
@@ -1,24 +1,57 @@
+import os
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from app.database import Base, get_db
-from app.main import app
-from app.models.user import User
-from app.utils.auth import get_password_hash
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import NullPool
 
-# 使用 SQLite 内存数据库进行测试
+# 使用 SQLite 测试数据库（需在导入 app 之前设置）
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+os.environ.setdefault("DATABASE_URL", SQLALCHEMY_DATABASE_URL)
+
+from app.database import get_db, get_session_factory, install_sqlite_pragmas, SQLITE_PRAGMAS
+from app.main import app
+from app.models.user import User
+from app.utils.auth import get_password_hash, principal_cache
+from app.migrations.runner import upgrade, drop_schema
+from app.services.prompt_history import materialized_cache
+from app.services.project_tree import project_cache
+from app.services.rendering import template_cache
+from app.services.diffing import diff_cache
+from app.services.similarity import similarity_indexes
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 路由使用异步会话；TestClient 每次请求可能运行在不同的事件循环中，因此不复用连接
+async_engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1),
+    poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+install_sqlite_pragmas(engine, SQLITE_PRAGMAS)
+install_sqlite_pragmas(async_engine.sync_engine, SQLITE_PRAGMAS)
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # 每个测试都会重建数据库，不能沿用上一个测试缓存的数据
+    principal_cache.clear()
+    materialized_cache.clear()
+    project_cache.clear()
+    template_cache.clear()
+    diff_cache.clear()
+    similarity_indexes.clear()
+    yield
+
 @pytest.fixture
 def db_session():
     # 创建数据库表
-    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
     
     # 创建会话
     session = TestingSessionLocal()
@@ -27,17 +60,16 @@ def db_session():
     finally:
         session.close()
         # 清理数据库
-        Base.metadata.drop_all(bind=engine)
+        drop_schema(engine)
 
 @pytest.fixture
 def client(db_session):
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: TestingAsyncSessionLocal
     
     # 直接创建测试客户端，不使用 transport 参数
     client = TestClient(app)
@@ -61,7 +93,7 @@ def test_user(db_session):
 @pytest.fixture
 def auth_headers(client, test_user):
     """获取认证头"""
-    response = client.post("/api/auth/login", json={
+    response = client.post("/api/auth/login", data={
         "username": "testuser",
         "password": "testpassword"
     })
@@ -0,0 +1,74 @@
+import pytest
+from passlib.context import CryptContext
+from app.models.user import User
+from app.api import auth as auth_api
+from app.utils.auth import PasswordHasher
+
+def test_register_and_login(client):
+    """测试注册后登录"""
+    response = client.post("/api/auth/register", json={
+        "username": "newuser",
+        "email": "new@example.com",
+        "password": "secret"
+    })
+    assert response.status_code == 200
+    assert response.json()["username"] == "newuser"
+
+    response = client.post("/api/auth/login", data={"username": "newuser", "password": "secret"})
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+
+def test_login_wrong_password(client, test_user):
+    """测试错误密码"""
+    response = client.post("/api/auth/login", data={"username": "testuser", "password": "wrong"})
+    assert response.status_code == 401
+
+    response = client.post("/api/auth/login", data={"username": "nobody", "password": "wrong"})
+    assert response.status_code == 401
+
+def test_login_rehashes_outdated_hash(client, db_session, monkeypatch):
+    """测试 cost factor 变更后登录时自动重新哈希"""
+    # 在本进程的线程池中执行，便于观察结果
+    monkeypatch.setattr(auth_api, "password_hasher", PasswordHasher(workers=0))
+    weak_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    user = User(
+        username="legacy",
+        email="legacy@example.com",
+        hashed_password=weak_context.hash("legacypass")
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post("/api/auth/login", data={"username": "legacy", "password": "legacypass"})
+    assert response.status_code == 200
+
+    db_session.refresh(user)
+    assert not user.hashed_password.startswith("$2b$04$")
+
+    # 新哈希仍然可以登录
+    response = client.post("/api/auth/login", data={"username": "legacy", "password": "legacypass"})
+    assert response.status_code == 200
+
+def test_login_rejected_when_hash_queue_full(client, test_user, monkeypatch):
+    """测试哈希队列已满时返回 503"""
+    monkeypatch.setattr(auth_api, "password_hasher", PasswordHasher(workers=0, max_pending=0))
+    response = client.post("/api/auth/login", data={"username": "testuser", "password": "testpassword"})
+    assert response.status_code == 503
+
+def test_principal_cache_hits(client, auth_headers):
+    """测试认证缓存命中，指标接口需要登录"""
+    assert client.get("/api/metrics").status_code == 401
+    # 第一次认证未命中，之后的请求（包括读取指标本身）都命中
+    before = client.get("/api/metrics", headers=auth_headers).json()["principal_cache"]
+    for _ in range(3):
+        assert client.get("/api/tasks/", headers=auth_headers).status_code == 200
+    after = client.get("/api/metrics", headers=auth_headers).json()["principal_cache"]
+    assert after["misses"] - before["misses"] == 0
+    assert after["hits"] - before["hits"] == 4
+
+def test_principal_cache_invalidated_on_user_delete(client, auth_headers, db_session, test_user):
+    """测试删除用户后缓存失效"""
+    assert client.get("/api/tasks/", headers=auth_headers).status_code == 200
+    db_session.delete(test_user)
+    db_session.commit()
+    assert client.get("/api/tasks/", headers=auth_headers).status_code == 401
@@ -0,0 +1,98 @@
+from app.models.task import Task
+from app.models.note import Note
+from app.models.project_prompt import ProjectPrompt
+from app.services.batch import MAX_BATCH_OPERATIONS
+from tests.test_sequences import create_project
+
+def run(client, auth_headers, operations, **options):
+    response = client.post("/api/batch/", json={"operations": operations, **options}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_batch_mixed_operations(client, auth_headers, db_session, test_user):
+    """测试一批中混合创建、更新、删除和读取"""
+    body = run(client, auth_headers, [
+        {"op": "create", "entity": "tasks", "data": {"title": "t1"}},
+        {"op": "create", "entity": "notes", "data": {"title": "n1", "content": "c"}},
+        {"op": "update", "entity": "tasks", "id": "$0", "data": {"completed": True}},
+        {"op": "create", "entity": "tools", "data": {
+            "name": "x", "description": "d", "url": "https://example.com", "category": "code"
+        }},
+        {"op": "get", "entity": "tasks", "ids": ["$0", 999]},
+        {"op": "delete", "entity": "notes", "id": "$1"},
+    ])
+    assert body["committed"] is True
+    assert [result["status"] for result in body["results"]] == [200] * 6
+    task = body["results"][2]["data"]
+    assert task["completed"] is True and task["updated_at"]
+    assert [item["id"] for item in body["results"][4]["data"]] == [task["id"]]
+    assert body["results"][3]["data"]["url"] == "https://example.com/"
+
+    assert db_session.query(Task).one().completed is True
+    assert db_session.query(Note).count() == 0
+
+def test_batch_project_tree(client, auth_headers, db_session, test_user):
+    """测试在一批中创建步骤及其提示词并引用新 ID"""
+    project = create_project(db_session, test_user.id)
+    body = run(client, auth_headers, [
+        {"op": "create", "entity": "steps", "data": {"project_id": project.id, "title": "s", "description": "d"}},
+        {"op": "create", "entity": "prompts", "data": {
+            "project_id": project.id, "step_id": "$0", "title": "p", "content": "c"
+        }},
+        {"op": "update", "entity": "prompts", "id": "$1", "data": {"content": "c2"}},
+    ])
+    prompt = body["results"][2]["data"]
+    assert prompt["step_id"] == body["results"][0]["data"]["id"]
+    assert prompt["lineage_id"] == prompt["id"] and prompt["content"] == "c2"
+    assert db_session.get(ProjectPrompt, prompt["id"]).lineage_id == prompt["id"]
+
+def test_batch_partial_failure(client, auth_headers, db_session, test_user):
+    """测试单个操作失败只回滚该操作并返回错误"""
+    other = create_project(db_session, test_user.id + 1)
+    body = run(client, auth_headers, [
+        {"op": "create", "entity": "tasks", "data": {"title": "kept"}},
+        {"op": "create", "entity": "tasks", "data": {}},
+        {"op": "delete", "entity": "notes", "id": 12345},
+        {"op": "create", "entity": "steps", "data": {"project_id": other.id, "title": "s", "description": "d"}},
+        {"op": "update", "entity": "tasks", "id": "$1", "data": {"title": "x"}},
+    ])
+    assert body["committed"] is True
+    assert [result["status"] for result in body["results"]] == [200, 422, 404, 404, 400]
+    assert body["results"][2]["error"] == "Note not found"
+    assert [task.title for task in db_session.query(Task)] == ["kept"]
+
+def test_batch_unexpected_errors_are_per_operation(client, auth_headers, db_session, test_user):
+    """测试校验之外的数据错误也只记为该操作失败，不中断整批"""
+    project = create_project(db_session, test_user.id)
+    broken = Task(title=None, user_id=test_user.id)
+    db_session.add(broken)
+    db_session.commit()
+    body = run(client, auth_headers, [
+        {"op": "create", "entity": "steps", "data": {
+            "project_id": project.id, "title": "s", "description": "d", "order": 2**70
+        }},
+        {"op": "get", "entity": "tasks", "id": broken.id},
+        {"op": "create", "entity": "tasks", "data": {"title": "kept"}},
+    ])
+    assert body["committed"] is True
+    assert [result["status"] for result in body["results"]] == [400, 422, 200]
+    assert body["results"][1]["error"].startswith("title:")
+    assert db_session.query(Task).filter(Task.title == "kept").count() == 1
+
+def test_batch_atomic_rolls_back(client, auth_headers, db_session, test_user):
+    """测试 atomic 模式下任一失败则整批回滚"""
+    body = run(client, auth_headers, [
+        {"op": "create", "entity": "tasks", "data": {"title": "a"}},
+        {"op": "delete", "entity": "tasks", "id": 12345},
+    ], atomic=True)
+    assert body["committed"] is False
+    assert body["results"][0]["status"] == 200
+    assert db_session.query(Task).count() == 0
+
+def test_batch_limit(client, auth_headers):
+    """测试单批操作数上限"""
+    operations = [{"op": "get", "entity": "tasks", "ids": [1]}] * (MAX_BATCH_OPERATIONS + 1)
+    response = client.post("/api/batch/", json={"operations": operations}, headers=auth_headers)
+    assert response.status_code == 413
+    response = client.post("/api/batch/", json={"operations": []}, headers=auth_headers)
+    assert response.status_code == 400
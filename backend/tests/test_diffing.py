@@ -0,0 +1,92 @@
+import random
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.models.project_prompt import ProjectPrompt
+from app.services.diffing import diff_texts, tokenize, diff_cache
+
+def sides(result):
+    old = "".join(text for op, text in result["ops"] if op != "insert")
+    new = "".join(text for op, text in result["ops"] if op != "delete")
+    return old, new
+
+def lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+def test_diff_is_minimal_and_reversible():
+    """测试编辑脚本能还原两侧文本，按行比较时编辑数最少"""
+    rng = random.Random(7)
+    for _ in range(500):
+        old = "".join(rng.choice(["ab", " ", "c", "\n", "设"]) for _ in range(rng.randint(0, 30)))
+        new = "".join(rng.choice(["ab", " ", "c", "\n", "设"]) for _ in range(rng.randint(0, 30)))
+        for mode in ("line", "word"):
+            result = diff_texts(old, new, mode)
+            assert result["exact"]
+            assert sides(result) == (old, new)
+        a, b = tokenize(old, "line"), tokenize(new, "line")
+        common = lcs_length(a, b)
+        result = diff_texts(old, new, "line")
+        assert (result["deletions"], result["insertions"]) == (len(a) - common, len(b) - common)
+
+    assert diff_texts("设计 User 模型。\n第二行\n", "设计 Project 模型！\n第二行\n", "word")["ops"] == [
+        ["equal", "设计 "], ["delete", "User"], ["insert", "Project"], ["equal", " 模型"],
+        ["delete", "。"], ["insert", "！"], ["equal", "\n第二行\n"],
+    ]
+
+def test_time_budget_falls_back_to_replace():
+    """测试超出时间预算时仍给出正确但非最短的差异"""
+    old = "\n".join(str(i) for i in range(2000))
+    new = "\n".join(str(i) for i in range(1, 2000, 2))
+    result = diff_texts(old, new, "line", budget=0)
+    assert not result["exact"]
+    assert sides(result) == (old, new)
+    assert diff_texts(old, new, "line")["deletions"] == 1000
+
+def test_diff_endpoint(client, auth_headers, db_session, test_user):
+    """测试版本差异接口的默认版本、按词比较、AI 响应比较和缓存"""
+    project = Project(name="p", description="d", tech_stack={}, user_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+    step = ProjectStep(project_id=project.id, title="s", description="d", order=1)
+    db_session.add(step)
+    db_session.commit()
+    base = "第一行\n" * 50
+    first = client.post("/api/project_prompts/", json={
+        "project_id": project.id, "step_id": step.id, "title": "t", "content": base + "设计 User 模型\n"
+    }, headers=auth_headers).json()
+    second = client.post(f"/api/project_prompts/{first['id']}/versions", json={
+        "content": base + "设计 Project 模型\n"
+    }, headers=auth_headers).json()
+    third = client.post(f"/api/project_prompts/{second['id']}/versions", json={
+        "content": base + "设计 Project 模型\n补充说明\n"
+    }, headers=auth_headers).json()
+    assert db_session.get(ProjectPrompt, third["id"]).content_delta is not None
+
+    url = f"/api/project_prompts/{third['id']}/diff"
+    result = client.get(url, headers=auth_headers).json()
+    assert (result["from_version"], result["to_version"], result["from_id"]) == (2, 3, second["id"])
+    assert result["ops"] == [["equal", base + "设计 Project 模型\n"], ["insert", "补充说明\n"]]
+
+    result = client.get(url, params={"from": 1, "to": 2, "mode": "word"}, headers=auth_headers).json()
+    assert (result["insertions"], result["deletions"], result["exact"]) == (1, 1, True)
+    assert ["delete", "User"] in result["ops"]
+
+    result = client.get(f"/api/project_prompts/{first['id']}/diff", headers=auth_headers).json()
+    assert result["from_id"] is None
+    assert result["ops"] == [["insert", base + "设计 User 模型\n"]]
+
+    db_session.query(ProjectPrompt).filter(ProjectPrompt.id == second["id"]).update({"response": "旧响应\n"})
+    db_session.query(ProjectPrompt).filter(ProjectPrompt.id == third["id"]).update({"response": "新响应\n"})
+    db_session.commit()
+    result = client.get(url, params={"field": "response"}, headers=auth_headers).json()
+    assert result["ops"] == [["delete", "旧响应\n"], ["insert", "新响应\n"]]
+
+    client.get(url, headers=auth_headers)
+    assert diff_cache.stats()["hits"] == 1
+    assert client.get(url, params={"from": 9}, headers=auth_headers).status_code == 404
+    assert client.get("/api/project_prompts/999/diff", headers=auth_headers).status_code == 404
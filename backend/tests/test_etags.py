@@ -0,0 +1,75 @@
+from app.models.tool import Tool
+from app.models.user import User
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.utils.auth import get_password_hash
+
+def poll(client, url, headers, etag, **params):
+    return client.get(url, params=params, headers={**headers, "If-None-Match": etag})
+
+def test_unchanged_poll_returns_304(client, auth_headers, db_session, test_user):
+    """测试数据未变时带 If-None-Match 的轮询返回 304，变更后返回新的 ETag"""
+    db_session.add(Tool(name="t", description="d", url="https://example.com/", category="code", user_id=test_user.id))
+    db_session.commit()
+    first = client.get("/api/tools/", headers=auth_headers)
+    etag = first.headers["etag"]
+
+    response = poll(client, "/api/tools/", auth_headers, etag)
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert poll(client, "/api/tools/", auth_headers, f'W/{etag}, "other"').status_code == 304
+
+    # 查询参数和响应格式不同则 ETag 不同
+    assert poll(client, "/api/tools/", auth_headers, etag, fields="name").status_code == 200
+    assert client.get("/api/tools/", headers={**auth_headers, "If-None-Match": etag,
+                                              "Accept": "application/msgpack"}).status_code == 200
+
+    db_session.add(Tool(name="t2", description="d", url="https://example.com/", category="code", user_id=test_user.id))
+    db_session.commit()
+    response = poll(client, "/api/tools/", auth_headers, etag)
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["total"] == 2
+
+def test_project_steps_and_prompts(client, auth_headers, db_session, test_user):
+    """测试项目、步骤和提示词的版本随写入递增，且不会被其他用户命中"""
+    project = Project(name="p", description="d", tech_stack={}, user_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+    step = ProjectStep(project_id=project.id, title="s", description="d", order=1)
+    db_session.add(step)
+    db_session.commit()
+    prompt = client.post("/api/project_prompts/", json={
+        "project_id": project.id, "step_id": step.id, "title": "t", "content": "c"
+    }, headers=auth_headers).json()
+
+    urls = [f"/api/projects/{project.id}", f"/api/project_steps/project/{project.id}",
+            f"/api/project_prompts/step/{step.id}"]
+    etags = {url: client.get(url, headers=auth_headers).headers["etag"] for url in urls}
+    assert all(poll(client, url, auth_headers, etag).status_code == 304 for url, etag in etags.items())
+
+    client.put(f"/api/project_prompts/{prompt['id']}", json={"content": "新内容"}, headers=auth_headers)
+    response = poll(client, urls[2], auth_headers, etags[urls[2]])
+    assert response.status_code == 200
+    assert response.json()["items"][0]["content"] == "新内容"
+    assert poll(client, urls[1], auth_headers, etags[urls[1]]).status_code == 304
+
+    client.put(f"/api/project_steps/{step.id}", json={"title": "改名"}, headers=auth_headers)
+    assert poll(client, urls[1], auth_headers, etags[urls[1]]).status_code == 200
+    assert poll(client, urls[0], auth_headers, etags[urls[0]]).status_code == 304
+
+    # 其他用户的范围中没有这些版本，照常返回 404
+    db_session.add(User(username="other", email="other@example.com", hashed_password=get_password_hash("pw")))
+    db_session.commit()
+    token = client.post("/api/auth/login", data={"username": "other", "password": "pw"}).json()["access_token"]
+    other = {"Authorization": f"Bearer {token}"}
+    assert poll(client, urls[0], other, "*").status_code == 404
+
+def test_notes_etag(client, auth_headers):
+    """测试笔记列表的条件请求"""
+    note = client.post("/api/notes/", json={"title": "n", "content": "c"}, headers=auth_headers).json()
+    etag = client.get("/api/notes/", headers=auth_headers).headers["etag"]
+    assert poll(client, "/api/notes/", auth_headers, etag).status_code == 304
+    client.put(f"/api/notes/{note['id']}", json={"content": "d"}, headers=auth_headers)
+    assert poll(client, "/api/notes/", auth_headers, etag).status_code == 200
@@ -0,0 +1,65 @@
+import json
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.models.project_prompt import ProjectPrompt
+from app.models.task import Task
+from app.models.note import Note
+from app.models.user import User
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.iter_lines() if line]
+
+def seed_project(db_session, user_id, name, steps=2):
+    project = Project(name=name, description="d", tech_stack={}, user_id=user_id)
+    db_session.add(project)
+    db_session.flush()
+    for i in range(steps):
+        step = ProjectStep(project_id=project.id, title=f"{name} step {i}", order=i)
+        db_session.add(step)
+        db_session.flush()
+        db_session.add(ProjectPrompt(project_id=project.id, step_id=step.id, title="p",
+                                     content="c", response="r" * 100, version=1, order=1))
+    db_session.commit()
+    return project
+
+def test_export_single_project(client, auth_headers, db_session, test_user):
+    """测试流式导出单个项目"""
+    project = seed_project(db_session, test_user.id, "alpha")
+    seed_project(db_session, test_user.id, "beta")
+
+    response = client.get(f"/api/export/projects/{project.id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = read_ndjson(response)
+    assert records[0]["type"] == "header"
+    assert records[0]["data"]["scope"] == "project"
+    assert [r["type"] for r in records[1:]] == ["project", "step", "step", "prompt", "prompt"]
+    assert records[1]["data"]["name"] == "alpha"
+    assert "user_id" not in records[1]["data"]
+    assert {r["data"]["project_id"] for r in records[2:]} == {project.id}
+
+    assert client.get("/api/export/projects/9999", headers=auth_headers).status_code == 404
+
+def test_export_account(client, auth_headers, db_session, test_user):
+    """测试导出账户数据且不包含其他用户的数据"""
+    other = User(username="other", email="other@example.com", hashed_password="x")
+    db_session.add(other)
+    db_session.commit()
+    seed_project(db_session, test_user.id, "mine")
+    seed_project(db_session, other.id, "theirs")
+    db_session.add_all([
+        Task(title="t", user_id=test_user.id),
+        Note(title="n", content="c", user_id=test_user.id),
+        Note(title="other note", content="c", user_id=other.id),
+    ])
+    db_session.commit()
+
+    records = read_ndjson(client.get("/api/export/projects", headers=auth_headers))
+    assert [r["data"]["name"] for r in records if r["type"] == "project"] == ["mine"]
+    assert not any(r["type"] == "task" for r in records)
+
+    records = read_ndjson(client.get("/api/export/account", headers=auth_headers))
+    counts = {}
+    for record in records[1:]:
+        counts[record["type"]] = counts.get(record["type"], 0) + 1
+    assert counts == {"project": 1, "step": 2, "prompt": 2, "task": 1, "note": 1}
@@ -0,0 +1,88 @@
+from app.models.task import Task
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.services.prompt_history import materialized_cache
+
+def test_task_list_fields(client, auth_headers, db_session, test_user):
+    """测试任务列表只返回指定字段，且游标分页照常工作"""
+    tasks = [Task(title=f"task {i}", description="很长的描述" * 50, user_id=test_user.id) for i in range(5)]
+    db_session.add_all(tasks)
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"fields": "title,completed", "order_by": "title_asc", "page_size": 2,
+                  **({"cursor": cursor} if cursor else {})}
+        body = client.get("/api/tasks/", params=params, headers=auth_headers).json()
+        assert body["total"] == 5
+        assert all(set(item) == {"id", "title", "completed"} for item in body["items"])
+        seen += [item["title"] for item in body["items"]]
+        cursor = body.get("next_cursor")
+        if not cursor:
+            break
+    assert seen == [f"task {i}" for i in range(5)]
+
+    # 带搜索时相关度只用于排序和游标，不出现在结果中
+    body = client.get("/api/tasks/", params={"fields": "title", "search": "task", "order_by": "relevance"},
+                      headers=auth_headers).json()
+    assert set(body["items"][0]) == {"id", "title"}
+
+    full = client.get("/api/tasks/", headers=auth_headers).json()["items"][0]
+    assert "description" in full and "created_at" in full
+
+def test_unknown_fields_rejected(client, auth_headers):
+    """测试不在白名单中的字段返回 400"""
+    for url in ["/api/tasks/", "/api/tools/", "/api/projects/"]:
+        response = client.get(url, params={"fields": "id,hashed_password"}, headers=auth_headers)
+        assert response.status_code == 400
+        assert "hashed_password" in response.json()["detail"]
+
+def test_unexposed_columns_rejected(client, auth_headers, db_session, test_user):
+    """测试数据表中有、响应模型中没有的列同样不能选择"""
+    project = Project(name="p", description="d", tech_stack={}, user_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+    step = ProjectStep(project_id=project.id, title="s", description="d", order=1)
+    db_session.add(step)
+    db_session.commit()
+    response = client.get(f"/api/project_prompts/step/{step.id}", params={"fields": "content_delta"},
+                          headers=auth_headers)
+    assert response.status_code == 400
+
+def test_step_and_prompt_fields(client, auth_headers, db_session, test_user):
+    """测试步骤和提示词列表的字段选择，差量存储的正文同样还原"""
+    project = Project(name="p", description="d", tech_stack={}, user_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+    step = ProjectStep(project_id=project.id, title="s", description="d", order=1)
+    db_session.add(step)
+    db_session.commit()
+    base = "第一行\n" * 40
+    first = client.post("/api/project_prompts/", json={
+        "project_id": project.id, "step_id": step.id, "title": "t", "content": base
+    }, headers=auth_headers).json()
+    second = client.post(f"/api/project_prompts/{first['id']}/versions",
+                         json={"content": base + "第二版\n"}, headers=auth_headers).json()
+
+    steps = client.get(f"/api/project_steps/project/{project.id}", params={"fields": "title"},
+                       headers=auth_headers).json()["items"]
+    assert steps == [{"id": step.id, "title": "s"}]
+
+    url = f"/api/project_prompts/step/{step.id}"
+    items = client.get(url, params={"fields": "version"}, headers=auth_headers).json()["items"]
+    assert items == [{"id": second["id"], "version": 2}, {"id": first["id"], "version": 1}]
+
+    materialized_cache.clear()
+    items = client.get(url, params={"fields": "content", "latest_only": True}, headers=auth_headers).json()["items"]
+    assert items == [{"id": second["id"], "content": base + "第二版\n"}]
+
+def test_openapi_describes_sparse_items(client):
+    """测试文档中列表条目只有 id 必有，其余字段可能省略，并列出 MessagePack"""
+    spec = client.get("/openapi.json").json()
+    for path in ["/api/tasks/", "/api/tools/", "/api/projects/",
+                 "/api/project_steps/project/{project_id}", "/api/project_prompts/step/{step_id}"]:
+        content = spec["paths"][path]["get"]["responses"]["200"]["content"]
+        assert "application/msgpack" in content
+        name = content["application/json"]["schema"]["$ref"].rsplit("/", 1)[1]
+        item = spec["components"]["schemas"][name]["properties"]["items"]["items"]["$ref"].rsplit("/", 1)[1]
+        assert spec["components"]["schemas"][item]["required"] == ["id"]
@@ -0,0 +1,129 @@
+import json
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.models.project_prompt import ProjectPrompt
+from app.models.task import Task
+from app.models.tool import Tool
+from app.services import importer
+from tests.test_export import seed_project
+
+def chunked(body: bytes, size: int = 7):
+    # 小块上传，覆盖多字节字符和 JSON 值被切断的情况
+    return (body[i:i + size] for i in range(0, len(body), size))
+
+def step_tree(db_session, project_id):
+    steps = db_session.query(ProjectStep).filter(ProjectStep.project_id == project_id).order_by(ProjectStep.order).all()
+    return [(s.title, s.order, [(p.title, p.content, p.response) for p in s.prompts]) for s in steps]
+
+def test_import_script_json(client, auth_headers, db_session, test_user):
+    """测试导入项目导出脚本（分块上传）"""
+    project = seed_project(db_session, test_user.id, "脚本项目", steps=3)
+    script = client.post(f"/api/projects/{project.id}/export", headers=auth_headers).json()
+    body = json.dumps(script, ensure_ascii=False, indent=2).encode()
+
+    response = client.post("/api/import/", content=chunked(body), headers=auth_headers)
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["format"] == "script"
+    assert report["counts"]["project"] == 1
+    assert report["counts"]["step"] == 3
+    assert report["counts"]["prompt"] == 3
+    assert report["rows_per_second"] > 0
+
+    imported = db_session.query(Project).filter(Project.id != project.id).one()
+    assert imported.name == "脚本项目"
+    assert step_tree(db_session, imported.id) == step_tree(db_session, project.id)
+
+def test_import_script_steps_before_project(client, auth_headers, db_session, test_user, monkeypatch):
+    """测试脚本中 steps 写在 project 之前、且步骤数超过一批时仍能导入"""
+    monkeypatch.setattr(importer, "BATCH_SIZE", 2)
+    project = seed_project(db_session, test_user.id, "键顺序", steps=3)
+    script = client.post(f"/api/projects/{project.id}/export", headers=auth_headers).json()
+    body = json.dumps({"steps": script["steps"], "project": script["project"]}, ensure_ascii=False).encode()
+
+    response = client.post("/api/import/", content=chunked(body), headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["counts"]["step"] == 3
+    imported = db_session.query(Project).filter(Project.id != project.id).one()
+    assert step_tree(db_session, imported.id) == step_tree(db_session, project.id)
+
+def test_import_ndjson_round_trip(client, auth_headers, db_session, test_user):
+    """测试账户 NDJSON 导出后重新导入"""
+    seed_project(db_session, test_user.id, "alpha", steps=2)
+    seed_project(db_session, test_user.id, "beta", steps=1)
+    db_session.add_all([
+        Task(title="task", user_id=test_user.id),
+        Tool(name="tool", description="d", url="https://example.com", category="code", user_id=test_user.id),
+    ])
+    db_session.commit()
+    body = client.get("/api/export/account", headers=auth_headers).content
+
+    response = client.post("/api/import/", content=chunked(body, 13), headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["counts"] == {"project": 2, "step": 3, "prompt": 3, "task": 1, "note": 0, "tool": 1}
+
+    originals = db_session.query(Project).order_by(Project.id).all()
+    assert [p.name for p in originals] == ["alpha", "beta", "alpha", "beta"]
+    assert step_tree(db_session, originals[2].id) == step_tree(db_session, originals[0].id)
+    assert client.get("/api/tasks/", headers=auth_headers).json()["total"] == 2
+
+def test_import_dry_run_and_errors(client, auth_headers, db_session, test_user):
+    """测试 dry_run 只校验，出错时整体回滚"""
+    lines = [
+        {"type": "header", "data": {"format": "promptgenius.ndjson", "version": 1}},
+        {"type": "project", "data": {"id": 7, "name": "p"}},
+        {"type": "step", "data": {"id": 1, "project_id": 7, "title": "s"}},
+        {"type": "prompt", "data": {"project_id": 7, "step_id": 1, "title": "ok", "content": "c"}},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines).encode()
+    response = client.post("/api/import/", params={"dry_run": True}, content=body, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["counts"]["prompt"] == 1
+    assert response.json()["errors"] == []
+    assert db_session.query(Project).count() == 0
+
+    bad = body + b"\n" + json.dumps({"type": "prompt", "data": {"project_id": 7, "step_id": 99, "title": "x"}}).encode()
+    bad += b"\n" + json.dumps({"type": "step", "data": {"project_id": 7}}).encode()
+    response = client.post("/api/import/", params={"dry_run": True}, content=bad, headers=auth_headers)
+    errors = response.json()["errors"]
+    assert [(e["record"], e["type"]) for e in errors] == [(6, "step"), (5, "prompt")]
+
+    response = client.post("/api/import/", content=bad, headers=auth_headers)
+    assert response.status_code == 422
+    assert db_session.query(Project).count() == 0
+
+    # 缺少内容的提示词（例如有缺陷的旧导出）不能悄悄导入为空内容
+    script = {"project": {"name": "x"}, "steps": [{"title": "s", "prompts": [{"title": "p", "content": None}]}]}
+    response = client.post("/api/import/", json=script, headers=auth_headers)
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"][0]["message"].startswith("content:")
+
+    response = client.post("/api/import/", content=b'{"project": {"name": "x"}, "steps": [', headers=auth_headers)
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"][0]["type"] == "parse"
+
+def test_import_keeps_prompt_lineage(client, auth_headers, db_session, test_user):
+    """测试导入后提示词版本链映射到新 ID"""
+    project = seed_project(db_session, test_user.id, "lineage", steps=1)
+    root = db_session.query(ProjectPrompt).filter(ProjectPrompt.project_id == project.id).one()
+    client.post(f"/api/project_prompts/{root.id}/versions", json={"content": "v2"}, headers=auth_headers)
+
+    exported = client.get(f"/api/export/projects/{project.id}", headers=auth_headers).content
+    report = client.post("/api/import/", content=exported, headers=auth_headers).json()
+    assert report["counts"]["prompt"] == 2
+
+    imported = db_session.query(ProjectPrompt).filter(
+        ProjectPrompt.project_id != project.id
+    ).order_by(ProjectPrompt.version).all()
+    assert [(p.version, p.is_latest) for p in imported] == [(1, False), (2, True)]
+    assert {p.lineage_id for p in imported} == {imported[0].id}
+
+    # 脚本导出同样保留版本号、最新标记和版本链
+    script = client.post(f"/api/projects/{project.id}/export", headers=auth_headers).json()
+    report = client.post("/api/import/", json=script, headers=auth_headers).json()
+    assert report["counts"]["prompt"] == 2
+    imported = db_session.query(ProjectPrompt).filter(
+        ProjectPrompt.project_id.notin_([project.id, imported[0].project_id])
+    ).order_by(ProjectPrompt.version).all()
+    assert [(p.version, p.is_latest, p.content) for p in imported] == [(1, False, "c"), (2, True, "v2")]
+    assert {p.lineage_id for p in imported} == {imported[0].id}
@@ -0,0 +1,111 @@
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from app.database import install_sqlite_pragmas, SQLITE_PRAGMAS
+from app.services.ordering import ORDER_GAP
+from app.migrations.runner import (
+    upgrade, current_version, latest_version, check_schema, drop_schema, SchemaVersionError
+)
+
+@pytest.fixture
+def fresh_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}", connect_args={"check_same_thread": False})
+    install_sqlite_pragmas(engine, SQLITE_PRAGMAS)
+    yield engine
+    engine.dispose()
+
+def test_upgrade_from_empty(fresh_engine):
+    """测试在空库上执行全部迁移"""
+    applied = upgrade(fresh_engine)
+    assert applied == list(range(1, latest_version() + 1))
+    assert current_version(fresh_engine) == latest_version()
+
+    inspector = inspect(fresh_engine)
+    tables = set(inspector.get_table_names())
+    assert {"tasks", "notes", "tools", "projects", "entity_counters", "tasks_fts"} <= tables
+    indexes = {index["name"] for index in inspector.get_indexes("project_prompts")}
+    assert {"ix_project_prompts_step_order", "ix_project_prompts_family_version"} <= indexes
+
+def test_upgrade_is_idempotent(fresh_engine):
+    """测试重复执行迁移不会重复应用"""
+    upgrade(fresh_engine)
+    assert upgrade(fresh_engine) == []
+    check_schema(fresh_engine)
+
+def test_check_schema_rejects_outdated_database(fresh_engine):
+    """测试数据库版本落后时启动校验失败"""
+    upgrade(fresh_engine, target=1)
+    with pytest.raises(SchemaVersionError):
+        check_schema(fresh_engine)
+
+    assert upgrade(fresh_engine) == list(range(2, latest_version() + 1))
+    check_schema(fresh_engine)
+
+def test_drop_schema(fresh_engine):
+    """测试清空数据库后可以重新迁移"""
+    upgrade(fresh_engine)
+    drop_schema(fresh_engine)
+    assert inspect(fresh_engine).get_table_names() == []
+    assert upgrade(fresh_engine)[0] == 1
+
+def test_add_column_on_existing_table(fresh_engine):
+    """测试在旧表上补充新增列"""
+    upgrade(fresh_engine, target=4)
+    with fresh_engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE project_prompts DROP COLUMN delta_depth")
+    upgrade(fresh_engine)
+    columns = {column["name"] for column in inspect(fresh_engine).get_columns("project_prompts")}
+    assert {"content_delta", "delta_base_id", "delta_depth"} <= columns
+
+def test_lineage_backfill(fresh_engine):
+    """测试迁移为旧数据回填版本链和最新版本标记"""
+    upgrade(fresh_engine, target=6)
+    with fresh_engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO project_prompts (id, project_id, step_id, title, version, is_latest) VALUES "
+            "(1, 1, 1, 'a', 1, 1), (2, 1, 1, 'b', 1, 1), (3, 1, 1, 'a', 3, 1), (4, 1, 1, 'c', 4, 1), "
+            "(5, 1, 2, 'a', 1, 1)"
+        )
+    upgrade(fresh_engine)
+    with fresh_engine.connect() as conn:
+        rows = conn.exec_driver_sql("SELECT id, lineage_id, is_latest FROM project_prompts ORDER BY id").all()
+    # 3 与 1 同标题归入链 1；4 没有同标题的链，归入最近的链 2
+    assert [tuple(row) for row in rows] == [(1, 1, 0), (2, 2, 0), (3, 1, 1), (4, 2, 1), (5, 5, 1)]
+
+def test_spread_orders(fresh_engine):
+    """测试迁移把连续的 order 改为稀疏键"""
+    upgrade(fresh_engine, target=7)
+    with fresh_engine.begin() as conn:
+        conn.exec_driver_sql(
+            'INSERT INTO project_steps (id, project_id, title, "order") VALUES '
+            "(1, 1, 'a', 2), (2, 1, 'b', 1), (3, 1, 'c', NULL), (4, 2, 'd', 7)"
+        )
+    upgrade(fresh_engine)
+    with fresh_engine.connect() as conn:
+        rows = conn.exec_driver_sql('SELECT id, "order" FROM project_steps ORDER BY id').all()
+    assert [tuple(row) for row in rows] == [(1, 2 * ORDER_GAP), (2, ORDER_GAP), (3, 3 * ORDER_GAP), (4, ORDER_GAP)]
+
+def test_note_excerpt_backfill(fresh_engine):
+    """测试迁移为已有笔记回填摘要"""
+    upgrade(fresh_engine, target=8)
+    with fresh_engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE notes DROP COLUMN excerpt")
+        conn.exec_driver_sql("INSERT INTO notes (id, title, content, user_id) VALUES (1, 't', 'a\nb', 1)")
+    upgrade(fresh_engine)
+    with fresh_engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT excerpt FROM notes").scalar() == "a b"
+
+def test_collection_version_backfill(fresh_engine):
+    """测试迁移为已有数据的读取范围写入初始版本"""
+    upgrade(fresh_engine, target=9)
+    with fresh_engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO projects (id, name, description, user_id) VALUES (1, 'p', 'd', 7)")
+        conn.exec_driver_sql("INSERT INTO project_steps (id, project_id, title, \"order\") VALUES (1, 1, 's', 1)")
+    upgrade(fresh_engine)
+    with fresh_engine.begin() as conn:
+        versions = dict(conn.exec_driver_sql("SELECT scope, version FROM collection_versions").all())
+        assert versions == {"project:7:1": 1, "steps:7:1": 1}
+        conn.exec_driver_sql("UPDATE project_steps SET title = 't'")
+        assert conn.exec_driver_sql(
+            "SELECT version FROM collection_versions WHERE scope = 'steps:7:1'"
+        ).scalar() == 3   # 更新时旧范围和新范围各递增一次
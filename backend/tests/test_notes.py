@@ -0,0 +1,52 @@
+from app.models.note import Note
+from app.services.notes import NOTE_EXCERPT_LENGTH
+
+def create_notes(db_session, user_id, count, content="内容"):
+    notes = [Note(title=f"note {i}", content=f"{content} {i}", user_id=user_id) for i in range(count)]
+    db_session.add_all(notes)
+    db_session.commit()
+    return notes
+
+def test_list_notes_returns_summaries(client, auth_headers, db_session, test_user):
+    """测试笔记列表默认只返回摘要"""
+    long_content = "第一行\n" + "字" * (NOTE_EXCERPT_LENGTH * 3)
+    note = client.post("/api/notes/", json={"title": "long", "content": long_content}, headers=auth_headers).json()
+    assert note["excerpt"] == ("第一行 " + "字" * NOTE_EXCERPT_LENGTH)[:NOTE_EXCERPT_LENGTH] + "…"
+
+    body = client.get("/api/notes/", headers=auth_headers).json()
+    assert body["total"] == 1
+    item = body["items"][0]
+    assert set(item) == {"id", "title", "excerpt", "created_at", "updated_at"}
+    assert item["excerpt"] == note["excerpt"]
+
+    body = client.get("/api/notes/", params={"include_content": True}, headers=auth_headers).json()
+    assert body["items"][0]["content"] == long_content
+    assert client.get(f"/api/notes/{note['id']}", headers=auth_headers).json()["content"] == long_content
+
+    # 修改正文时摘要随之更新
+    updated = client.put(f"/api/notes/{note['id']}", json={"content": "短内容"}, headers=auth_headers).json()
+    assert updated["excerpt"] == "短内容"
+
+def test_list_notes_cursor_pagination(client, auth_headers, db_session, test_user):
+    """测试笔记列表的游标分页"""
+    notes = create_notes(db_session, test_user.id, 7)
+    seen, cursor = [], None
+    while True:
+        params = {"page_size": 3, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/api/notes/", params=params, headers=auth_headers).json()
+        assert body["total"] == 7
+        seen += [item["id"] for item in body["items"]]
+        cursor = body.get("next_cursor")
+        if not cursor:
+            break
+    assert seen == [note.id for note in reversed(notes)]
+
+    body = client.get("/api/notes/", params={"order_by": "created_asc", "page": 2, "page_size": 3},
+                      headers=auth_headers).json()
+    assert [item["id"] for item in body["items"]] == [note.id for note in notes[3:6]]
+
+def test_excerpt_for_direct_writes(client, auth_headers, db_session, test_user):
+    """测试不经过接口写入的笔记同样生成摘要"""
+    create_notes(db_session, test_user.id, 1, content="  多余\t空白\r\n")
+    db_session.expire_all()
+    assert db_session.query(Note).one().excerpt == "多余 空白   0"
@@ -0,0 +1,158 @@
+from app.models.project_step import ProjectStep
+from app.models.project_prompt import ProjectPrompt
+from app.services.ordering import ORDER_GAP, key_between
+from tests.test_sequences import create_project
+
+def create_steps(client, auth_headers, project_id, count):
+    return [
+        client.post("/api/project_steps/", json={
+            "project_id": project_id, "title": f"s{i}", "description": "d"
+        }, headers=auth_headers).json()["id"]
+        for i in range(count)
+    ]
+
+def step_orders(db_session, project_id):
+    db_session.expire_all()
+    steps = db_session.query(ProjectStep).filter(ProjectStep.project_id == project_id).order_by(ProjectStep.order)
+    return [(step.id, step.order) for step in steps]
+
+def test_key_between():
+    """测试取中点和向两端延伸"""
+    assert key_between(None, None) == ORDER_GAP
+    assert key_between(10, None) == 10 + ORDER_GAP
+    assert key_between(None, 10) == 10 - ORDER_GAP
+    assert key_between(10, 20) == 15
+    assert key_between(10, 11) is None
+
+def test_move_step_writes_one_row(client, auth_headers, db_session, test_user):
+    """测试移动步骤只改写被移动的步骤"""
+    project = create_project(db_session, test_user.id)
+    ids = create_steps(client, auth_headers, project.id, 5)
+    before = dict(step_orders(db_session, project.id))
+    assert sorted(before.values()) == [ORDER_GAP * i for i in range(1, 6)]
+
+    response = client.post(f"/api/project_steps/{ids[4]}/move", json={"before_id": ids[1]}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["order"] == (before[ids[0]] + before[ids[1]]) // 2
+
+    after = step_orders(db_session, project.id)
+    assert [step_id for step_id, _ in after] == [ids[0], ids[4], ids[1], ids[2], ids[3]]
+    assert {k: v for k, v in after if k != ids[4]} == {k: v for k, v in before.items() if k != ids[4]}
+
+    # 移到末尾后新建的步骤仍排在最后
+    client.post(f"/api/project_steps/{ids[0]}/move", json={"after_id": ids[3]}, headers=auth_headers)
+    new_id = create_steps(client, auth_headers, project.id, 1)[0]
+    assert [step_id for step_id, _ in step_orders(db_session, project.id)][-2:] == [ids[0], new_id]
+
+def test_move_rebalances_exhausted_gap(client, auth_headers, db_session, test_user):
+    """测试相邻键之间没有空位时先重排"""
+    project = create_project(db_session, test_user.id)
+    steps = [ProjectStep(project_id=project.id, title=f"s{i}", description="d", order=i) for i in range(3)]
+    db_session.add_all(steps)
+    db_session.commit()
+    ids = [step.id for step in steps]
+
+    response = client.post(f"/api/project_steps/{ids[2]}/move", json={"after_id": ids[0]}, headers=auth_headers)
+    assert response.status_code == 200
+    assert step_orders(db_session, project.id) == [
+        (ids[0], ORDER_GAP), (ids[2], ORDER_GAP * 3 // 2), (ids[1], ORDER_GAP * 2)
+    ]
+
+def test_dense_keys_rebalanced_in_background(client, auth_headers, db_session, test_user):
+    """测试键过密时在响应后由后台任务重排"""
+    project = create_project(db_session, test_user.id)
+    steps = [ProjectStep(project_id=project.id, title=f"s{i}", description="d", order=i * 20) for i in range(3)]
+    db_session.add_all(steps)
+    db_session.commit()
+    ids = [step.id for step in steps]
+
+    response = client.post(f"/api/project_steps/{ids[2]}/move", json={"before_id": ids[1]}, headers=auth_headers)
+    assert response.json()["order"] == 10
+    assert step_orders(db_session, project.id) == [
+        (ids[0], ORDER_GAP), (ids[2], ORDER_GAP * 2), (ids[1], ORDER_GAP * 3)
+    ]
+
+def test_move_validation(client, auth_headers, db_session, test_user):
+    """测试锚点校验"""
+    project = create_project(db_session, test_user.id)
+    other = create_project(db_session, test_user.id)
+    ids = create_steps(client, auth_headers, project.id, 2)
+    other_id = create_steps(client, auth_headers, other.id, 1)[0]
+
+    url = f"/api/project_steps/{ids[0]}/move"
+    assert client.post(url, json={}, headers=auth_headers).status_code == 422
+    assert client.post(url, json={"before_id": ids[1], "after_id": ids[1]}, headers=auth_headers).status_code == 422
+    assert client.post(url, json={"before_id": ids[0]}, headers=auth_headers).status_code == 400
+    assert client.post(url, json={"before_id": other_id}, headers=auth_headers).status_code == 404
+
+def test_delete_step_keeps_other_orders(client, auth_headers, db_session, test_user):
+    """测试删除步骤不改写其余步骤"""
+    project = create_project(db_session, test_user.id)
+    ids = create_steps(client, auth_headers, project.id, 3)
+    before = step_orders(db_session, project.id)
+    client.delete(f"/api/project_steps/{ids[0]}", headers=auth_headers)
+    assert step_orders(db_session, project.id) == before[1:]
+
+def test_reorder_writes_sparse_keys(client, auth_headers, db_session, test_user):
+    """测试批量重排把位置换算为稀疏键，未列出的步骤保留位置，只写变化的步骤"""
+    project = create_project(db_session, test_user.id)
+    ids = create_steps(client, auth_headers, project.id, 4)
+    response = client.put("/api/project_steps/reorder", json={
+        "project_id": project.id, "steps": [{"id": ids[3], "order": 1}, {"id": ids[0], "order": 3}]
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == [ids[3], ids[1], ids[0], ids[2]]
+    assert step_orders(db_session, project.id) == [
+        (ids[3], ORDER_GAP), (ids[1], ORDER_GAP * 2), (ids[0], ORDER_GAP * 3), (ids[2], ORDER_GAP * 4)
+    ]
+
+    # 之后的移动仍然只写一行
+    client.post(f"/api/project_steps/{ids[2]}/move", json={"after_id": ids[3]}, headers=auth_headers)
+    assert step_orders(db_session, project.id)[1] == (ids[2], ORDER_GAP * 3 // 2)
+
+def test_explicit_order_on_create_advances_sequence(client, auth_headers, db_session, test_user):
+    """测试创建时显式给出 order，之后（接口或批量）追加的步骤仍排在最后"""
+    project = create_project(db_session, test_user.id)
+    first = create_steps(client, auth_headers, project.id, 1)[0]
+    explicit = client.post("/api/project_steps/", json={
+        "project_id": project.id, "title": "s", "description": "d", "order": ORDER_GAP * 10
+    }, headers=auth_headers).json()["id"]
+    appended = create_steps(client, auth_headers, project.id, 1)[0]
+    body = client.post("/api/batch/", json={"operations": [
+        {"op": "create", "entity": "steps", "data": {
+            "project_id": project.id, "title": "b", "description": "d", "order": ORDER_GAP * 20
+        }},
+        {"op": "create", "entity": "steps", "data": {"project_id": project.id, "title": "c", "description": "d"}},
+    ]}, headers=auth_headers).json()
+    batch_ids = [result["data"]["id"] for result in body["results"]]
+    assert [step_id for step_id, _ in step_orders(db_session, project.id)] == [first, explicit, appended] + batch_ids
+
+def test_move_prompt_moves_lineage(client, auth_headers, db_session, test_user):
+    """测试提示词按版本链移动"""
+    project = create_project(db_session, test_user.id)
+    step_id = create_steps(client, auth_headers, project.id, 1)[0]
+    first, second = [
+        client.post("/api/project_prompts/", json={
+            "project_id": project.id, "step_id": step_id, "title": f"p{i}", "content": "c"
+        }, headers=auth_headers).json()["id"]
+        for i in range(2)
+    ]
+    first_v2 = client.post(f"/api/project_prompts/{first}/versions", json={"content": "c2"},
+                           headers=auth_headers).json()["id"]
+
+    response = client.post(f"/api/project_prompts/{second}/move", json={"before_id": first_v2}, headers=auth_headers)
+    assert response.status_code == 200
+    items = client.get(f"/api/project_prompts/step/{step_id}", headers=auth_headers).json()["items"]
+    assert [item["id"] for item in items] == [second, first_v2, first]
+
+    response = client.post(f"/api/project_prompts/{first}/move", json={"after_id": first_v2}, headers=auth_headers)
+    assert response.status_code == 400
+
+    # 批量重排同样按版本链写入
+    response = client.put("/api/project_prompts/reorder", json={
+        "step_id": step_id, "prompts": [{"id": first_v2, "order": 1}, {"id": second, "order": 2}]
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == [first_v2, first, second]
+    db_session.expire_all()
+    assert {p.order for p in db_session.query(ProjectPrompt).filter(ProjectPrompt.lineage_id == first)} == {ORDER_GAP}
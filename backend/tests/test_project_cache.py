@@ -0,0 +1,117 @@
+from app.models.user import User
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.models.project_prompt import ProjectPrompt
+from app.services.project_tree import project_cache
+from app.utils.auth import get_password_hash
+
+def make_project(db_session, user_id, steps=2, text="d"):
+    project = Project(name="p", description=text, tech_stack={}, user_id=user_id)
+    db_session.add(project)
+    db_session.flush()
+    for i in range(steps):
+        step = ProjectStep(project_id=project.id, title=f"step {i}", description=text, order=i + 1)
+        db_session.add(step)
+        db_session.flush()
+        db_session.add(ProjectPrompt(project_id=project.id, step_id=step.id, title="t", content=f"c{i}", version=1))
+    db_session.commit()
+    return project
+
+def test_reads_share_snapshot_and_writes_invalidate(client, auth_headers, db_session, test_user):
+    """测试项目详情、步骤、提示词和树共用一份快照，写接口提交后立即失效"""
+    project = make_project(db_session, test_user.id)
+    step_id = db_session.query(ProjectStep.id).filter(ProjectStep.project_id == project.id).order_by(ProjectStep.order).first()[0]
+    urls = [f"/api/projects/{project.id}", f"/api/project_steps/project/{project.id}",
+            f"/api/project_prompts/step/{step_id}", f"/api/projects/{project.id}/tree"]
+    for url in urls:
+        assert client.get(url, headers=auth_headers).status_code == 200
+    stats = client.get("/api/metrics", headers=auth_headers).json()["project_cache"]
+    assert (stats["misses"], stats["hits"], stats["size"]) == (1, 3, 1)
+    assert 0 < stats["bytes"] <= stats["max_bytes"]
+
+    response = client.put(f"/api/project_steps/{step_id}", json={"title": "改名"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert project_cache.stats()["invalidations"] == 1
+    steps = client.get(urls[1], headers=auth_headers).json()["items"]
+    assert steps[0]["title"] == "改名"
+
+    client.post("/api/project_prompts/", json={
+        "project_id": project.id, "step_id": step_id, "title": "新", "content": "新内容"
+    }, headers=auth_headers)
+    prompts = client.get(urls[2], headers=auth_headers).json()["items"]
+    assert sorted(prompt["content"] for prompt in prompts) == ["c0", "新内容"]
+
+    assert client.delete(f"/api/projects/{project.id}", headers=auth_headers).status_code == 200
+    assert all(client.get(url, headers=auth_headers).status_code == 404 for url in urls)
+    assert project_cache.stats()["size"] == 0
+
+def test_direct_writes_are_detected(client, auth_headers, db_session, test_user):
+    """测试绕过接口的写入（批量、导入、其他进程）通过版本号核对被发现"""
+    project = make_project(db_session, test_user.id)
+    url = f"/api/projects/{project.id}/tree"
+    assert len(client.get(url, headers=auth_headers).json()["steps"]) == 2
+
+    step = db_session.query(ProjectStep).filter(ProjectStep.project_id == project.id).first()
+    db_session.query(ProjectPrompt).filter(ProjectPrompt.step_id == step.id).update({"title": "直接写入"})
+    db_session.commit()
+    tree = client.get(url, headers=auth_headers).json()
+    assert tree["steps"][0]["prompts"][0]["title"] == "直接写入"
+
+    db_session.delete(step)
+    db_session.commit()
+    assert len(client.get(url, headers=auth_headers).json()["steps"]) == 1
+    assert project_cache.stats()["stale"] == 2
+
+def test_reused_step_id_is_located_again(client, auth_headers, db_session, test_user):
+    """测试步骤删除后 ID 被其他项目复用时，按步骤读取提示词不会沿用旧的项目映射"""
+    first, second = make_project(db_session, test_user.id, steps=0), make_project(db_session, test_user.id, steps=0)
+
+    def create_step(project):
+        return client.post("/api/project_steps/", json={
+            "project_id": project.id, "title": "s", "description": "d"
+        }, headers=auth_headers).json()["id"]
+
+    step_id = create_step(first)
+    assert client.get(f"/api/project_prompts/step/{step_id}", headers=auth_headers).status_code == 200
+    response = client.post("/api/batch/", json={"operations": [
+        {"op": "delete", "entity": "steps", "id": step_id}
+    ]}, headers=auth_headers)
+    assert response.json()["results"][0]["status"] == 200
+    assert create_step(second) == step_id
+    assert client.get(f"/api/project_prompts/step/{step_id}", headers=auth_headers).status_code == 200
+
+    # 绕过接口的删除不会使缓存失效，过期的映射在读取时被丢弃
+    client.get(f"/api/project_prompts/step/{step_id}", headers=auth_headers)
+    db_session.query(ProjectStep).filter(ProjectStep.id == step_id).delete()
+    db_session.commit()
+    assert create_step(first) == step_id
+    assert client.get(f"/api/project_prompts/step/{step_id}", headers=auth_headers).status_code == 200
+
+def test_byte_budget_evicts_least_recent(client, auth_headers, db_session, test_user, monkeypatch):
+    """测试超出字节预算时淘汰最久未用的快照"""
+    projects = [make_project(db_session, test_user.id, text="x" * 2000) for _ in range(3)]
+    client.get(f"/api/projects/{projects[0].id}/tree", headers=auth_headers)
+    monkeypatch.setattr(project_cache, "max_bytes", project_cache.stats()["bytes"] * 2)
+
+    for project in projects:
+        client.get(f"/api/projects/{project.id}/tree", headers=auth_headers)
+    stats = project_cache.stats()
+    assert (stats["size"], stats["evictions"]) == (2, 1)
+    assert stats["bytes"] <= stats["max_bytes"]
+    # 第一个项目已被淘汰，重新读取时未命中
+    client.get(f"/api/projects/{projects[0].id}/tree", headers=auth_headers)
+    assert project_cache.stats()["misses"] == stats["misses"] + 1
+
+def test_snapshot_is_not_shared_across_users(client, auth_headers, db_session, test_user):
+    """测试已缓存的项目不会被其他用户读到"""
+    project = make_project(db_session, test_user.id)
+    step_id = db_session.query(ProjectStep.id).filter(ProjectStep.project_id == project.id).first()[0]
+    client.get(f"/api/projects/{project.id}/tree", headers=auth_headers)
+
+    db_session.add(User(username="other", email="other@example.com", hashed_password=get_password_hash("secret")))
+    db_session.commit()
+    token = client.post("/api/auth/login", data={"username": "other", "password": "secret"}).json()["access_token"]
+    other = {"Authorization": f"Bearer {token}"}
+    for url in [f"/api/projects/{project.id}", f"/api/projects/{project.id}/tree",
+                f"/api/project_steps/project/{project.id}", f"/api/project_prompts/step/{step_id}"]:
+        assert client.get(url, headers=other).status_code == 404
@@ -0,0 +1,140 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.models.project_prompt import ProjectPrompt
+from app.services.project_tree import project_cache
+
+@pytest.fixture
+def sample_project(db_session, test_user):
+    project = Project(name="Demo", description="desc", tech_stack={"backend": ["FastAPI"]},
+                      status="progress", user_id=test_user.id)
+    db_session.add(project)
+    db_session.flush()
+    for i in range(3):
+        step = ProjectStep(project_id=project.id, title=f"step {i}", description="d", order=i + 1,
+                           actual_output=f"output {i}", notes="n")
+        db_session.add(step)
+        db_session.flush()
+        # prompt i.1 是 prompt i.0 的第 2 个版本
+        first = ProjectPrompt(project_id=project.id, step_id=step.id, title=f"prompt {i}.0",
+                              content=f"content {i}.0", variables={"x": "0"}, version=1, order=0, is_latest=False)
+        db_session.add(first)
+        db_session.flush()
+        db_session.add(ProjectPrompt(project_id=project.id, step_id=step.id, title=f"prompt {i}.1",
+                                     content=f"content {i}.1", variables={"x": "1"}, version=2, order=1,
+                                     lineage_id=first.id))
+    db_session.commit()
+    return project
+
+def count_statements():
+    statements = []
+    def before(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(Engine, "before_cursor_execute", before)
+    return statements, lambda: event.remove(Engine, "before_cursor_execute", before)
+
+def tree(db_session, project_id):
+    steps = db_session.query(ProjectStep).filter(ProjectStep.project_id == project_id).order_by(ProjectStep.order).all()
+    return [
+        (step.title, step.order, [(p.title, p.content, p.variables, p.project_id == project_id) for p in
+                                  sorted(step.prompts, key=lambda p: p.order)])
+        for step in steps
+    ]
+
+def test_duplicate_project(client, auth_headers, db_session, sample_project):
+    """测试复制项目保留完整的步骤和提示词"""
+    response = client.post(f"/api/projects/{sample_project.id}/duplicate", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["name"] == "Demo (复制)"
+    assert data["status"] == "planning"
+
+    assert tree(db_session, data["id"]) == tree(db_session, sample_project.id)
+    copied = db_session.query(ProjectStep).filter(ProjectStep.project_id == data["id"]).first()
+    assert copied.actual_output == "output 0"
+    # 版本链映射到副本中的新 ID
+    prompts = {p.id: p for p in db_session.query(ProjectPrompt).filter(ProjectPrompt.project_id == data["id"])}
+    assert {p.version for p in prompts.values()} == {1, 2}
+    for prompt in prompts.values():
+        assert prompt.lineage_id in prompts
+        assert prompt.is_latest == (prompt.version == 2)
+
+def test_template_round_trip(client, auth_headers, db_session, sample_project):
+    """测试保存为模板后再从模板创建项目"""
+    template = client.post(f"/api/project_templates/{sample_project.id}/save-as-template", headers=auth_headers).json()
+    assert template["name"] == "Demo (Template)"
+    assert all(p.is_template for p in db_session.query(ProjectPrompt).filter(ProjectPrompt.project_id == template["id"]))
+    template_step = db_session.query(ProjectStep).filter(ProjectStep.project_id == template["id"]).first()
+    assert template_step.actual_output is None
+
+    response = client.post(f"/api/project_templates/templates/{template['id']}/create", headers=auth_headers)
+    assert response.status_code == 200
+    project = response.json()
+    assert project["name"] == "Demo"
+    assert tree(db_session, project["id"]) == tree(db_session, sample_project.id)
+
+    # 普通项目不能当作模板使用
+    response = client.post(f"/api/project_templates/templates/{sample_project.id}/create", headers=auth_headers)
+    assert response.status_code == 404
+
+def test_clone_query_count_is_constant(client, auth_headers, db_session, sample_project):
+    """测试复制的 SQL 数量与步骤数无关"""
+    project_id = sample_project.id
+    def clone_statements():
+        statements, stop = count_statements()
+        try:
+            assert client.post(f"/api/projects/{project_id}/duplicate", headers=auth_headers).status_code == 200
+        finally:
+            stop()
+        return len(statements)
+
+    clone_statements()  # 预热认证缓存
+    small = clone_statements()
+    for i in range(20):
+        db_session.add(ProjectStep(project_id=project_id, title=f"extra {i}", order=10 + i))
+    db_session.commit()
+    assert clone_statements() == small
+
+def test_project_tree(client, auth_headers, db_session, sample_project):
+    """测试项目树按顺序返回步骤和最新版本的提示词"""
+    response = client.get(f"/api/projects/{sample_project.id}/tree", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [step["title"] for step in data["steps"]] == ["step 0", "step 1", "step 2"]
+    # 每个版本链只返回最新版本
+    assert [[p["title"] for p in step["prompts"]] for step in data["steps"]] == [
+        ["prompt 0.1"], ["prompt 1.1"], ["prompt 2.1"]
+    ]
+    assert data["steps"][0]["prompts"][0]["content"] == "content 0.1"
+
+    data = client.get(f"/api/projects/{sample_project.id}/tree", params={
+        "include_history": True, "include_bodies": False
+    }, headers=auth_headers).json()
+    assert [p["title"] for p in data["steps"][0]["prompts"]] == ["prompt 0.0", "prompt 0.1"]
+    assert all(p["content"] is None for step in data["steps"] for p in step["prompts"])
+
+    assert client.get("/api/projects/9999/tree", headers=auth_headers).status_code == 404
+
+def test_project_tree_query_count_is_constant(client, auth_headers, db_session, sample_project):
+    """测试项目树的 SQL 数量与步骤数无关"""
+    project_id = sample_project.id
+    def tree_statements():
+        project_cache.clear()   # 统计的是未命中缓存时的加载
+        statements, stop = count_statements()
+        try:
+            assert client.get(f"/api/projects/{project_id}/tree", headers=auth_headers).status_code == 200
+        finally:
+            stop()
+        return len(statements)
+
+    tree_statements()  # 预热认证缓存
+    small = tree_statements()
+    for i in range(20):
+        step = ProjectStep(project_id=project_id, title=f"extra {i}", order=10 + i)
+        db_session.add(step)
+        db_session.flush()
+        db_session.add(ProjectPrompt(project_id=project_id, step_id=step.id, title="p", content="c", version=1))
+    db_session.commit()
+    assert tree_statements() == small
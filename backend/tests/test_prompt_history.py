@@ -0,0 +1,122 @@
+import json
+import pytest
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.models.project_prompt import ProjectPrompt
+from app.services.prompt_history import encode_delta, apply_delta, materialized_cache, CHECKPOINT_INTERVAL
+
+BASE_TEXT = "".join(f"第 {i} 行：请根据需求生成代码并解释设计思路。\n" for i in range(60))
+
+def edited(i: int) -> str:
+    lines = BASE_TEXT.splitlines(keepends=True)
+    lines[i % len(lines)] = f"第 {i} 次修改：补充边界条件。\n"
+    return "".join(lines) + f"版本 {i}\n"
+
+@pytest.fixture
+def prompt_chain(client, auth_headers, db_session, test_user):
+    """创建一个提示词并连续创建多个版本，返回每个版本的 (id, 内容)"""
+    project = Project(name="p", description="d", tech_stack={}, user_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+    step = ProjectStep(project_id=project.id, title="s", order=1)
+    db_session.add(step)
+    db_session.commit()
+    first = client.post("/api/project_prompts/", json={
+        "project_id": project.id, "step_id": step.id, "title": "t", "content": BASE_TEXT
+    }, headers=auth_headers).json()
+    chain = [(first["id"], BASE_TEXT)]
+    for i in range(1, CHECKPOINT_INTERVAL + 5):
+        data = client.post(f"/api/project_prompts/{chain[-1][0]}/versions",
+                           json={"content": edited(i)}, headers=auth_headers).json()
+        assert data["content"] == edited(i)
+        chain.append((data["id"], edited(i)))
+    return chain
+
+def test_delta_round_trip():
+    """测试差量编码与还原"""
+    for target in ["", "x", BASE_TEXT, edited(3), "完全不同的内容\n没有换行结尾"]:
+        assert apply_delta(BASE_TEXT, encode_delta(BASE_TEXT, target)) == target
+    assert len(encode_delta(BASE_TEXT, edited(3))) < len(BASE_TEXT.encode()) // 10
+
+def test_versions_stored_as_deltas(client, auth_headers, db_session, prompt_chain):
+    """测试版本以差量存储并定期写入检查点，读取结果与完整存储一致"""
+    rows = {p.id: p for p in db_session.query(ProjectPrompt)}
+    depths = [rows[prompt_id].delta_depth for prompt_id, _ in prompt_chain]
+    assert depths[:3] == [0, 1, 2]
+    assert depths[CHECKPOINT_INTERVAL] == 0  # 检查点
+    assert all(rows[prompt_id].content is None for prompt_id, _ in prompt_chain[1:CHECKPOINT_INTERVAL])
+
+    expected = [content for _, content in reversed(prompt_chain)]
+    for _ in range(2):  # 冷缓存与热缓存
+        versions = client.get(f"/api/project_prompts/{prompt_chain[0][0]}/versions", headers=auth_headers).json()
+        assert [v["content"] for v in versions] == expected
+    assert materialized_cache.stats()["hits"] > 0
+
+    materialized_cache.clear()
+    step_id = rows[prompt_chain[0][0]].step_id
+    items = client.get(f"/api/project_prompts/step/{step_id}", headers=auth_headers).json()["items"]
+    assert sorted(item["content"] for item in items) == sorted(expected)
+
+def test_editing_or_deleting_a_base_version(client, auth_headers, db_session, prompt_chain):
+    """测试修改或删除被依赖的版本后，依赖它的版本内容不变"""
+    base_id, dependent_id = prompt_chain[1][0], prompt_chain[2][0]
+    response = client.put(f"/api/project_prompts/{base_id}", json={"content": "rewritten"}, headers=auth_headers)
+    assert response.json()["content"] == "rewritten"
+    client.delete(f"/api/project_prompts/{prompt_chain[3][0]}", headers=auth_headers)
+
+    materialized_cache.clear()
+    versions = client.get(f"/api/project_prompts/{base_id}/versions", headers=auth_headers).json()
+    contents = {v["id"]: v["content"] for v in versions}
+    assert contents[base_id] == "rewritten"
+    assert contents[dependent_id] == prompt_chain[2][1]
+    assert prompt_chain[3][0] not in contents
+    for prompt_id, content in prompt_chain[4:]:
+        assert contents[prompt_id] == content
+
+def test_clone_and_export_materialize_deltas(client, auth_headers, db_session, prompt_chain):
+    """测试复制项目、NDJSON 导出和脚本导出时输出完整内容"""
+    project_id = db_session.get(ProjectPrompt, prompt_chain[0][0]).project_id
+    copy = client.post(f"/api/projects/{project_id}/duplicate", headers=auth_headers).json()
+    copied = db_session.query(ProjectPrompt).filter(ProjectPrompt.project_id == copy["id"]).order_by(ProjectPrompt.id)
+    assert [p.content for p in copied] == [content for _, content in prompt_chain]
+
+    lines = client.get(f"/api/export/projects/{project_id}", headers=auth_headers).iter_lines()
+    prompts = [json.loads(line)["data"] for line in lines if line and json.loads(line)["type"] == "prompt"]
+    assert [p["content"] for p in prompts] == [content for _, content in prompt_chain]
+    assert "content_delta" not in prompts[0]
+
+    script = client.post(f"/api/projects/{project_id}/export", headers=auth_headers).json()
+    assert [p["content"] for p in script["steps"][0]["prompts"]] == [content for _, content in prompt_chain]
+
+def test_versions_follow_lineage(client, auth_headers, db_session, prompt_chain):
+    """测试版本按版本链区分，同一步骤中的其他提示词不算作版本"""
+    root = db_session.get(ProjectPrompt, prompt_chain[0][0])
+    other = client.post("/api/project_prompts/", json={
+        "project_id": root.project_id, "step_id": root.step_id, "title": "other", "content": "other"
+    }, headers=auth_headers).json()
+    assert other["lineage_id"] == other["id"]
+    other_v2 = client.post(f"/api/project_prompts/{other['id']}/versions", json={"content": "other v2"},
+                           headers=auth_headers).json()
+    assert other_v2["version"] == 2
+
+    versions = client.get(f"/api/project_prompts/{other['id']}/versions", headers=auth_headers).json()
+    assert [v["content"] for v in versions] == ["other v2", "other"]
+    assert [v["is_latest"] for v in versions] == [True, False]
+
+    items = client.get(f"/api/project_prompts/step/{root.step_id}", params={"latest_only": True},
+                       headers=auth_headers).json()["items"]
+    assert [item["id"] for item in items] == [prompt_chain[-1][0], other_v2["id"]]
+
+    # 删除最新版本后上一个版本成为最新
+    client.delete(f"/api/project_prompts/{other_v2['id']}", headers=auth_headers)
+    items = client.get(f"/api/project_prompts/step/{root.step_id}", params={"latest_only": True},
+                       headers=auth_headers).json()["items"]
+    assert [item["id"] for item in items] == [prompt_chain[-1][0], other["id"]]
+
+def test_version_query_uses_lineage_index(db_session, prompt_chain):
+    """测试版本查询走 (lineage_id, version) 索引"""
+    plan = db_session.connection().exec_driver_sql(
+        "EXPLAIN QUERY PLAN SELECT * FROM project_prompts WHERE lineage_id = ? ORDER BY version DESC",
+        (prompt_chain[0][0],)
+    ).all()
+    assert "ix_project_prompts_lineage_version" in " ".join(row[-1] for row in plan)
@@ -0,0 +1,72 @@
+import pytest
+from app.api import project_prompts
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.services.rendering import CompiledTemplate, MissingVariables, template_cache
+
+def test_compiled_template():
+    """测试占位符解析、花括号转义、后备值和 strict"""
+    template = CompiledTemplate("用 {{ language }} 写 {{name}}：{\"a\": {x}} {{name}} {{ 缺少 }}")
+    assert template.names == {"language", "name", "缺少"}
+    assert template.render({"name": "App"}, {"language": "Python", "name": "默认"}) == \
+        "用 Python 写 App：{\"a\": {x}} App {{ 缺少 }}"
+    assert template.render_many([{"name": "a", "缺少": "1"}, {"language": "Go"}]) == [
+        "用 {{ language }} 写 a：{\"a\": {x}} a 1",
+        "用 Go 写 {{name}}：{\"a\": {x}} {{name}} {{ 缺少 }}",
+    ]
+    with pytest.raises(MissingVariables) as error:
+        template.render_many([{"language": "Go", "name": "a", "缺少": ""}, {"name": "b"}], {"缺少": "x"}, strict=True)
+    assert (error.value.row, error.value.names) == (1, ["language"])
+    assert CompiledTemplate("没有占位符 {}").render({}) == "没有占位符 {}"
+
+@pytest.fixture
+def prompt(client, auth_headers, db_session, test_user):
+    project = Project(name="p", description="d", tech_stack={}, user_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+    step = ProjectStep(project_id=project.id, title="s", description="d", order=1)
+    db_session.add(step)
+    db_session.commit()
+    return client.post("/api/project_prompts/", json={
+        "project_id": project.id, "step_id": step.id, "title": "t",
+        "content": "为 {{project}} 设计 {{ model }} 模型", "variables": {"project": "PromptGenius"}
+    }, headers=auth_headers).json()
+
+def test_render_prompt(client, auth_headers, prompt):
+    """测试单次渲染使用提示词自身变量作为默认值，strict 时缺少变量返回 400"""
+    url = f"/api/project_prompts/{prompt['id']}/render"
+    response = client.post(url, json={"variables": {"model": "User"}}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {"content": "为 PromptGenius 设计 User 模型", "variables": ["model", "project"]}
+    assert client.post(url, json={}, headers=auth_headers).json()["content"] == "为 PromptGenius 设计 {{ model }} 模型"
+    response = client.post(url, json={"strict": True}, headers=auth_headers)
+    assert response.status_code == 400
+    assert "model" in response.json()["detail"]
+    assert client.post("/api/project_prompts/999/render", json={}, headers=auth_headers).status_code == 404
+
+def test_render_batch_uses_each_version(client, auth_headers, prompt, monkeypatch):
+    """测试批量渲染，差量存储的新版本按自己的内容编译"""
+    url = f"/api/project_prompts/{prompt['id']}/render/batch"
+    rows = [{"model": f"M{i}"} for i in range(500)] + [{"project": "X", "model": "Y"}]
+    items = client.post(url, json={"rows": rows}, headers=auth_headers).json()["items"]
+    assert len(items) == 501
+    assert items[0] == "为 PromptGenius 设计 M0 模型"
+    assert items[-1] == "为 X 设计 Y 模型"
+
+    version = client.post(f"/api/project_prompts/{prompt['id']}/versions", json={
+        "content": "为 {{project}} 设计 {{ model }} 模型\n并补充 {{extra}}"
+    }, headers=auth_headers).json()
+    response = client.post(f"/api/project_prompts/{version['id']}/render/batch", json={
+        "rows": [{"model": "A", "extra": "测试"}]
+    }, headers=auth_headers)
+    assert response.json() == {"items": ["为 PromptGenius 设计 A 模型\n并补充 测试"],
+                               "variables": ["extra", "model", "project"]}
+    # 再次渲染同一版本命中编译缓存
+    client.post(url, json={"rows": [{}]}, headers=auth_headers)
+    assert template_cache.stats() == {"size": 2, "maxsize": template_cache.maxsize, "hits": 1, "misses": 2}
+
+    response = client.post(url, json={"rows": [{"model": "a"}, {}], "strict": True}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Row 1")
+    monkeypatch.setattr(project_prompts, "MAX_RENDER_ROWS", 10)
+    assert client.post(url, json={"rows": rows}, headers=auth_headers).status_code == 413
@@ -0,0 +1,99 @@
+import pytest
+from app.models.task import Task
+from app.models.note import Note
+from app.models.tool import Tool
+from app.models.user import User
+
+def test_task_search_uses_index(client, auth_headers, db_session, test_user):
+    """测试任务搜索（全文索引，支持中文子串）"""
+    db_session.add_all([
+        Task(title="编写提示词模板", description="为客服场景准备", user_id=test_user.id),
+        Task(title="Review prompts", description="check the PROMPT library", user_id=test_user.id),
+        Task(title="Unrelated", description="nothing here", user_id=test_user.id),
+    ])
+    db_session.commit()
+
+    cases = [
+        ({"search": "提示词"}, 1),
+        ({"search": "prompt"}, 1),
+        ({"search": "客服场景"}, 1),
+        ({"search": "missing"}, 0),
+        # 少于 3 个字符时退回 LIKE
+        ({"search": "Un"}, 1),
+    ]
+    for params, expected in cases:
+        response = client.get("/api/tasks/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["total"] == expected, params
+
+def test_search_index_follows_writes(client, auth_headers):
+    """测试索引随写入同步更新"""
+    task_id = client.post("/api/tasks/", json={"title": "alpha task"}, headers=auth_headers).json()["id"]
+    assert client.get("/api/tasks/", params={"search": "alpha"}, headers=auth_headers).json()["total"] == 1
+
+    client.put(f"/api/tasks/{task_id}", json={"title": "beta task"}, headers=auth_headers)
+    assert client.get("/api/tasks/", params={"search": "alpha"}, headers=auth_headers).json()["total"] == 0
+    assert client.get("/api/tasks/", params={"search": "beta"}, headers=auth_headers).json()["total"] == 1
+
+    client.delete(f"/api/tasks/{task_id}", headers=auth_headers)
+    assert client.get("/api/tasks/", params={"search": "beta"}, headers=auth_headers).json()["total"] == 0
+
+def test_search_is_scoped_to_user(client, auth_headers, db_session):
+    """测试搜索不会返回其他用户的数据"""
+    other = User(username="other", email="other@example.com", hashed_password="x")
+    db_session.add(other)
+    db_session.commit()
+    db_session.add(Note(title="secret plan", content="private", user_id=other.id))
+    db_session.commit()
+
+    response = client.get("/api/notes/search", params={"q": "secret"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == []
+
+def test_note_search_ranked_with_snippets(client, auth_headers, db_session, test_user):
+    """测试笔记搜索返回排序结果和高亮片段"""
+    db_session.add_all([
+        Note(title="Other", content="mentions embedding once", user_id=test_user.id),
+        Note(title="Embedding notes", content="embedding vectors and embedding models", user_id=test_user.id),
+    ])
+    db_session.commit()
+
+    response = client.get("/api/notes/search", params={"q": "embedding"}, headers=auth_headers)
+    assert response.status_code == 200
+    hits = response.json()
+    assert [hit["title"] for hit in hits] == ["Embedding notes", "Other"]
+    assert "<mark>" in hits[0]["snippet"]
+
+def test_global_search(client, auth_headers, db_session, test_user):
+    """测试跨实体检索"""
+    db_session.add_all([
+        Task(title="deploy service", user_id=test_user.id),
+        Tool(name="Deploy helper", description="ci", url="https://example.com", category="code", user_id=test_user.id),
+    ])
+    db_session.commit()
+
+    response = client.get("/api/search/", params={"q": "deploy"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert sorted(hit["type"] for hit in response.json()["items"]) == ["tasks", "tools"]
+
+    response = client.get("/api/search/", params={"q": "deploy", "types": "tools"}, headers=auth_headers)
+    assert [hit["type"] for hit in response.json()["items"]] == ["tools"]
+
+def test_search_cursor_pagination(client, auth_headers, db_session, test_user):
+    """测试按相关度排序时的游标分页"""
+    db_session.add_all([
+        Task(title=f"report {i}", description="report " * (i + 1), user_id=test_user.id)
+        for i in range(5)
+    ])
+    db_session.commit()
+
+    params = {"search": "report", "order_by": "relevance", "page_size": 2}
+    seen = []
+    while True:
+        data = client.get("/api/tasks/", params=params, headers=auth_headers).json()
+        assert data["total"] == 5
+        seen.extend(t["id"] for t in data["items"])
+        if not data["next_cursor"]:
+            break
+        params["cursor"] = data["next_cursor"]
+    assert len(seen) == len(set(seen)) == 5
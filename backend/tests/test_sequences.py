@@ -0,0 +1,79 @@
+import threading
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.models.project_prompt import ProjectPrompt
+from app.models.user import User
+from app.services.sequences import ORDER_GAP
+
+def create_project(db_session, user_id):
+    project = Project(name="p", description="d", tech_stack={}, user_id=user_id)
+    db_session.add(project)
+    db_session.commit()
+    return project
+
+def test_concurrent_version_allocation(client, auth_headers, db_session, test_user):
+    """测试多线程并发创建版本时版本号不重复且连续"""
+    project = create_project(db_session, test_user.id)
+    step = ProjectStep(project_id=project.id, title="s", order=1)
+    db_session.add(step)
+    db_session.commit()
+    prompt_id = client.post("/api/project_prompts/", json={
+        "project_id": project.id, "step_id": step.id, "title": "t", "content": "c"
+    }, headers=auth_headers).json()["id"]
+
+    threads, per_thread = 8, 10
+    versions, failures = [], []
+    lock = threading.Lock()
+
+    def worker():
+        with TestClient(app) as thread_client:
+            for i in range(per_thread):
+                response = thread_client.post(f"/api/project_prompts/{prompt_id}/versions",
+                                              json={"content": f"c{i}"}, headers=auth_headers)
+                with lock:
+                    if response.status_code == 200:
+                        versions.append(response.json()["version"])
+                    else:
+                        failures.append(response.text)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    assert failures == []
+    assert sorted(versions) == list(range(2, threads * per_thread + 2))
+
+def test_order_sequences(client, auth_headers, db_session, test_user):
+    """测试步骤和提示词顺序号按范围分配"""
+    project = create_project(db_session, test_user.id)
+    other_user = User(username="other", email="other@example.com", hashed_password="x")
+    db_session.add(other_user)
+    db_session.commit()
+    other_project = create_project(db_session, other_user.id)
+    # 其他项目中不属于任何步骤的提示词不影响本项目的顺序号
+    db_session.add_all([
+        ProjectPrompt(project_id=other_project.id, title="x", content="x", version=1, order=50)
+        for _ in range(3)
+    ])
+    db_session.add(ProjectStep(project_id=project.id, title="existing", order=4))
+    db_session.commit()
+
+    orders = [
+        client.post("/api/project_steps/", json={
+            "project_id": project.id, "title": f"s{i}", "description": "d"
+        }, headers=auth_headers).json()["order"]
+        for i in range(3)
+    ]
+    assert orders == [4 + ORDER_GAP, 4 + 2 * ORDER_GAP, 4 + 3 * ORDER_GAP]
+
+    orders = [
+        client.post("/api/project_prompts/", json={
+            "project_id": project.id, "title": f"p{i}", "content": "c"
+        }, headers=auth_headers).json()["order"]
+        for i in range(2)
+    ]
+    assert orders == [ORDER_GAP, 2 * ORDER_GAP]
@@ -0,0 +1,62 @@
+import pytest
+from app.models.task import Task
+from app.models.tool import Tool
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.models.project_prompt import ProjectPrompt
+from app.schemas.task import TaskResponse
+from app.schemas.tool import ToolResponse
+from app.schemas.project import ProjectResponse
+from app.schemas.project_step import StepResponse
+from app.schemas.project_prompt import PromptResponse
+
+@pytest.fixture
+def resources(client, auth_headers, db_session, test_user):
+    """通过接口创建每种资源各一条，返回 {列表 URL: (模型, 响应模型)}"""
+    client.post("/api/tasks/", json={"title": "t", "description": "描述"}, headers=auth_headers)
+    db_session.add(Tool(name="工具", description="d", url="https://example.com/", category="code", user_id=test_user.id))
+    db_session.commit()
+    project = client.post("/api/projects/", json={
+        "name": "p", "description": "d", "tech_stack": {"backend": ["fastapi"]}
+    }, headers=auth_headers).json()
+    step = client.post("/api/project_steps/", json={
+        "project_id": project["id"], "title": "s", "description": "d"
+    }, headers=auth_headers).json()
+    first = client.post("/api/project_prompts/", json={
+        "project_id": project["id"], "step_id": step["id"], "title": "t", "content": "内容\n" * 30,
+        "variables": {"name": "名称"}
+    }, headers=auth_headers).json()
+    client.post(f"/api/project_prompts/{first['id']}/versions", json={"content": "内容\n" * 31}, headers=auth_headers)
+    return {
+        "/api/tasks/": (Task, TaskResponse),
+        "/api/tools/": (Tool, ToolResponse),
+        "/api/projects/": (Project, ProjectResponse),
+        f"/api/project_steps/project/{project['id']}": (ProjectStep, StepResponse),
+        f"/api/project_prompts/step/{step['id']}": (ProjectPrompt, PromptResponse),
+    }
+
+def test_fast_path_matches_response_models(client, auth_headers, db_session, resources):
+    """测试直接由查询行构造的列表与逐条经响应模型序列化的结果一致"""
+    for url, (model, schema) in resources.items():
+        items = client.get(url, headers=auth_headers).json()["items"]
+        assert items
+        db_session.expire_all()
+        expected = {}
+        for row in db_session.query(model):
+            data = {name: getattr(row, name) for name in schema.model_fields}
+            if model is ProjectPrompt:
+                # 差量存储的版本 content 为空，取版本历史接口还原后的内容
+                versions = client.get(f"/api/project_prompts/{row.id}/versions", headers=auth_headers).json()
+                data["content"] = next(v["content"] for v in versions if v["id"] == row.id)
+            expected[row.id] = schema.model_validate(data).model_dump(mode="json")
+        assert items == [expected[item["id"]] for item in items], url
+
+def test_msgpack_negotiation(client, auth_headers, resources):
+    """测试 Accept: application/msgpack 时返回 MessagePack"""
+    msgpack = pytest.importorskip("msgpack")
+    for url in resources:
+        expected = client.get(url, headers=auth_headers).json()
+        response = client.get(url, headers={**auth_headers, "Accept": "application/msgpack"})
+        assert response.headers["content-type"] == "application/msgpack"
+        assert "Accept" in response.headers["vary"]
+        assert msgpack.unpackb(response.content) == expected
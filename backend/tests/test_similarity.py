@@ -0,0 +1,89 @@
+import pytest
+from app.models.project import Project
+from app.models.project_step import ProjectStep
+from app.models.project_prompt import ProjectPrompt
+from app.models.user import User
+from app.services.similarity import SimilarityIndex, compute_signatures, similarity_indexes
+from app.utils.auth import get_password_hash
+
+np = pytest.importorskip("numpy")
+
+BASE = "你是一名资深的 Python 工程师，请为 FastAPI 项目设计用户认证模块，包括注册、登录、JWT 令牌刷新和权限校验。" * 3
+
+def test_signatures_estimate_jaccard():
+    """测试签名估计的相似度与字符 5-gram 的 Jaccard 相似度接近，LSH 只返回相似的候选"""
+    contents = [BASE, BASE.replace("注册", "注销"), BASE.upper() + "  另外请写单元测试。", "写一首关于秋天的诗。", "  ", None]
+    signatures, positions = compute_signatures(contents)
+    assert positions == [0, 1, 2, 3]
+    assert (signatures[0] == signatures[1]).mean() > 0.75
+    assert (signatures[0] == signatures[3]).mean() < 0.1
+    assert (compute_signatures([BASE])[0] == signatures[:1]).all()
+
+    index = SimilarityIndex(1)
+    for prompt_id, signature in zip(positions, signatures):
+        index.add(prompt_id, 1, prompt_id, True, signature)
+    assert [prompt_id for prompt_id, _ in index.query(signatures[0], 0, 0)] == [1, 2]
+    assert [[prompt_id for prompt_id, _ in cluster] for cluster in index.clusters(0.7)] == [[0, 1, 2]]
+    index.drop_step(1)
+    assert len(index) == 0
+    assert not any(index.buckets) and not any(index.shared)
+
+def add_prompt(db_session, project, step, content, **fields):
+    prompt = ProjectPrompt(project_id=project.id, step_id=step.id if step else None, title=content[:10],
+                           content=content, version=1, **fields)
+    db_session.add(prompt)
+    db_session.commit()
+    return prompt
+
+def test_similar_and_duplicates(client, auth_headers, db_session, test_user):
+    """测试相似提示词和重复分组随写入增量更新，跳过同一版本链，并按用户隔离"""
+    project = Project(name="p", description="d", tech_stack={}, user_id=test_user.id)
+    db_session.add(project)
+    db_session.commit()
+    steps = [ProjectStep(project_id=project.id, title=f"s{i}", order=i) for i in range(2)]
+    db_session.add_all(steps)
+    db_session.commit()
+    original = add_prompt(db_session, project, steps[0], BASE)
+    copy = add_prompt(db_session, project, steps[1], BASE.replace("注册", "注销"))
+    add_prompt(db_session, project, steps[1], "写一首关于秋天的诗。" * 5)
+
+    response = client.get(f"/api/project_prompts/{original.id}/similar", headers=auth_headers)
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [item["id"] for item in items] == [copy.id]
+    assert 0.7 <= items[0]["similarity"] < 1
+
+    # 新版本与原版本同属一条版本链，默认不算重复；通过接口新建的相似提示词会被发现
+    version = client.post(f"/api/project_prompts/{original.id}/versions", json={"content": BASE + "补充"},
+                          headers=auth_headers).json()
+    third = client.post("/api/project_prompts/", json={
+        "project_id": project.id, "step_id": steps[0].id, "title": "t", "content": BASE + "。"
+    }, headers=auth_headers).json()
+    report = client.get("/api/project_prompts/duplicates", params={"threshold": 0.7}, headers=auth_headers).json()
+    assert [[item["id"] for item in cluster["items"]] for cluster in report["clusters"]] == \
+        [[copy.id, version["id"], third["id"]]]
+    assert report["clusters"][0]["items"][0]["similarity"] == 1.0
+    with_versions = client.get("/api/project_prompts/duplicates", params={"threshold": 0.7, "include_versions": True},
+                               headers=auth_headers).json()
+    assert with_versions["clusters"][0]["size"] == 4
+
+    # 原地修改内容和删除都会反映到索引中
+    client.put(f"/api/project_prompts/{third['id']}", json={"content": "完全不同的内容" * 10}, headers=auth_headers)
+    client.delete(f"/api/project_prompts/{copy.id}", headers=auth_headers)
+    items = client.get(f"/api/project_prompts/{version['id']}/similar", headers=auth_headers).json()["items"]
+    assert items == []
+    stats = client.get("/api/metrics", headers=auth_headers).json()["similarity_index"]
+    assert stats["users"] == 1 and stats["prompts"] == 4
+
+    # 未归属步骤的提示词现算签名
+    loose = add_prompt(db_session, project, None, BASE.replace("注册", "注销"))
+    items = client.get(f"/api/project_prompts/{loose.id}/similar", headers=auth_headers).json()["items"]
+    assert [item["id"] for item in items] == [version["id"]]
+
+    db_session.add(User(username="other", email="other@example.com", hashed_password=get_password_hash("pw")))
+    db_session.commit()
+    token = client.post("/api/auth/login", data={"username": "other", "password": "pw"}).json()["access_token"]
+    other = {"Authorization": f"Bearer {token}"}
+    assert client.get(f"/api/project_prompts/{original.id}/similar", headers=other).status_code == 404
+    assert client.get("/api/project_prompts/duplicates", headers=other).json() == {"clusters": []}
+    assert similarity_indexes.stats()["users"] == 2
@@ -161,4 +161,86 @@ def test_invalid_requests(client, auth_headers):
         "/api/tasks/999",
         headers=auth_headers
     )
-    assert response.status_code == 404 
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_cursor_pagination(client, auth_headers, db_session, test_user):
+    """测试游标分页：逐页遍历的结果与一次性排序结果一致"""
+    db_session.add_all([
+        Task(title=f"Task {i % 4}", user_id=test_user.id)
+        for i in range(11)
+    ])
+    db_session.commit()
+
+    for order_by in ["created_asc", "created_desc", "title_asc", "title_desc"]:
+        expected = client.get(
+            "/api/tasks/",
+            params={"order_by": order_by, "page_size": 100},
+            headers=auth_headers
+        ).json()["items"]
+
+        seen = []
+        params = {"order_by": order_by, "page_size": 4}
+        while True:
+            data = client.get("/api/tasks/", params=params, headers=auth_headers).json()
+            seen.extend(data["items"])
+            if not data["next_cursor"]:
+                break
+            params["cursor"] = data["next_cursor"]
+
+        assert [t["id"] for t in seen] == [t["id"] for t in expected]
+        assert len(seen) == 11
+
+def test_invalid_cursor(client, auth_headers, db_session, test_user):
+    """测试无效或不匹配排序方式的游标"""
+    db_session.add_all([Task(title=f"Task {i}", user_id=test_user.id) for i in range(3)])
+    db_session.commit()
+
+    response = client.get("/api/tasks/", params={"cursor": "garbage"}, headers=auth_headers)
+    assert response.status_code == 400
+
+    cursor = client.get(
+        "/api/tasks/", params={"page_size": 1, "order_by": "title_asc"}, headers=auth_headers
+    ).json()["next_cursor"]
+    response = client.get(
+        "/api/tasks/", params={"cursor": cursor, "order_by": "created_desc"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+def test_task_counters(client, auth_headers, db_session, test_user):
+    """测试计数行随增删改同步维护"""
+    ids = [
+        client.post("/api/tasks/", json={"title": f"Task {i}"}, headers=auth_headers).json()["id"]
+        for i in range(4)
+    ]
+    client.put(f"/api/tasks/{ids[0]}", json={"completed": True}, headers=auth_headers)
+    client.delete(f"/api/tasks/{ids[1]}", headers=auth_headers)
+
+    def total(**params):
+        return client.get("/api/tasks/", params=params, headers=auth_headers).json()["total"]
+
+    assert total() == 3
+    assert total(status="completed") == 1
+    assert total(status="pending") == 2
+
+def test_search_count_modes(client, auth_headers, db_session, test_user, monkeypatch):
+    """测试带搜索条件时的计数模式"""
+    from app.services import counters
+    monkeypatch.setattr(counters, "COUNT_CAP", 5)
+    monkeypatch.setattr(counters, "ESTIMATE_SAMPLE", 10)
+    db_session.add_all([
+        Task(title=f"match {i}" if i % 2 == 0 else f"other {i}", user_id=test_user.id)
+        for i in range(40)
+    ])
+    db_session.commit()
+
+    def fetch(mode):
+        return client.get(
+            "/api/tasks/", params={"search": "match", "count_mode": mode}, headers=auth_headers
+        ).json()
+
+    data = fetch("exact")
+    assert (data["total"], data["total_exact"]) == (20, True)
+    data = fetch("capped")
+    assert (data["total"], data["total_exact"]) == (5, False)
+    data = fetch("estimate")
+    assert (data["total"], data["total_exact"]) == (20, False)